@@ -0,0 +1,51 @@
+import json
+import timeit
+
+from benchmarks.bench_scan import open_simulated_stage
+
+
+def measure_axis_dispatch(number: int = 100000, latency: float = 0.0005) -> dict:
+    """Cost of resolving an axis id to its Standa object, once as the former eval(f"self.axis{axis}") dispatch of
+    StandaTwoAxes and once through the AxisTable, plus reading both angles with get_angle per axis and with
+    get_angles. Positions come from the position cache, so the reads measure the Python side only.
+
+    :param number: calls per variant
+    :return: microseconds per call for every variant
+    """
+    stage = open_simulated_stage(latency)
+    axis = stage.axis1_id
+    for axis_object in stage.axes.values():
+        axis_object.position_max_age = 3600.0
+    stage.get_angles()
+
+    def eval_dispatch(self=stage):
+        selected = axis
+        if isinstance(selected, (str, float)):
+            selected = int(selected)
+        return eval(f"self.axis{selected}")
+
+    def table_dispatch():
+        return stage.axes[axis]
+
+    def name_dispatch():
+        return stage.axes["Roll"]
+
+    def get_angle_per_axis():
+        return [stage.get_angle(axis_id) for axis_id in (1, 2)]
+
+    results = {}
+    for name, function in (("eval_dispatch", eval_dispatch), ("table_dispatch", table_dispatch),
+                           ("name_dispatch", name_dispatch), ("get_angle_per_axis", get_angle_per_axis),
+                           ("get_angles", stage.get_angles)):
+        seconds = min(timeit.repeat(function, number=number, repeat=3))
+        results[f"{name}_us"] = seconds / number * 1e6
+    stage.close_connection()
+    return results
+
+
+def main():
+    print(json.dumps(measure_axis_dispatch(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
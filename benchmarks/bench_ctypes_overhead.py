@@ -0,0 +1,75 @@
+import json
+import timeit
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.standa_simulator import SimulatedLibximc
+
+_get_position_calb_callback = CFUNCTYPE(c_int, c_int, c_void_p, c_void_p)
+
+
+def _export_get_position_calb(sim: SimulatedLibximc):
+    """Exposes the simulator's get_position_calb as a C function pointer, so that calls go through the same ctypes
+    argument conversion as calls into libximc.dll.
+
+    :return: the callback object (must be kept alive) and its address
+    """
+    def get_position_calb(handle, position, calibration):
+        try:
+            return sim.get_position_calb(handle, get_position_calb_t.from_address(position),
+                                         calibration_t.from_address(calibration))
+        except XimcError as error:
+            return error.result
+
+    callback = _get_position_calb_callback(get_position_calb)
+    return callback, cast(callback, c_void_p).value
+
+
+def measure_get_position_calb(number: int = 200000) -> dict:
+    """Per-call cost of get_position_calb without prototypes (dynamic conversion, byref per call) and with the
+    prototype from libximc_prototypes (argtypes, restype and errcheck bound once).
+
+    The prototype is not faster. errcheck adds a Python call to every call, so the prototyped variant measures the
+    same or up to about 2 us slower here. It is kept for checked argument types and XimcError reporting. This
+    benchmark shows what that costs.
+
+    :param number: calls per variant
+    :return: microseconds per call for both variants
+    """
+    sim = SimulatedLibximc()
+    handle = sim.open_device(sim.device_name(sim.axes[0].serial))
+    callback, address = _export_get_position_calb(sim)
+
+    position = get_position_calb_t()
+    calibration = calibration_t(A=1 / 949, MicrostepMode=MicrostepMode.MICROSTEP_MODE_FRAC_256)
+
+    untyped = CFUNCTYPE(c_int)(address)
+
+    def untyped_call():
+        if untyped(handle, byref(position), byref(calibration)) == Result.Ok:
+            return position.Position
+        return 0.0
+
+    restype, argtypes, errcheck = libximc_prototypes["get_position_calb"]
+    prototyped = CFUNCTYPE(restype, *argtypes)(address)
+    prototyped.errcheck = errcheck
+
+    def prototyped_call():
+        try:
+            prototyped(handle, position, calibration)
+        except XimcError:
+            return 0.0
+        return position.Position
+
+    results = {}
+    for name, function in (("untyped", untyped_call), ("prototyped", prototyped_call)):
+        seconds = min(timeit.repeat(function, number=number, repeat=3))
+        results[f"{name}_us_per_call"] = seconds / number * 1e6
+    return results
+
+
+def main():
+    print(json.dumps(measure_get_position_calb(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import json
+import time
+
+import numpy as np
+
+from benchmarks.bench_scan import open_simulated_stage
+from src.stage_type.STANDA_bindings import move_settings_t
+from src.stage_type.standa_fly_scan import FlyScan
+
+
+def measure_fly_scan(points: int = 200, step: float = 0.05, speed: float = 10.0, accel: int = 60000,
+                     latency: float = 0.0005) -> dict:
+    """Points per second of a 1-D sweep over one simulated axis, once stop-and-go with move_absolut per point and once
+    as fly scan, plus the deviation of the fly-scan triggers from their requested positions.
+
+    :param speed: fly-scan speed in degrees/s
+    :param accel: Accel and Decel of the axis in steps/s^2
+    :return: measured values
+    """
+    stage = open_simulated_stage(latency)
+    axis = stage.axis1
+    settings = move_settings_t()
+    axis.lib.get_move_settings(axis.handle, settings)
+    settings.Accel = settings.Decel = accel
+    axis.lib.set_move_settings(axis.handle, settings)
+    axis._motion_limits_stale = True
+    positions = np.arange(points) * step
+
+    axis.move_absolut(positions[0])
+    start = time.perf_counter()
+    for position in positions:
+        axis.move_absolut(position)
+    stop_and_go_seconds = time.perf_counter() - start
+
+    result = FlyScan(axis).run(positions, speed)
+    deviation = np.abs(result.triggers["position"] - result.triggers["target"])
+    stage.close_connection()
+    return {
+        "points": points,
+        "stop_and_go_points_per_second": points / stop_and_go_seconds,
+        "fly_scan_points_per_second": result.points_per_second,
+        "fly_scan_trajectory_samples": len(result.trajectory),
+        "trigger_deviation_mean": float(deviation.mean()),
+        "trigger_deviation_max": float(deviation.max()),
+        "trigger_error_bound_max": float(result.triggers["error"].max()),
+    }
+
+
+def main():
+    print(json.dumps(measure_fly_scan(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
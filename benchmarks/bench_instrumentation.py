@@ -0,0 +1,44 @@
+import json
+import timeit
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.standa_instrumentation import InstrumentedLibximc
+from src.stage_type.standa_simulator import SimulatedLibximc
+
+
+def measure_instrumentation(number: int = 200000) -> dict:
+    """Per-call cost of get_position_calb on a zero-latency simulator: directly on the backend, through
+    InstrumentedLibximc with disabled measurement and with enabled measurement.
+
+    :param number: calls per variant
+    :return: microseconds per call for every variant, overheads relative to the direct call and a sample snapshot
+    """
+    sim = SimulatedLibximc()
+    handle = sim.open_device(sim.device_name(sim.axes[0].serial))
+    instrumented = InstrumentedLibximc(sim)
+    position = get_position_calb_t()
+    calibration = calibration_t(A=1 / 949, MicrostepMode=MicrostepMode.MICROSTEP_MODE_FRAC_256)
+
+    def direct():
+        sim.get_position_calb(handle, position, calibration)
+
+    def wrapped():
+        instrumented.get_position_calb(handle, position, calibration)
+
+    results = {}
+    results["direct_us_per_call"] = min(timeit.repeat(direct, number=number, repeat=3)) / number * 1e6
+    results["disabled_us_per_call"] = min(timeit.repeat(wrapped, number=number, repeat=3)) / number * 1e6
+    instrumented.enable()
+    results["enabled_us_per_call"] = min(timeit.repeat(wrapped, number=number, repeat=3)) / number * 1e6
+    results["disabled_overhead_us"] = results["disabled_us_per_call"] - results["direct_us_per_call"]
+    results["enabled_overhead_us"] = results["enabled_us_per_call"] - results["direct_us_per_call"]
+    results["snapshot"] = instrumented.snapshot()
+    return results
+
+
+def main():
+    print(json.dumps(measure_instrumentation(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import json
+import time
+
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_simulator import SimulatedLibximc
+
+
+def measure_short_steps(steps: int = 50, step: float = 0.1, latency: float = 0.0005) -> dict:
+    """Time per short relative step when waiting with command_wait_for_stop (fixed 20 ms refresh) and with the
+    adaptive get_status polling of Standa.wait_for_stop.
+
+    :param steps: number of steps per variant
+    :param step: step width in degrees
+    :param latency: simulated command latency in seconds
+    :return: milliseconds per step for both variants
+    """
+    sim = SimulatedLibximc(latency=latency)
+    Standa.set_backend(sim)
+    axis = Standa(Standa.open_device(sim.device_name(sim.axes[0].serial)))
+    axis.set_default_settings({"engine_settings_calb": 9, "unit_multiplier": 949, "speed": 30000})
+
+    def fixed_interval():
+        axis.move_towards(axis._target + step)
+        axis._call(axis.lib.command_wait_for_stop, axis._interval)
+
+    def adaptive():
+        axis.move_towards(axis._target + step)
+        axis.wait_for_stop()
+
+    results = {}
+    for name, function in (("command_wait_for_stop", fixed_interval), ("adaptive", adaptive)):
+        axis.move_absolut(0.0)
+        start = time.perf_counter()
+        for _ in range(steps):
+            function()
+        results[f"{name}_ms_per_step"] = (time.perf_counter() - start) / steps * 1000
+    axis.close_connection()
+    return results
+
+
+def main():
+    print(json.dumps(measure_short_steps(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import json
+import time
+
+from benchmarks.bench_scan import open_simulated_stage
+
+
+def measure_relative_steps(steps: int = 100, step: float = 0.01, latency: float = 0.0005) -> dict:
+    """Relative steps per second, once as position read plus absolute move (the former Standa.move_relative) and
+    once with Standa.move_relative, which sends command_movr_calb without reading the position.
+
+    :return: steps per second of both variants and the final position of the new path
+    """
+    stage = open_simulated_stage(latency)
+    axis = stage.axis1
+    axis.move_absolut(0.0)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        axis.move_absolut(axis.get_position_calb() + step)
+    read_and_move_seconds = time.perf_counter() - start
+
+    axis.move_absolut(0.0)
+    calls = axis.lib.call_count
+    start = time.perf_counter()
+    for _ in range(steps):
+        axis.move_relative(step)
+    relative_seconds = time.perf_counter() - start
+    calls = axis.lib.call_count - calls
+    position = axis.get_position_calb()
+    stage.close_connection()
+    return {
+        "steps": steps,
+        "read_and_move_steps_per_second": steps / read_and_move_seconds,
+        "move_relative_steps_per_second": steps / relative_seconds,
+        "move_relative_calls_per_step": calls / steps,
+        "final_position": position,
+    }
+
+
+def main():
+    print(json.dumps(measure_relative_steps(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+import json
+import time
+
+import numpy as np
+
+from src.stage_type.scan_planner import ScanPlanner
+
+# Speed/Accel/Decel in degrees, similar to the default move settings of the Roll and Nick axes
+_limits = [(31.6, 200.0, 200.0), (32.1, 150.0, 150.0)]
+
+
+def measure_planner(points: int = 10000, seed: int = 0) -> dict:
+    """Estimated move time of random scan points in the given order, in serpentine order and in nearest-neighbour
+    order with 2-opt, plus the planning time of the nearest-neighbour tour.
+
+    :return: estimated seconds per order and planning seconds
+    """
+    planner = ScanPlanner(_limits)
+    targets = np.random.default_rng(seed).uniform(-20, 20, size=(points, 2))
+
+    start = time.perf_counter()
+    plan = planner.nearest_neighbour(targets)
+    planning_seconds = time.perf_counter() - start
+    return {
+        "points": points,
+        "given_order_seconds": planner.path_time(targets),
+        "serpentine_seconds": planner.serpentine(targets, row_tolerance=1.0).estimated_time,
+        "nearest_neighbour_seconds": plan.estimated_time,
+        "planning_seconds": planning_seconds,
+    }
+
+
+def main():
+    print(json.dumps(measure_planner(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
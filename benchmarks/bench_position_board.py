@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+from benchmarks.bench_scan import open_simulated_stage
+from src.stage_type.standa_position_board import PositionBoard, PositionBoardPublisher
+
+
+def _read_board(name: str, seconds: float, results):
+    """Reader process: reads the board as fast as possible and records the age of every snapshot."""
+    board = PositionBoard(name)
+    reads = 0
+    ages = []
+    last_sequence = 0
+    backwards = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sequence, records = board.read()
+        if sequence < last_sequence:
+            backwards += 1
+        last_sequence = sequence
+        if reads % 64 == 0:
+            ages.append(float((time.monotonic_ns() - records["t_ns"].max()) / 1e6))
+        reads += 1
+    board.close()
+    results.put({"reads": reads, "ages_ms": ages, "retries": board.retries, "backwards": backwards})
+
+
+def measure_position_board(readers: int = 4, seconds: float = 2.0, rate: float = 200.0,
+                           latency: float = 0.0005) -> dict:
+    """Reads per second and staleness of PositionBoard readers in separate processes while the owning process publishes
+    both axes of a simulated stage, which moves during the measurement.
+
+    :param readers: number of reader processes
+    :param rate: publisher updates per second
+    :return: measured values
+    """
+    stage = open_simulated_stage(latency)
+    name = f"api_angle_stage_bench_{multiprocessing.current_process().pid}"
+    publisher = PositionBoardPublisher(stage, name, rate=rate).start()
+    stage.move_towards(stage.axis1_id, 20.0)
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=_read_board, args=(name, seconds, results)) for _ in range(readers)]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    stage.stop_movement()
+    publisher.close()
+    stage.close_connection()
+    ages = np.concatenate([report["ages_ms"] for report in reports])
+    return {
+        "readers": readers,
+        "publish_rate": rate,
+        "reads_per_second_per_reader": float(np.mean([report["reads"] for report in reports]) / seconds),
+        "staleness_p50_ms": float(np.percentile(ages, 50)),
+        "staleness_p99_ms": float(np.percentile(ages, 99)),
+        "retries": sum(report["retries"] for report in reports),
+        "sequence_went_backwards": sum(report["backwards"] for report in reports),
+        "publish_errors": publisher.errors,
+    }
+
+
+def main():
+    print(json.dumps(measure_position_board(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
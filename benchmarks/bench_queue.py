@@ -0,0 +1,45 @@
+import json
+import time
+
+from benchmarks.bench_scan import open_simulated_stage
+from src.stage_type.standa_queue import MotionQueue
+
+
+def measure_relative_steps(steps: int = 100, step: float = 0.01, latency: float = 0.0005) -> dict:
+    """Moves per second of a chain of small relative moves, once with the blocking Standa.move_relative and once
+    enqueued on a MotionQueue.
+
+    :return: moves per second for both variants and the final position error of the queue
+    """
+    stage = open_simulated_stage(latency)
+    axis = stage.axis1
+    axis.move_absolut(0.0)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        axis.move_relative(step)
+    blocking_seconds = time.perf_counter() - start
+
+    axis.move_absolut(0.0)
+    motion_queue = MotionQueue(axis)
+    start = time.perf_counter()
+    futures = [motion_queue.move_relative(step) for _ in range(steps)]
+    motion_queue.join()
+    queued_seconds = time.perf_counter() - start
+    final = futures[-1].result()
+    motion_queue.close()
+    stage.close_connection()
+    return {
+        "steps": steps,
+        "move_relative_moves_per_second": steps / blocking_seconds,
+        "queue_moves_per_second": steps / queued_seconds,
+        "queue_final_error": abs(final.position - steps * step),
+    }
+
+
+def main():
+    print(json.dumps(measure_relative_steps(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_scan import grid
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_registry import DeviceRegistry
+from src.stage_type.standa_scan import ScanExecutor
+from src.stage_type.standa_simulator import SimulatedLibximc
+from src.stage_type.standa_trace import RecordingLibximc, ReplayLibximc, read_trace
+from src.stage_type.standa_two_axes import StandaTwoAxes
+
+
+def _scan(backend, targets) -> tuple:
+    """Connects a StandaTwoAxes through backend, runs the raster with ScanExecutor and returns (seconds, angles)."""
+    Standa.set_backend(backend)
+    stage = StandaTwoAxes(DeviceRegistry(Path(tempfile.mkdtemp()) / "standa_devices.json"))
+    stage.open_connection()
+    stage.go_home()
+    start = time.perf_counter()
+    ScanExecutor(stage).run(targets)
+    seconds = time.perf_counter() - start
+    angles = stage.get_angles()
+    stage.close_connection()
+    return seconds, angles
+
+
+def _per_call_us(backend, number: int) -> float:
+    Standa.set_backend(backend)
+    axis = Standa(Standa.open_device(SimulatedLibximc.device_name(30314)))
+    start = time.perf_counter()
+    for _ in range(number):
+        axis.get_position_calb()
+    elapsed = time.perf_counter() - start
+    axis.close_connection()
+    return elapsed / number * 1e6
+
+
+def measure_replay(rows: int = 6, columns: int = 6, latency: float = 0.0005, number: int = 20000) -> dict:
+    """Records a raster scan on the simulator, replays the trace without the simulator and compares scan time and
+    final angles. Also measures the recording overhead per call against a zero-latency simulator.
+
+    :return: measured values
+    """
+    path = os.path.join(tempfile.mkdtemp(), "scan.xtrace")
+    targets = grid(rows, columns)
+
+    recorder = RecordingLibximc(SimulatedLibximc(latency=latency), path)
+    recorded_seconds, recorded_angles = _scan(recorder, targets)
+    recorder.close()
+    calls = read_trace(path)
+
+    replay = ReplayLibximc(path)
+    replayed_seconds, replayed_angles = _scan(replay, targets)
+
+    plain_us = _per_call_us(SimulatedLibximc(), number)
+    overhead_path = os.path.join(tempfile.mkdtemp(), "overhead.xtrace")
+    with RecordingLibximc(SimulatedLibximc(), overhead_path) as overhead_recorder:
+        recording_us = _per_call_us(overhead_recorder, number)
+    return {
+        "points": len(targets),
+        "recorded_calls": len(calls),
+        "trace_bytes_per_call": os.path.getsize(path) / len(calls),
+        "recorded_scan_seconds": recorded_seconds,
+        "replayed_scan_seconds": replayed_seconds,
+        "recorded_angles": recorded_angles,
+        "replayed_angles": replayed_angles,
+        "replay_missing_calls": replay.missing,
+        "get_position_calb_us": plain_us,
+        "get_position_calb_recording_us": recording_us,
+        "recording_overhead_us": recording_us - plain_us,
+    }
+
+
+def main():
+    print(json.dumps(measure_replay(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_registry import DeviceRegistry
+from src.stage_type.standa_scan import ScanExecutor
+from src.stage_type.standa_simulator import SimulatedLibximc
+from src.stage_type.standa_two_axes import StandaTwoAxes
+
+
+def open_simulated_stage(latency: float = 0.0005) -> StandaTwoAxes:
+    """StandaTwoAxes connected to a fresh SimulatedLibximc with the given command latency."""
+    Standa.set_backend(SimulatedLibximc(latency=latency))
+    registry = DeviceRegistry(Path(tempfile.mkdtemp()) / "standa_devices.json")
+    stage = StandaTwoAxes(registry)
+    stage.open_connection()
+    return stage
+
+
+def grid(rows: int, columns: int, step: float = 0.1) -> np.ndarray:
+    roll, nick = np.meshgrid(np.arange(columns) * step, np.arange(rows) * step)
+    return np.column_stack([roll.ravel(), nick.ravel()])
+
+
+def scatter(points: int, span: float = 2.0) -> np.ndarray:
+    """Random Roll/Nick targets, both axes move a different distance at every point."""
+    return np.random.default_rng(1).uniform(0.0, span, (points, 2))
+
+
+def _executor_scan(stage: StandaTwoAxes, targets: np.ndarray, overlap: bool):
+    stage.go_home()
+    return ScanExecutor(stage).run(targets, overlap=overlap)
+
+
+def measure_grid_scan(rows: int = 8, columns: int = 8, latency: float = 0.0005) -> dict:
+    """Points per second of a Roll/Nick raster, once as the plain loop of move_absolut/get_angle calls and once with
+    ScanExecutor, with and without overlap. Overlap is also measured on random points, where both axes move at every
+    point.
+
+    :return: points per second for all variants
+    """
+    stage = open_simulated_stage(latency)
+    targets = grid(rows, columns)
+
+    stage.go_home()
+    start = time.perf_counter()
+    for roll, nick in targets:
+        stage.move_absolut(stage.axis1_id, roll)
+        stage.move_absolut(stage.axis2_id, nick)
+        stage.get_angle(stage.axis1_id)
+        stage.get_angle(stage.axis2_id)
+    loop_seconds = time.perf_counter() - start
+
+    result = _executor_scan(stage, targets, False)
+    overlapped = _executor_scan(stage, targets, True)
+    random_targets = scatter(len(targets))
+    random_result = _executor_scan(stage, random_targets, False)
+    random_overlapped = _executor_scan(stage, random_targets, True)
+    stage.close_connection()
+    return {
+        "points": len(targets),
+        "loop_points_per_second": len(targets) / loop_seconds,
+        "executor_points_per_second": result.points_per_second,
+        "executor_overlap_points_per_second": overlapped.points_per_second,
+        "executor_max_error": float(np.abs(result.points["achieved"] - result.points["commanded"]).max()),
+        "random_executor_points_per_second": random_result.points_per_second,
+        "random_executor_overlap_points_per_second": random_overlapped.points_per_second,
+    }
+
+
+def main():
+    print(json.dumps(measure_grid_scan(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_scan import open_simulated_stage
+from src.stage_type.standa_server import StageClient, StageServer
+
+
+def _latencies(function, number: int) -> np.ndarray:
+    times = np.empty(number)
+    for index in range(number):
+        start = time.perf_counter()
+        function()
+        times[index] = time.perf_counter() - start
+    return times * 1e6
+
+
+def measure_stage_server(number: int = 2000, clients: int = 8, latency: float = 0.0005) -> dict:
+    """Request latency of StageClient against a StageServer that owns a simulated StandaTwoAxes. Positions are served
+    from the position cache, so the reads measure the socket round trip plus dispatch.
+
+    :param number: requests per measurement
+    :param clients: number of concurrent client connections for the throughput measurement
+    :return: latency percentiles in microseconds and requests per second
+    """
+    stage = open_simulated_stage(latency)
+    for axis in stage.axes.values():
+        axis.position_max_age = 3600.0
+    stage.get_angles()
+    address = os.path.join(tempfile.mkdtemp(), "stage.sock")
+    server = StageServer(stage, address).start()
+
+    client = StageClient(address)
+    client.open_connection()
+    get_angle = _latencies(lambda: client.get_angle(1), number)
+
+    def separate():
+        for axis in (1, 2, 1, 2):
+            client.get_angle(axis)
+
+    def batched():
+        with client.batch() as batch:
+            for axis in (1, 2, 1, 2):
+                batch.get_angle(axis)
+
+    separate_reads = _latencies(separate, number // 4)
+    batched_reads = _latencies(batched, number // 4)
+
+    connections = [StageClient(address) for _ in range(clients)]
+    for connection in connections:
+        connection.open_connection()
+
+    def hammer(connection):
+        for _ in range(number // clients):
+            connection.get_angle(1)
+
+    threads = [threading.Thread(target=hammer, args=(connection,)) for connection in connections]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent_seconds = time.perf_counter() - start
+
+    pushes = []
+    client.subscribe(lambda timestamp, angles: pushes.append(timestamp), interval=0.01)
+    time.sleep(0.5)
+    client.unsubscribe()
+
+    client.move_absolut_many({1: 1.0, 2: -1.0})
+    final = client.get_angles()
+    for connection in connections + [client]:
+        connection.close_connection()
+    server.close()
+    stage.close_connection()
+    return {
+        "get_angle_p50_us": float(np.percentile(get_angle, 50)),
+        "get_angle_p99_us": float(np.percentile(get_angle, 99)),
+        "four_reads_separate_us": float(np.median(separate_reads)),
+        "four_reads_batched_us": float(np.median(batched_reads)),
+        "concurrent_clients": clients,
+        "concurrent_requests_per_second": (number // clients) * clients / concurrent_seconds,
+        "subscription_pushes_per_second": len(pushes) / 0.5,
+        "final_angles": final,
+    }
+
+
+def main():
+    print(json.dumps(measure_stage_server(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parents[1]
+
+_SNIPPET = """
+import time
+start = time.perf_counter()
+from src.api_angle_stage import AngleStageAPI, available_stages
+api = AngleStageAPI()
+stages = list(available_stages)
+elapsed = time.perf_counter() - start
+import sys
+heavy = sorted(name for name in ("PyQt5", "numpy", "src.stage_type.Standa") if name in sys.modules)
+print(elapsed, ",".join(heavy))
+"""
+
+
+def measure_startup(repeat: int = 5) -> dict:
+    """Measures the time to import AngleStageAPI and list the available stages in a fresh interpreter.
+
+    :param repeat: number of interpreter starts, the fastest one is reported
+    :return: import time in seconds and the heavy modules that were pulled in by the import
+    """
+    times = []
+    heavy = ""
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _SNIPPET], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.split()
+        times.append(float(output[0]))
+        heavy = output[1] if len(output) > 1 else ""
+    return {"import_seconds": min(times), "heavy_modules": heavy.split(",") if heavy else []}
+
+
+def main():
+    print(json.dumps(measure_startup(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import json
+import time
+
+import numpy as np
+
+from benchmarks.bench_scan import open_simulated_stage
+
+
+def measure_step_conversion(points: int = 100000, commands: int = 20000) -> dict:
+    """Conversion of a whole scan plan to (step, mstep) with StepConverter.to_steps against one conversion per point,
+    and the host cost per move command with pre-converted integer targets (command_move) against the calibrated
+    command_move_calb, both against a zero-latency simulator.
+
+    :param points: targets in the plan
+    :param commands: move commands per command variant
+    :return: measured values
+    """
+    stage = open_simulated_stage(0.0)
+    axis = stage.axis1
+    converter = axis.step_converter()
+    plan = np.random.default_rng(1).uniform(-180.0, 180.0, points)
+
+    start = time.perf_counter()
+    step, mstep = converter.to_steps(plan)
+    vectorized = time.perf_counter() - start
+
+    values = plan.tolist()
+    start = time.perf_counter()
+    scalar = [converter.step_target(value) for value in values]
+    per_point = time.perf_counter() - start
+
+    lib, handle, calibration = axis.lib, axis.handle, axis.calibration_t
+    targets = values[:commands]
+    start = time.perf_counter()
+    for value in targets:
+        lib.command_move_calb(handle, value, calibration)
+    calibrated = time.perf_counter() - start
+
+    integer_targets = np.column_stack([step[:commands], mstep[:commands]]).tolist()
+    start = time.perf_counter()
+    for target_step, target_mstep in integer_targets:
+        lib.command_move(handle, target_step, target_mstep)
+    integer = time.perf_counter() - start
+    axis.stop()
+    stage.close_connection()
+
+    achieved = converter.to_user(step, mstep)
+    return {
+        "points": points,
+        "microsteps_per_step": converter.fraction,
+        "plan_vectorized_ms": vectorized * 1000,
+        "plan_per_point_ms": per_point * 1000,
+        "scalar_vector_mismatches": int(np.count_nonzero(np.array(scalar) != np.column_stack([step, mstep]))),
+        "round_trip_max_error": float(np.abs(achieved - plan).max()),
+        "half_microstep": converter.a / converter.fraction / 2,
+        "float32_max_error": float(np.abs(plan.astype(np.float32).astype(np.float64) - plan).max()),
+        "command_move_calb_us": calibrated / len(targets) * 1e6,
+        "command_move_preconverted_us": integer / len(integer_targets) * 1e6,
+    }
+
+
+def main():
+    print(json.dumps(measure_step_conversion(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
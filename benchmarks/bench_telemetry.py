@@ -0,0 +1,56 @@
+import gc
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_scan import open_simulated_stage
+from src.stage_type.standa_telemetry import TelemetrySampler
+
+
+def measure_sampler(rate: float = 500.0, seconds: float = 5.0, capacity: int = 1000) -> dict:
+    """Samples one simulated axis while it moves and reports the achieved rate, the timestamp jitter, the memory
+    growth and the garbage collections during the run. The buffer is smaller than the run, so it wraps several times.
+
+    :return: measured values
+    """
+    stage = open_simulated_stage(latency=0.0)
+    sampler = TelemetrySampler(stage.axis1, rate=rate, capacity=capacity)
+    sampler.start()
+    stage.move_towards(stage.axis1_id, 50.0)
+    time.sleep(0.5)
+
+    collections = [generation["collections"] for generation in gc.get_stats()]
+    tracemalloc.start()
+    first_count = sampler.count
+    start = time.perf_counter()
+    time.sleep(seconds)
+    elapsed = time.perf_counter() - start
+    samples = sampler.count - first_count
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = [generation["collections"] - before for generation, before in zip(gc.get_stats(), collections)]
+    sampler.stop()
+
+    intervals = np.diff(sampler.snapshot()["t_ns"]) / 1e6
+    stage.stop_movement()
+    stage.close_connection()
+    return {
+        "target_rate": rate,
+        "achieved_rate": samples / elapsed,
+        "interval_ms_mean": float(intervals.mean()),
+        "interval_ms_std": float(intervals.std()),
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "gc_collections": collections,
+        "errors": sampler.errors,
+    }
+
+
+def main():
+    print(json.dumps(measure_sampler(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""Benchmark suite of the stage API hot paths against SimulatedLibximc.
+
+    PYTHONPATH=. python -m benchmarks.run_benchmarks --latency 0.0005 --output results.json
+    PYTHONPATH=. python -m benchmarks.run_benchmarks --baseline results.json
+
+Every benchmark runs --repeat times; the result of a metric is the median of its runs, all runs are kept under
+"samples". Metrics ending in "_per_second" are better when higher, all others (times) when lower.
+With --baseline the medians are compared metric by metric. A metric counts as worse if it lost more than its threshold
+(METRIC_THRESHOLDS, DEFAULT_THRESHOLD or --threshold for all) and more than NOISE_FACTOR times the relative median
+absolute deviation of its runs in either document. Benchmarks with such metrics are run --repeat times again and
+compared with all runs; the exit status is 1 only if a metric is still worse after that.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_scan import measure_grid_scan, open_simulated_stage
+from benchmarks.bench_startup import ROOT, measure_startup
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_registry import DeviceRegistry
+from src.stage_type.standa_simulator import SimulatedLibximc
+from src.stage_type.standa_two_axes import StandaTwoAxes
+
+
+def bench_get_position_calb(latency: float, number: int = 200) -> dict:
+    """Round trip of one Standa.get_position_calb read."""
+    stage = open_simulated_stage(latency)
+    axis = stage.axis1
+    start = time.perf_counter()
+    for _ in range(number):
+        axis.get_position_calb()
+    seconds = time.perf_counter() - start
+    stage.close_connection()
+    return {"get_position_calb_us": seconds / number * 1e6}
+
+
+def bench_move_round_trips(latency: float, moves: int = 20, step: float = 0.1) -> dict:
+    """Command plus wait for stop of short moves with move_absolut and move_relative."""
+    stage = open_simulated_stage(latency)
+    axis = stage.axis1
+    axis.move_absolut(0.0)
+    start = time.perf_counter()
+    for index in range(moves):
+        axis.move_absolut((index % 2) * step)
+    absolute = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(moves):
+        axis.move_relative(step)
+    relative = time.perf_counter() - start
+    stage.close_connection()
+    return {"move_absolut_ms": absolute / moves * 1000, "move_relative_ms": relative / moves * 1000}
+
+
+def bench_get_angle(latency: float, number: int = 2000) -> dict:
+    """StandaTwoAxes.get_angle by axis id, once served by the position cache and once forced to read the device."""
+    stage = open_simulated_stage(latency)
+    start = time.perf_counter()
+    for _ in range(number):
+        stage.get_angle(stage.axis1_id)
+    cached = time.perf_counter() - start
+
+    stage.axis1.position_max_age = 0.0
+    uncached_number = max(number // 10, 1)
+    start = time.perf_counter()
+    for _ in range(uncached_number):
+        stage.get_angle(stage.axis1_id)
+    uncached = time.perf_counter() - start
+    stage.close_connection()
+    return {"get_angle_cached_us": cached / number * 1e6, "get_angle_uncached_us": uncached / uncached_number * 1e6}
+
+
+def bench_open_connection(latency: float, enumerate_latency: float = 0.2) -> dict:
+    """Device enumeration and StandaTwoAxes.open_connection with an empty and with a filled device registry.
+
+    :param enumerate_latency: duration of enumerate_devices; probing the COM ports takes seconds on real hardware, so
+                              this is what the registry saves
+    :raise RuntimeError: if the open with a filled registry still enumerated the devices
+    """
+    backend = SimulatedLibximc(latency=latency, enumerate_latency=enumerate_latency)
+    enumerate_devices = backend.enumerate_devices
+    enumerations = []
+
+    def counting_enumerate_devices(*args):
+        enumerations.append(1)
+        return enumerate_devices(*args)
+
+    backend.enumerate_devices = counting_enumerate_devices
+    Standa.set_backend(backend)
+    start = time.perf_counter()
+    Standa.get_device_uris()
+    enumeration = time.perf_counter() - start
+
+    registry = DeviceRegistry(Path(tempfile.mkdtemp()) / "standa_devices.json")
+    results = {"enumeration_seconds": enumeration}
+    for name in ("open_connection_uncached_seconds", "open_connection_cached_seconds"):
+        enumerations.clear()
+        stage = StandaTwoAxes(registry)
+        start = time.perf_counter()
+        stage.open_connection()
+        results[name] = time.perf_counter() - start
+        stage.close_connection()
+    if enumerations:
+        raise RuntimeError("open_connection enumerated the devices although the registry knew them")
+    return results
+
+
+def bench_grid_scan(latency: float) -> dict:
+    """Two-axis raster, see bench_scan."""
+    result = measure_grid_scan(latency=latency)
+    return {key: value for key, value in result.items() if key.endswith("_per_second")}
+
+
+def bench_startup(latency: float) -> dict:
+    """Import of AngleStageAPI in a fresh interpreter, see bench_startup; independent of the latency."""
+    return {"import_seconds": measure_startup(repeat=1)["import_seconds"]}
+
+
+BENCHMARKS = {
+    "get_position_calb": bench_get_position_calb,
+    "move_round_trips": bench_move_round_trips,
+    "get_angle": bench_get_angle,
+    "open_connection": bench_open_connection,
+    "grid_scan": bench_grid_scan,
+    "startup": bench_startup,
+}
+
+
+# allowed relative deterioration of the median; moves depend on when the polls hit the end of the move, startup,
+# enumeration and sub-microsecond cache hits on the file system cache and the scheduler
+DEFAULT_THRESHOLD = 0.1
+METRIC_THRESHOLDS = {
+    "move_absolut_ms": 0.15,
+    "move_relative_ms": 0.15,
+    "get_angle_uncached_us": 0.15,
+    "import_seconds": 0.3,
+    "enumeration_seconds": 0.3,
+    "open_connection_cached_seconds": 0.3,
+    "get_angle_cached_us": 0.25,
+}
+# a change within this multiple of the relative median absolute deviation of the runs is not reported
+NOISE_FACTOR = 3.0
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_second")
+
+
+def run(names: list, latency: float, repeat: int) -> dict:
+    """
+    :return: benchmark name: metric name: list of the values of all repeats
+    """
+    samples = {}
+    for name in names:
+        runs = {}
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()):  # the stage classes print connection details
+                values = BENCHMARKS[name](latency)
+            for metric, value in values.items():
+                runs.setdefault(metric, []).append(value)
+        samples[name] = runs
+    return samples
+
+
+def medians(samples: dict) -> dict:
+    return {name: {metric: statistics.median(values) for metric, values in runs.items()}
+            for name, runs in samples.items()}
+
+
+def spread(values: list) -> float:
+    """Median absolute deviation of the runs of one metric relative to their median, 0 for a single run; unlike the
+    range it ignores single outliers such as a first run with a cold cache"""
+    middle = statistics.median(values)
+    if len(values) < 2 or not middle:
+        return 0.0
+    return statistics.median(abs(value - middle) for value in values) / abs(middle)
+
+
+def environment(latency: float, repeat: int) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency": latency,
+        "repeat": repeat,
+    }
+
+
+def compare(samples: dict, baseline: dict, threshold: float = None) -> list:
+    """
+    :param samples: runs per metric as returned by run
+    :param baseline: document of an earlier run; documents without "samples" count as one run per metric
+    :param threshold: allowed relative deterioration for all metrics, e.g. 0.1 for 10 %; None uses METRIC_THRESHOLDS
+    :return: (benchmark, metric, baseline median, median, relative change, allowed deterioration, regression) for
+             every metric in both documents; a positive change is an improvement
+    """
+    baseline_samples = baseline.get("samples") or {name: {metric: [value] for metric, value in metrics.items()}
+                                                   for name, metrics in baseline["results"].items()}
+    rows = []
+    for name, runs in samples.items():
+        for metric, values in runs.items():
+            before_values = baseline_samples.get(name, {}).get(metric)
+            if not before_values:
+                continue
+            before, value = statistics.median(before_values), statistics.median(values)
+            if not before:
+                continue
+            change = (value - before) / before
+            if not higher_is_better(metric):
+                change = -change
+            allowed = METRIC_THRESHOLDS.get(metric, DEFAULT_THRESHOLD) if threshold is None else threshold
+            allowed = max(allowed, NOISE_FACTOR * max(spread(before_values), spread(values)))
+            rows.append((name, metric, before, value, change, allowed, change < -allowed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.0005, help="simulated command latency in seconds")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the median is kept")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--output", type=Path, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float,
+                        help="allowed relative deterioration for all metrics, default per metric (METRIC_THRESHOLDS)")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    samples = run(names, args.latency, args.repeat)
+    rows = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        rows = compare(samples, baseline, args.threshold)
+        suspects = sorted({row[0] for row in rows if row[-1]})
+        if suspects:
+            # confirm with a second set of runs before failing
+            for name, runs in run(suspects, args.latency, args.repeat).items():
+                for metric, values in runs.items():
+                    samples[name].setdefault(metric, []).extend(values)
+            rows = compare(samples, baseline, args.threshold)
+
+    document = {"environment": environment(args.latency, args.repeat), "results": medians(samples),
+                "samples": samples}
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+    print(json.dumps(document["results"], indent=2))
+
+    for name, metric, before, value, change, allowed, regression in rows:
+        print(f"{'REGRESSION' if regression else 'ok':10} {name}.{metric}: {before:.6g} -> {value:.6g} "
+              f"({change:+.1%}, allowed -{allowed:.0%})")
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,18 @@
-from src.stage_type.standa_two_axes import StandaTwoAxes
+from importlib import import_module
 
-available_stages = ["StandaTwoAxes"]
+# stage type -> (module, class); modules are imported on first use in get_stage_object
+_stage_registry = {
+    "StandaTwoAxes": ("src.stage_type.standa_two_axes", "StandaTwoAxes"),
+}
+
+
+def __getattr__(name):
+    # available_stages also lists the stages of the configuration file (see standa_config), which is only read (and
+    # json imported) on first access
+    if name == "available_stages":
+        from src.stage_type.standa_config import configured_stage_names
+        return list(_stage_registry) + [stage for stage in configured_stage_names() if stage not in _stage_registry]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class AngleStageAPI:
@@ -8,10 +20,16 @@ class AngleStageAPI:
         pass
 
     def get_stage_object(self, stage_type: str):
-        if stage_type == "StandaTwoAxes":
-            return StandaTwoAxes()
-        else:
+        if stage_type in _stage_registry:
+            module_name, class_name = _stage_registry[stage_type]
+            return getattr(import_module(module_name), class_name)()
+        from src.stage_type.standa_config import load_stage_configs
+        configs = load_stage_configs()
+        if stage_type not in configs:
             raise ValueError("Invalid Angle-Stage")
+        # stages from the configuration file are built as StandaMultiAxis
+        from src.stage_type.standa_multi_axis import StandaMultiAxis
+        return StandaMultiAxis(stage_type, configs[stage_type])
 
     def find_connected_stages(self) -> list[str]:
         print("Not Implemented!")
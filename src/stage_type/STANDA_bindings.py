@@ -13,6 +13,46 @@ class Result:
     NoDevice = -4
 
 
+class XimcError(Exception):
+    """
+    Fehler einer libximc-Funktion (Rückgabewert ungleich Result.Ok)
+    """
+
+    def __init__(self, result: int, function: str = ""):
+        super().__init__(f"{function} returned {result}")
+        self.result = result
+        self.function = function
+
+
+class XimcNotImplementedError(XimcError, NotImplementedError):
+    pass
+
+
+class XimcValueError(XimcError, ValueError):
+    pass
+
+
+class XimcNoDeviceError(XimcError, ConnectionError):
+    pass
+
+
+_result_errors = {
+    Result.NotImplemented: XimcNotImplementedError,
+    Result.ValueError: XimcValueError,
+    Result.NoDevice: XimcNoDeviceError,
+}
+
+
+def check_result(result: int, func, arguments):
+    """
+    errcheck für die libximc-Funktionen mit result_t außer der Enumeration: wandelt Fehlercodes in XimcError um
+    :return: Result.Ok
+    """
+    if result != Result.Ok:
+        raise _result_errors.get(result, XimcError)(result, getattr(func, "__name__", str(func)))
+    return result
+
+
 class EnumerateFlags(enum.IntEnum):
     ENUMERATE_PROBE = 0x01
     ENUMERATE_ALL_COM = 0x02
@@ -31,6 +71,37 @@ class MicrostepMode(enum.IntEnum):
     MICROSTEP_MODE_FRAC_256 = 0x09
 
 
+class MoveState(enum.IntFlag):
+    MOVE_STATE_MOVING = 0x01
+    MOVE_STATE_TARGET_SPEED = 0x02
+    MOVE_STATE_ANTIPLAY = 0x04
+
+
+class MvcmdStatus(enum.IntEnum):
+    MVCMD_NAME_BITS = 0x3F
+    MVCMD_UKNWN = 0x00
+    MVCMD_MOVE = 0x01
+    MVCMD_MOVR = 0x02
+    MVCMD_LEFT = 0x03
+    MVCMD_RIGHT = 0x04
+    MVCMD_STOP = 0x05
+    MVCMD_HOME = 0x06
+    MVCMD_LOFT = 0x07
+    MVCMD_SSTP = 0x08
+    MVCMD_ERROR = 0x40
+    MVCMD_RUNNING = 0x80
+
+
+class SyncOutFlags(enum.IntFlag):
+    SYNCOUT_ENABLED = 0x01
+    SYNCOUT_STATE = 0x02
+    SYNCOUT_INVERT = 0x04
+    SYNCOUT_IN_STEPS = 0x08
+    SYNCOUT_ONSTART = 0x10
+    SYNCOUT_ONSTOP = 0x20
+    SYNCOUT_ONPERIOD = 0x40
+
+
 class calibration_t(LittleEndianStructure):
     _pack_ = 1
     _fields_ = [
@@ -202,6 +273,17 @@ class engine_settings_calb_t(LittleEndianStructure):
     ]
 
 
+class sync_out_settings_t(LittleEndianStructure):
+    _pack_ = 1
+    _fields_ = [
+        ('SyncOutFlags', c_uint),
+        ('SyncOutPulseSteps', c_uint),
+        ('SyncOutPeriod', c_uint),
+        ('Accuracy', c_uint),
+        ('uAccuracy', c_uint),
+    ]
+
+
 class move_settings_t(LittleEndianStructure):
     _pack_ = 1
     _fields_ = [
@@ -224,3 +306,45 @@ class move_settings_calb_t(LittleEndianStructure):
         ('AntiplaySpeed', c_float),
         ('MoveFlags', c_uint),
     ]
+
+
+device_t = c_int
+result_t = c_int
+
+# Funktionsname: (restype, argtypes, errcheck). Wird beim Laden der dll einmalig auf die Funktionen angewendet.
+# Die Enumeration hat kein errcheck: Standa.get_device_uris wertet ihre Rückgabewerte wie bisher nicht aus, ein Gerät
+# ohne lesbaren Controllernamen soll die Suche nicht abbrechen.
+libximc_prototypes = {
+    "enumerate_devices": (POINTER(device_enumeration_t), [c_int, c_char_p], None),
+    "free_enumerate_devices": (result_t, [POINTER(device_enumeration_t)], None),
+    "get_device_count": (c_int, [POINTER(device_enumeration_t)], None),
+    "get_device_name": (c_char_p, [POINTER(device_enumeration_t), c_int], None),
+    "get_enumerate_device_controller_name": (result_t, [POINTER(device_enumeration_t), c_int,
+                                                        POINTER(controller_name_t)], None),
+    "open_device": (device_t, [c_char_p], None),
+    "close_device": (result_t, [POINTER(device_t)], check_result),
+    "get_serial_number": (result_t, [device_t, POINTER(c_uint)], check_result),
+    "command_move": (result_t, [device_t, c_int, c_int], check_result),
+    "command_move_calb": (result_t, [device_t, c_float, POINTER(calibration_t)], check_result),
+    "command_movr": (result_t, [device_t, c_int, c_int], check_result),
+    "command_movr_calb": (result_t, [device_t, c_float, POINTER(calibration_t)], check_result),
+    "command_left": (result_t, [device_t], check_result),
+    "command_right": (result_t, [device_t], check_result),
+    "command_stop": (result_t, [device_t], check_result),
+    "command_sstp": (result_t, [device_t], check_result),
+    "command_zero": (result_t, [device_t], check_result),
+    "command_wait_for_stop": (result_t, [device_t, c_uint32], check_result),
+    "get_status": (result_t, [device_t, POINTER(status_t)], check_result),
+    "get_position": (result_t, [device_t, POINTER(get_position_t)], check_result),
+    "get_position_calb": (result_t, [device_t, POINTER(get_position_calb_t), POINTER(calibration_t)], check_result),
+    "get_move_settings": (result_t, [device_t, POINTER(move_settings_t)], check_result),
+    "set_move_settings": (result_t, [device_t, POINTER(move_settings_t)], check_result),
+    "get_sync_out_settings": (result_t, [device_t, POINTER(sync_out_settings_t)], check_result),
+    "set_sync_out_settings": (result_t, [device_t, POINTER(sync_out_settings_t)], check_result),
+    "get_engine_settings": (result_t, [device_t, POINTER(engine_settings_t)], check_result),
+    "set_engine_settings": (result_t, [device_t, POINTER(engine_settings_t)], check_result),
+    "get_engine_settings_calb": (result_t, [device_t, POINTER(engine_settings_calb_t), POINTER(calibration_t)],
+                                 check_result),
+    "set_engine_settings_calb": (result_t, [device_t, POINTER(engine_settings_calb_t), POINTER(calibration_t)],
+                                 check_result),
+}
@@ -1,45 +1,95 @@
-import os
-import sys
-from pathlib import Path
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from src.stage_type.STANDA_bindings import *
+from src.stage_type.motion_model import AxisMotionModel, axis_limits
+from src.stage_type.standa_backend import load_libximc
+from src.stage_type.standa_instrumentation import InstrumentedLibximc
+from src.stage_type.standa_units import StepConverter
+
+
+_refresher = None
+
+
+def _position_refresher() -> ThreadPoolExecutor:
+    """Threads für Positionsabfragen im Hintergrund aller Achsen, siehe Standa.get_position_cached"""
+    global _refresher
+    if _refresher is None:
+        _refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="PositionRefresh")
+    return _refresher
 
 
 class Standa:
     """
-    load alle Standa dlls
+    Ansteuerung einer Standa-Achse. Alle Aufrufe laufen über das Backend in Standa.lib, standardmäßig die
+    libximc.dll, alternativ z.B. SimulatedLibximc (siehe Standa.set_backend). Die dll wird erst beim ersten
+    Verbindungsaufbau geladen und dann für den ganzen Prozess wiederverwendet.
+
+    Das Backend liegt immer in einer InstrumentedLibximc, deren Messung mit Standa.get_lib().enable() eingeschaltet
+    und mit snapshot(), to_json() oder to_prometheus() ausgelesen wird.
     """
-    if getattr(sys, 'frozen', False):
-        application_path: str = sys._MEIPASS
-        dll_file = os.path.join(application_path, "src\\libs\\libximc.dll")
-    else:
-        application_path: str = Path(__file__).parents[1]
-        dll_file = os.path.join(application_path, "libs\\libximc.dll")
-    lib = WinDLL(dll_file)
-    lib_cdecl = CDLL(dll_file)
+    lib = None
 
     @staticmethod
-    def get_device_handles():
+    def get_lib():
         """
-        Erstellt für jede Achse ein handle (Identifikationsschlüssel) mit dem ein Objekt der Achsen erstellt werden kann
-        :return: handels
+        Liefert das Backend und lädt beim ersten Aufruf die libximc.dll, falls noch keins gesetzt wurde
+        :return: Backend
+        """
+        if Standa.lib is None:
+            Standa.lib = InstrumentedLibximc(load_libximc())
+        return Standa.lib
+
+    @staticmethod
+    def set_backend(backend):
+        """
+        Tauscht die Bibliothek für alle danach erzeugten Achsen aus, z.B. gegen den Simulator
+        :param backend: Objekt mit den libximc-Funktionen, siehe load_libximc
         """
-        flags = EnumerateFlags.ENUMERATE_PROBE + EnumerateFlags.ENUMERATE_ALL_COM
-        Standa.lib.enumerate_devices.restype = POINTER(device_enumeration_t)
-        devenum = Standa.lib.enumerate_devices(c_int(flags), None)
-        dev_count = Standa.lib.get_device_count(devenum)
-        print("dev_count", dev_count)
+        if not isinstance(backend, InstrumentedLibximc):
+            backend = InstrumentedLibximc(backend)
+        Standa.lib = backend
+
+    @staticmethod
+    def get_device_uris(flags: int = EnumerateFlags.ENUMERATE_PROBE + EnumerateFlags.ENUMERATE_ALL_COM) -> list:
+        """
+        Sucht alle angeschlossenen Controller, ohne sie zu öffnen
+        :param flags: EnumerateFlags für enumerate_devices
+        :return: Namen (URIs) der gefundenen Geräte als bytes, z.B. die xi-com-URI eines COM-Ports
+        """
+        lib = Standa.get_lib()
+        devenum = lib.enumerate_devices(c_int(flags), None)
+        dev_count = lib.get_device_count(devenum)
 
         controller_name = controller_name_t()
-        list_handle = []
+        uris = []
         for dev_ind in range(0, dev_count):
-            Standa.lib.get_device_name.restype = c_char_p
-            enum_name = Standa.lib.get_device_name(devenum, dev_ind)
-            Standa.lib.get_enumerate_device_controller_name(devenum, dev_ind, byref(controller_name))
-            handle = Standa.lib.open_device(enum_name)
-            print("enum_name:", enum_name, "dev_ind:", dev_ind)
-            list_handle.append(handle)
-        return list_handle
+            enum_name = lib.get_device_name(devenum, dev_ind)
+            lib.get_enumerate_device_controller_name(devenum, dev_ind, controller_name)
+            uris.append(enum_name)
+        lib.free_enumerate_devices(devenum)
+        return uris
+
+    @staticmethod
+    def open_device(uri: bytes):
+        """
+        Öffnet ein Gerät direkt über seine URI, ohne Enumeration
+        :param uri: Name aus get_device_uris
+        :return: handle oder None, wenn das Gerät nicht geöffnet werden konnte
+        """
+        handle = Standa.get_lib().open_device(uri)
+        if handle < 0:
+            return None
+        return handle
+
+    @staticmethod
+    def get_device_handles():
+        """
+        Erstellt für jede Achse ein handle (Identifikationsschlüssel) mit dem ein Objekt der Achsen erstellt werden kann
+        :return: handels
+        """
+        return [Standa.get_lib().open_device(uri) for uri in Standa.get_device_uris()]
 
     def __init__(self, handle: object) -> object:
         """
@@ -48,86 +98,501 @@ class Standa:
         self.handle = handle
         self._last_error = 0
         self._interval = 20
-        self.lib = Standa.lib
+        self._min_poll_interval = 0.001  # s, kürzester Abstand der get_status-Abfragen beim Warten
+        self._max_poll_interval = 0.1  # s, längster Abstand zu Beginn langer Bewegungen
+        self._target = None  # zuletzt kommandiertes Ziel in Benutzereinheiten
+        self._stopped_position = None  # Position beim letzten erkannten Stillstand, None während einer Bewegung
+        self._move_origin = None  # (Startposition, time.monotonic() des Befehls) der laufenden Bewegung
+        self._settings_read = False  # engine_settings_t und move_settings_t entsprechen dem Controller
+        self.soft_limits = None  # (untere, obere) Grenze in Benutzereinheiten, Ziele außerhalb werden abgelehnt
+        self.motion_model = None  # AxisMotionModel, wird von get_motion_model erzeugt
+        self._step_converter = None  # StepConverter zur aktuellen calibration_t, siehe step_converter
+        self._motion_limits_stale = False
+        self.position_max_age = 0.005  # s, so alt darf eine Position aus dem Cache bei get_position_cached sein
+        self.position_refresh_ahead = 0.75  # Anteil von max_age, ab dem ein Treffer im Hintergrund neu liest, None: nie
+        self.position_cache_stats = {"hits": 0, "misses": 0, "shared": 0, "refreshes": 0}
+        # (Position, time.perf_counter() der Abfrage); perf_counter, weil time.monotonic unter Windows nur etwa 15.6 ms
+        # auflöst und ein max_age von wenigen ms sonst nicht eingehalten wird
+        self._position_cache = None
+        self._position_last = None  # wie _position_cache, wird nie verworfen, siehe get_position_cached(wait=False)
+        self._position_fetch = None  # Future der laufenden Abfrage, auf die weitere Aufrufer warten
+        self._position_generation = 0  # zählt Befehle, die die Position ändern
+        self._position_lock = threading.Lock()
+        self.lib = Standa.get_lib()
         self._init_structures()
 
+    def _call(self, function, *args) -> bool:
+        """
+        Ruft eine libximc-Funktion für diese Achse auf und merkt sich das Ergebnis in _last_error
+        :return: True bei Result.Ok
+        """
+        try:
+            result = function(self.handle, *args)
+        except XimcError as error:
+            result = error.result
+        self._last_error = result
+        return result == Result.Ok  # nicht _last_error: andere Threads schreiben es ebenfalls
+
     def get_serial_number(self) -> str:
         serial = c_uint()
-        self._last_error = self.lib.get_serial_number(self.handle, byref(serial))
-        if self._last_error == Result.Ok:
+        if self._call(self.lib.get_serial_number, serial):
             return repr(serial.value)
 
-    def set_default_settings(self, settings: dict):
-        self.set_engine_settings_calb(settings["engine_settings_calb"])
+    def set_default_settings(self, settings: dict) -> dict:
+        """
+        Setzt Mikroschrittmodus, Benutzereinheit, Geschwindigkeit und soft_limits. Die Einstellungen des Controllers
+        werden dafür einmal gelesen (read_settings) und nur geschrieben, wenn sie abweichen; eine schon eingestellte
+        Achse kostet beim Verbinden also nur Lesezugriffe.
+        :param settings: dict mit engine_settings_calb (Mikroschrittmodus), unit_multiplier, speed, optional soft_limits
+        :return: {"written": [...], "skipped": [...]} mit den Namen der libximc-Schreibfunktionen
+        """
+        self.read_settings()
+        writes = {"set_engine_settings": self.set_engine_settings_calb(settings["engine_settings_calb"])}
         self.set_user_unit(settings["unit_multiplier"])
-        self.set_speed(settings["speed"])
+        writes["set_move_settings"] = self.set_speed(settings["speed"])
+        limits = settings.get("soft_limits")
+        self.soft_limits = None if limits is None else (float(limits[0]), float(limits[1]))
+        self.get_motion_model()
+        return {"written": [name for name, written in writes.items() if written],
+                "skipped": [name for name, written in writes.items() if not written]}
+
+    def read_settings(self) -> bool:
+        """
+        Liest engine_settings und move_settings des Controllers in engine_settings_t und move_settings_t. Dieses Abbild
+        nutzen set_engine_settings_calb, set_user_unit und set_speed, um nur Abweichungen zu schreiben. Wer die
+        Einstellungen an diesen Methoden vorbei ändert, muss danach erneut read_settings aufrufen.
+        :return: True, wenn beide gelesen wurden
+        """
+        self._settings_read = (self._call(self.lib.get_engine_settings, self.engine_settings_t)
+                               and self._call(self.lib.get_move_settings, self.move_settings_t))
+        return self._settings_read
 
     def close_connection(self):  # funktioniert
-        self.lib.close_device(byref(cast(self.handle, POINTER(c_int))))
+        try:
+            self.lib.close_device(c_int(self.handle))
+        except XimcError as error:
+            self._last_error = error.result
         return True
 
     def get_position_calb(self) -> float:
-        self._last_error = self.lib.get_position_calb(self.handle, byref(self.get_position_calb_t),
-                                                      byref(self.calibration_t))
-        if self._last_error == Result.Ok:
-            return self.get_position_calb_t.Position
-        else:
-            return 0.0
+        """
+        Position in Benutzereinheiten. Mit gesetzter Benutzereinheit wird sie über get_position als (step, mstep)
+        gelesen und mit step_converter umgerechnet, ohne den Umweg über float32 in get_position_calb_t.
+        :return: Position, 0.0 bei Fehler (siehe _last_error)
+        """
+        self._last_error, position = self._read_position()
+        return position
+
+    def _read_position(self) -> tuple:
+        """
+        Liest die Position in eigene Strukturen und ohne _last_error, damit gleichzeitige Abfragen aus mehreren Threads
+        (Hintergrund-Abfrage des Caches, MotionSupervisor, ...) sich Ergebnis und Fehlercode nicht gegenseitig
+        überschreiben
+        :return: (Result, Position in Benutzereinheiten oder 0.0 bei Fehler)
+        """
+        converter = self.step_converter()
+        try:
+            if converter is None:
+                position = get_position_calb_t()
+                result = self.lib.get_position_calb(self.handle, position, self.calibration_t)
+                return result, (position.Position if result == Result.Ok else 0.0)
+            position = get_position_t()
+            result = self.lib.get_position(self.handle, position)
+        except XimcError as error:
+            return error.result, 0.0
+        if result != Result.Ok:
+            return result, 0.0
+        return result, converter.user_value(position.Position, position.uPosition)
+
+    def step_converter(self):
+        """
+        :return: StepConverter für die aktuelle calibration_t, None solange keine Benutzereinheit gesetzt ist (A = 0);
+                 dann rechnet die dll mit den *_calb-Funktionen
+        """
+        calibration = self.calibration_t
+        if not calibration.A:
+            return None
+        converter = self._step_converter
+        if converter is None or converter.a != calibration.A or converter.microstep_mode != calibration.MicrostepMode:
+            converter = self._step_converter = StepConverter.from_calibration(calibration)
+        return converter
+
+    def get_position_cached(self, max_age: float = None, wait: bool = True):
+        """
+        Position mit Cache: Ist der letzte Wert höchstens max_age s alt, wird er ohne Zugriff auf den Controller
+        zurückgegeben. Sonst liest genau ein Aufrufer die Position, gleichzeitige Aufrufer warten auf dieses Ergebnis.
+        Jeder Bewegungs- oder Stoppbefehl verwirft den Cache, ein erkannter Stillstand füllt ihn mit der Position aus
+        dem Status.
+
+        Ist ein Treffer älter als position_refresh_ahead * max_age, wird die Position im Hintergrund neu gelesen. Wer
+        regelmäßig fragt, bekommt so immer einen Treffer und wartet nie auf den Controller.
+        :param max_age: erlaubtes Alter in s, Standard ist position_max_age
+        :param wait: False wartet nie: ohne gültigen Cache wird die zuletzt bekannte Position zurückgegeben (None,
+                     wenn noch keine gelesen wurde, auch über Bewegungen hinweg) und die Abfrage im Hintergrund
+                     gestartet
+        :return: Position in Benutzereinheiten
+        """
+        if max_age is None:
+            max_age = self.position_max_age
+        fetch = background = None
+        with self._position_lock:
+            cached = self._position_cache
+            age = None if cached is None else time.perf_counter() - cached[1]
+            fresh = age is not None and age <= max_age
+            if fresh:
+                self.position_cache_stats["hits"] += 1
+                result = cached[0]
+                ahead = self.position_refresh_ahead
+                if ahead is not None and age > ahead * max_age and self._position_fetch is None:
+                    self.position_cache_stats["refreshes"] += 1
+                    background = self._start_position_fetch()
+            else:
+                if self._position_fetch is not None:
+                    self.position_cache_stats["shared"] += 1
+                    pending = self._position_fetch
+                else:
+                    self.position_cache_stats["misses"] += 1
+                    fetch = self._start_position_fetch()
+                    pending = fetch[0]
+                if not wait:
+                    result = None if self._position_last is None else self._position_last[0]
+                    background, fetch = fetch, None
+        if background is not None:
+            _position_refresher().submit(self._fetch_position, *background)
+        if fresh or not wait:
+            return result
+        if fetch is None:
+            return pending.result()
+        return self._fetch_position(*fetch)
+
+    def _start_position_fetch(self) -> tuple:
+        """Muss mit _position_lock aufgerufen werden
+        :return: (Future für gleichzeitige Aufrufer, Stand von _position_generation)
+        """
+        self._position_fetch = Future()
+        return self._position_fetch, self._position_generation
+
+    def _fetch_position(self, fetch: Future, generation: int) -> float:
+        started = time.perf_counter()
+        try:
+            result, position = self._read_position()
+        except BaseException as error:
+            # Aufrufer, die auf dieselbe Abfrage warten, bekommen den Fehler statt für immer zu warten
+            with self._position_lock:
+                self._position_fetch = None
+            fetch.set_exception(error)
+            raise
+        self._last_error = result
+        with self._position_lock:
+            if result == Result.Ok and generation == self._position_generation:  # ein Fehler wird nie gespeichert
+                self._position_cache = self._position_last = (position, started)
+            self._position_fetch = None
+        fetch.set_result(position)
+        return position
+
+    def invalidate_position(self):
+        """Verwirft die Position im Cache, z.B. nach Befehlen an der Klasse vorbei"""
+        with self._position_lock:
+            self._position_generation += 1
+            self._position_cache = None
 
     def set_home(self):
-        self._last_error = self.lib.command_zero(self.handle)
+        self._call(self.lib.command_zero)
+        self.invalidate_position()
+        if self._stopped_position is not None:
+            self._stopped_position = 0.0
+        self._target = self._stopped_position  # ein Ziel vor dem Nullsetzen ist keine Basis für relative Bewegungen
 
     def stop(self):
-        self._last_error = self.lib.command_sstp(self.handle)
+        self._call(self.lib.command_sstp)
+        self.invalidate_position()
+        self._target = None
+        self._move_origin = None
 
     def move_absolut(self, value: float):
-        self._set_move_direction(value)
-        self._last_error = self.lib.command_move_calb(self.handle, c_float(value), byref(self.calibration_t))
-        self._last_error = self.lib.command_wait_for_stop(self.handle, self._interval)  # self._intervalms
+        if self.move_towards(value):
+            self.wait_for_stop()
+
+    def move_towards(self, value: float, set_direction: bool = True) -> bool:
+        """
+        Startet eine absolute Bewegung und kehrt sofort zurück
+        :param value: Ziel in Benutzereinheiten
+        :param set_direction: vorher command_left/command_right senden; ohne kostet der Befehl nur einen Aufruf, z.B.
+                              für MotionQueue, die das Ziel einer laufenden Bewegung verschiebt
+        :return: True, wenn der Befehl angenommen wurde
+        """
+        if not self._within_limits(value):
+            return False
+        converter = self.step_converter()
+        if converter is not None:
+            return self._move_steps(*converter.step_target(value), value, set_direction)
+        if set_direction:
+            self._set_move_direction(value)
+        accepted = self._call(self.lib.command_move_calb, value, self.calibration_t)
+        if accepted:
+            self._commanded(value)
+        return accepted
+
+    def move_towards_steps(self, step: int, mstep: int) -> bool:
+        """
+        Wie move_towards mit einem schon umgerechneten Ziel, z.B. aus StepConverter.to_steps für alle Punkte eines
+        Scans
+        :param step: Vollschritte
+        :param mstep: Mikroschritte mit dem Vorzeichen von step
+        :return: True, wenn der Befehl angenommen wurde
+        """
+        converter = self.step_converter()
+        if converter is None:
+            self._last_error = Result.ValueError
+            return False
+        value = converter.user_value(step, mstep)
+        return self._within_limits(value) and self._move_steps(step, mstep, value)
+
+    def _move_steps(self, step: int, mstep: int, value: float, set_direction: bool = True) -> bool:
+        if set_direction:
+            self._set_move_direction(value)
+        accepted = self._call(self.lib.command_move, step, mstep)
+        if accepted:
+            self._commanded(value)
+        return accepted
+
+    def move_relative_towards(self, value: float) -> bool:
+        """
+        Startet eine relative Bewegung und kehrt sofort zurück. Ist die Basis bekannt (laufendes Ziel oder Position
+        beim letzten Stillstand), wird das absolute Ziel Basis + value mit command_move gesendet: jedes Ziel wird
+        einzeln auf einen Mikroschritt gerundet, die Rundungsfehler vieler kleiner Schritte summieren sich also nicht.
+        Nur ohne bekannte Basis rechnet der Controller mit command_movr (ohne Benutzereinheit command_movr_calb) ab
+        seiner Position bzw. seinem Ziel. command_left/command_right aus _set_move_direction entfallen in beiden
+        Fällen.
+        :param value: Strecke in Benutzereinheiten
+        :return: True, wenn der Befehl angenommen wurde
+        """
+        converter = self.step_converter()
+        base = self._relative_base(converter)
+        if base is not None:
+            target = base + value
+            if not self._within_limits(target):
+                return False
+            if converter is None:
+                accepted = self._call(self.lib.command_move_calb, target, self.calibration_t)
+            else:
+                accepted = self._call(self.lib.command_move, *converter.step_target(target))
+            if accepted:
+                self._commanded(target)
+            return accepted
+
+        if self.soft_limits is not None and not self._within_limits(self.get_position_cached() + value):
+            return False
+        if converter is None:
+            accepted = self._call(self.lib.command_movr_calb, value, self.calibration_t)
+        else:
+            accepted = self._call(self.lib.command_movr, *converter.step_target(value))
+        if accepted:
+            self._commanded(None)
+        return accepted
+
+    def _relative_base(self, converter):
+        """
+        Basis einer relativen Bewegung: das zuletzt kommandierte Ziel, solange die Achse dort steht oder noch dorthin
+        fährt, sonst die Position beim letzten Stillstand, None wenn beides unbekannt ist
+        """
+        target, stopped = self._target, self._stopped_position
+        if stopped is None or target is None:
+            return target if stopped is None else stopped
+        tolerance = 0.0 if converter is None else abs(converter.a) / converter.fraction / 2
+        return target if abs(stopped - target) <= tolerance else stopped
+
+    def _within_limits(self, target: float) -> bool:
+        """Prüft ein Ziel gegen soft_limits, außerhalb wird _last_error auf Result.ValueError gesetzt"""
+        if self.soft_limits is None or self.soft_limits[0] <= target <= self.soft_limits[1]:
+            return True
+        self._last_error = Result.ValueError
+        return False
+
+    def _commanded(self, target):
+        """Buchführung nach jedem Bewegungsbefehl: Ziel, Cache und Start für das Bewegungsmodell"""
+        self._target = target
+        self.invalidate_position()
+        # nur Bewegungen aus dem Stillstand haben eine bekannte Strecke für das Bewegungsmodell
+        self._move_origin = None if self._stopped_position is None else (self._stopped_position, time.monotonic())
+        self._stopped_position = None
+
+    def wait_for_stop(self, status: status_t = None, timeout: float = None) -> bool:
+        """Blockiert, bis die Achse steht. Wird zusammen mit move_towards genutzt, um mehrere Achsen gleichzeitig zu
+        bewegen und erst danach auf alle zu warten. Der Zustand wird mit get_status abgefragt, der Abstand der Abfragen
+        richtet sich nach der Restzeit der Bewegung (siehe next_poll_interval), damit kurze Schritte ohne die feste
+        Wartezeit von command_wait_for_stop enden.
+        :param status: Struktur, in der der letzte Status (Achse steht) zurückgegeben wird
+        :param timeout: maximale Wartezeit in s, z.B. aus move_timeout; None wartet unbegrenzt
+        :return: True, wenn das Warten ohne Fehler beendet wurde, False bei Fehler oder Zeitüberschreitung
+        """
+        if status is None:
+            status = status_t()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.get_status(status) is None:
+                return False
+            if not self.is_moving(status):
+                self.record_stop(status)
+                return True
+            interval = self.next_poll_interval(status)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._last_error = Result.Error
+                    return False
+                interval = min(interval, remaining)
+            time.sleep(interval)
+
+    def record_stop(self, status: status_t, stopped_at: float = None):
+        """
+        Merkt sich die Position einer stehenden Achse und übergibt die Dauer der letzten Bewegung an das
+        Bewegungsmodell. Wird von allen Warteschleifen aufgerufen (wait_for_stop, MotionSupervisor, AsyncStanda).
+        :param status: Status, in dem die Achse steht
+        :param stopped_at: time.monotonic() dieser Abfrage, Standard ist jetzt
+        """
+        position = self.status_position(status)
+        if self._move_origin is not None and self.motion_model is not None:
+            origin, started = self._move_origin
+            stopped_at = time.monotonic() if stopped_at is None else stopped_at
+            self.motion_model.observe(position - origin, stopped_at - started)
+        self._move_origin = None
+        self._stopped_position = position
+        cached_at = time.perf_counter()
+        if stopped_at is not None:
+            cached_at -= time.monotonic() - stopped_at
+        with self._position_lock:
+            self._position_cache = self._position_last = (position, cached_at)
+
+    def get_motion_model(self) -> AxisMotionModel:
+        """
+        Bewegungsmodell der Achse, beim ersten Aufruf aus den move_settings und der Kalibrierung erstellt. Nach
+        set_speed, set_user_unit oder set_engine_settings_calb werden die Grenzwerte neu gelesen, die gelernte Korrektur
+        bleibt erhalten.
+        """
+        if self.motion_model is None:
+            self.motion_model = AxisMotionModel.from_standa(self)
+        elif self._motion_limits_stale:
+            self.motion_model.set_limits(*axis_limits(self))
+        self._motion_limits_stale = False
+        return self.motion_model
 
-    def move_towards(self, value: float):
-        self._set_move_direction(value)
-        self._last_error = self.lib.command_move_calb(self.handle, c_float(value), byref(self.calibration_t))
+    def move_time(self, value: float):
+        """
+        :return: erwartete Dauer in s einer Bewegung vom letzten Stillstand nach value, None wenn die Achse nicht steht
+        """
+        if self._stopped_position is None:
+            return None
+        return float(self.get_motion_model().move_time(value - self._stopped_position))
+
+    def move_timeout(self, value: float):
+        """
+        :return: Wartezeit in s, nach der eine Bewegung nach value als fehlgeschlagen gilt; None, solange die Achse
+                 nicht steht oder das Modell noch nicht genug Bewegungen gesehen hat
+        """
+        if self._stopped_position is None:
+            return None
+        timeout = self.get_motion_model().timeout(value - self._stopped_position)
+        return None if timeout is None else float(timeout)
 
     def move_relative(self, value: float):
-        current_position = self.get_position_calb()
-        new_position = current_position + value
-        self._set_move_direction(new_position)
-        self._last_error = self.lib.command_move_calb(self.handle, c_float(new_position), byref(self.calibration_t))
-        self._last_error = self.lib.command_wait_for_stop(self.handle, self._interval)  # self._intervalms
+        if self.move_relative_towards(value):
+            self.wait_for_stop()
+
+    def get_status(self, status: status_t = None):
+        """
+        Liest den Zustand des Controllers (Position, Geschwindigkeit, MoveSts, ...)
+        :param status: eigene Struktur, z.B. wenn ein anderer Thread liest; Standard ist self.status_t
+        :return: die gefüllte Struktur oder None bei Fehler
+        """
+        if status is None:
+            status = self.status_t
+        if self._call(self.lib.get_status, status):
+            return status
+
+    @staticmethod
+    def is_moving(status: status_t) -> bool:
+        return bool(status.MoveSts & MoveState.MOVE_STATE_MOVING or status.MvCmdSts & MvcmdStatus.MVCMD_RUNNING)
+
+    def _microstep_fraction(self) -> int:
+        return 1 << (max(self.calibration_t.MicrostepMode, 1) - 1)
+
+    def status_position(self, status: status_t) -> float:
+        """
+        :return: Position aus dem Status in Benutzereinheiten, user_value = A*(step + mstep/pow(2,MicrostepMode-1))
+        """
+        return self.calibration_t.A * (status.CurPosition + status.uCurPosition / self._microstep_fraction())
+
+    def next_poll_interval(self, status: status_t) -> float:
+        """
+        Abstand bis zur nächsten get_status-Abfrage während einer Bewegung. Die Restzeit kann nicht kürzer sein als
+        Restweg / maximale Geschwindigkeit; gewartet wird die Hälfte davon. Zu Beginn langer Bewegungen wird also
+        selten gefragt, kurz vor dem Ziel immer öfter.
+        :param status: zuletzt gelesener Status
+        :return: Wartezeit in s
+        """
+        if self._target is None or not self.calibration_t.A:
+            return self._interval / 1000
+        fraction = self._microstep_fraction()
+        position = status.CurPosition + status.uCurPosition / fraction
+        remaining = abs(self._target / self.calibration_t.A - position)
+        speed = max(self.move_settings_t.Speed + self.move_settings_t.uSpeed / fraction,
+                    abs(status.CurSpeed + status.uCurSpeed / fraction))
+        if speed <= 0:
+            return self._min_poll_interval
+        return min(max(remaining / speed / 2, self._min_poll_interval), self._max_poll_interval)
 
     def _set_move_direction(self, value: float):
         if value < 0.0:
-            self._last_error = self.lib.command_left(self.handle)  # move left
+            self._call(self.lib.command_left)  # move left
         else:
-            self._last_error = self.lib.command_right(self.handle)  # move rigth
+            self._call(self.lib.command_right)  # move rigth
 
     def get_speed(self) -> int:
-        self._last_error = self.lib.get_move_settings(self.handle, byref(self.move_settings_t))
-        if self._last_error == Result.Ok:
+        if self._call(self.lib.get_move_settings, self.move_settings_t):
             return self.move_settings_t.Speed
 
-    def set_speed(self, speed: int):
+    def set_speed(self, speed: int) -> bool:
+        """
+        :return: True, wenn geschrieben wurde, False, wenn der Controller die Geschwindigkeit schon hatte
+        """
+        if not self._settings_read:
+            self.read_settings()
+        if self._settings_read and self.move_settings_t.Speed == int(speed):
+            return False
         self.move_settings_t.Speed = int(speed)
-        self._last_error = self.lib.set_move_settings(self.handle, byref(self.move_settings_t))
+        self._settings_read = self._call(self.lib.set_move_settings, self.move_settings_t)
+        self._motion_limits_stale = True
+        return True
 
-    def set_engine_settings_calb(self, mode: int):  # funktioniert
-        self._last_error = self.lib.get_engine_settings_calb(self.handle, byref(self.engine_settings_calb_t),
-                                                             byref(self.calibration_t))
-        self.engine_settings_calb_t.MicrostepMode = mode
-        self._last_error = self.lib.set_engine_settings_calb(self.handle, byref(self.engine_settings_calb_t),
-                                                             byref(self.calibration_t))
+    def set_engine_settings_calb(self, mode: int) -> bool:  # funktioniert
+        """
+        Setzt den Mikroschrittmodus. Geschrieben wird über die unkalibrierten engine_settings, damit das Abbild aus
+        read_settings nicht von der Kalibrierung abhängt, die set_user_unit danach noch ändert.
+        :return: True, wenn geschrieben wurde, False, wenn der Controller den Modus schon hatte
+        """
+        if not self._settings_read:
+            self.read_settings()
+        if self._settings_read and self.engine_settings_t.MicrostepMode == mode:
+            return False
+        self.engine_settings_t.MicrostepMode = mode
+        self._settings_read = self._call(self.lib.set_engine_settings, self.engine_settings_t)
+        self._motion_limits_stale = True
+        self.invalidate_position()
+        return True
 
     def set_user_unit(self, multiplier: int):  # testen
         """Definierte Werte für Conversion nach: user_value = A*(step + mstep/pow(2,MicrostepMode-1))
         :param multiplier: Multiplikationsfaktor
         :return:
         """
-        self._last_error = self.lib.get_engine_settings_calb(self.handle, byref(self.engine_settings_calb_t),
-                                                             byref(self.calibration_t))
-        self.calibration_t.MicrostepMode = self.engine_settings_calb_t.MicrostepMode
+        if not self._settings_read:
+            self.read_settings()
+        self.calibration_t.MicrostepMode = self.engine_settings_t.MicrostepMode
 
         self.calibration_t.A = 1 / multiplier
+        self._motion_limits_stale = True
+        self.invalidate_position()
 
     def _init_structures(self):
         self.device_information_t = device_information_t()
@@ -0,0 +1,17 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QMessageBox
+
+
+class ErrorPopup(QWidget):
+    def __init__(self, message):
+        super().__init__()
+        self.message = message
+        self.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint)
+
+        self.open_msg_box()
+
+    def open_msg_box(self):
+        QMessageBox.information(self, "Info", self.message, QMessageBox.Ok)
+
+    def close_popup(self):
+        self.close()
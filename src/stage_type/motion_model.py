@@ -0,0 +1,198 @@
+import math
+import threading
+
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+
+# Accel or Decel = 0 means "no ramp" on the controller; plan_move uses this acceleration instead
+INSTANT_ACCEL = 1e9
+
+
+def move_time_coefficients(speed, accel, decel) -> tuple:
+    """Precomputes the constants of move_time for repeated evaluation with move_time_from_coefficients.
+
+    :return: (ramp distance, 1 / speed, time offset of the trapezoid, factor of the triangle)
+    """
+    speed = np.asarray(speed, dtype=np.float64)
+    accel = np.where(np.asarray(accel) > 0, accel, np.inf)
+    decel = np.where(np.asarray(decel) > 0, decel, np.inf)
+    ramp_factor = 1 / accel + 1 / decel
+    # trapezoid: t = distance / speed + speed / 2 * ramp_factor, triangle: t = sqrt(2 * distance * ramp_factor)
+    return speed * speed * ramp_factor / 2, 1 / speed, speed * ramp_factor / 2, np.sqrt(2 * ramp_factor)
+
+
+def move_time_from_coefficients(distance, coefficients: tuple) -> np.ndarray:
+    ramp_distance, inverse_speed, offset, triangle = coefficients
+    distance = np.abs(distance)
+    return np.where(distance >= ramp_distance, distance * inverse_speed + offset, triangle * np.sqrt(distance))
+
+
+def move_time(distance, speed, accel, decel) -> np.ndarray:
+    """Duration of a point-to-point move from standstill to standstill. Long moves follow a trapezoidal speed profile,
+    short moves that never reach the set speed a triangular one. All arguments broadcast against each other.
+
+    :param distance: travel, sign is ignored
+    :param speed: maximum speed in units/s
+    :param accel: acceleration in units/s^2, 0 means no ramp (like Accel = 0 on the controller)
+    :param decel: deceleration in units/s^2, 0 means no ramp
+    :return: duration in seconds
+    """
+    distance = np.asarray(distance, dtype=np.float64)
+    return move_time_from_coefficients(distance, move_time_coefficients(speed, accel, decel))
+
+
+def plan_move(position: float, speed: float, target: float, max_speed: float, accel: float, decel: float) -> list:
+    """Profile of phases with constant acceleration that brings an axis from the state (position, speed) to a standstill
+    at target, the way the controller executes a move command. A running move in the wrong direction or with a too
+    short braking distance is stopped first. Units only have to be consistent, e.g. steps or user units.
+
+    :param accel: acceleration, 0 means no ramp (like Accel = 0 on the controller)
+    :param decel: deceleration, 0 means no ramp
+    :return: list of (duration in s, acceleration)
+    """
+    accel = accel or INSTANT_ACCEL
+    decel = decel or INSTANT_ACCEL
+    max_speed = max(max_speed, 1e-9)
+    phases = []
+    for _ in range(4):
+        distance = target - position
+        if distance == 0 and speed == 0:
+            break
+        direction = 1.0 if distance > 0 or (distance == 0 and speed < 0) else -1.0
+        remaining = abs(distance)
+        toward = speed * direction
+
+        if toward < 0 or toward * toward / (2 * decel) > remaining:
+            # moving the other way or braking distance too long: stop first, then plan again
+            duration = abs(speed) / decel
+            a = -decel if speed > 0 else decel
+            phases.append((duration, a))
+            position += speed * duration + 0.5 * a * duration * duration
+            speed = 0.0
+            continue
+
+        if toward > max_speed:
+            slow_down = (toward - max_speed) / decel
+            phases.append((slow_down, -direction * decel))
+            remaining -= (toward * toward - max_speed * max_speed) / (2 * decel)
+            toward = max_speed
+
+        peak = math.sqrt((remaining + toward * toward / (2 * accel)) / (1 / (2 * accel) + 1 / (2 * decel)))
+        if peak > max_speed:
+            cruise = remaining - (max_speed * max_speed - toward * toward) / (2 * accel) \
+                     - max_speed * max_speed / (2 * decel)
+            phases.append(((max_speed - toward) / accel, direction * accel))
+            phases.append((cruise / max_speed, 0.0))
+            phases.append((max_speed / decel, -direction * decel))
+        else:
+            phases.append(((peak - toward) / accel, direction * accel))
+            phases.append((peak / decel, -direction * decel))
+        break
+    return phases
+
+
+def axis_limits(axis: "Standa") -> tuple:
+    """Reads the move settings of an axis and converts them into user units with its calibration.
+
+    :return: (speed, accel, decel) in user units per s and s^2
+    """
+    if not axis._call(axis.lib.get_move_settings, axis.move_settings_t):
+        raise XimcError(axis._last_error, "get_move_settings")
+    settings = axis.move_settings_t
+    a = axis.calibration_t.A
+    speed = a * (settings.Speed + settings.uSpeed / axis._microstep_fraction())
+    return speed, a * settings.Accel, a * settings.Decel
+
+
+class AxisMotionModel:
+    """Move time of one axis: the trapezoidal profile of move_time plus a correction learned from observed moves.
+
+    Every observed move (distance, seconds from command until the stop was seen) updates an exponentially weighted
+    linear fit observed = scale * predicted + offset, so the model absorbs command latency, polling delay and
+    deviations of the real ramps from the settings. The spread of the residuals gives the timeout of a move instead of
+    a fixed safety margin.
+    """
+
+    def __init__(self, speed: float, accel: float, decel: float, forgetting: float = 0.98,
+                 min_observations: int = 3):
+        """
+        :param speed: maximum speed in user units/s
+        :param accel: acceleration in user units/s^2
+        :param decel: deceleration in user units/s^2
+        :param forgetting: weight of the previous observations per new one, smaller values adapt faster
+        :param min_observations: observations before the correction and the timeout are used
+        """
+        self.forgetting = forgetting
+        self.min_observations = min_observations
+        self.observations = 0
+        self._sums = np.zeros(6)  # weight, x, y, x^2, x*y, y^2 of predicted (x) and observed (y) durations
+        self._lock = threading.Lock()
+        self.set_limits(speed, accel, decel)
+
+    @classmethod
+    def from_standa(cls, axis: "Standa", **kwargs) -> "AxisMotionModel":
+        """Model with the Speed/Accel/Decel settings of a connected axis, converted with its calibration A and
+        MicrostepMode.
+        """
+        return cls(*axis_limits(axis), **kwargs)
+
+    def set_limits(self, speed: float, accel: float, decel: float):
+        """Replaces the move settings, e.g. after set_speed; the learned correction is kept."""
+        self.limits = (float(speed), float(accel), float(decel))
+        self._coefficients = move_time_coefficients(*self.limits)
+
+    def predict(self, distance) -> np.ndarray:
+        """Move time of the profile alone, without the learned correction."""
+        return move_time_from_coefficients(np.asarray(distance, dtype=np.float64), self._coefficients)
+
+    @property
+    def calibrated(self) -> bool:
+        return self.observations >= self.min_observations
+
+    def correction(self) -> tuple:
+        """
+        :return: (scale, offset, residual standard deviation in s), (1, 0, nan) before min_observations moves
+        """
+        with self._lock:
+            weight, x, y, xx, xy, yy = self._sums
+        if not self.calibrated or weight <= 0:
+            return 1.0, 0.0, float("nan")
+        mean_x, mean_y = x / weight, y / weight
+        var_x, var_y = xx / weight - mean_x ** 2, yy / weight - mean_y ** 2
+        cov = xy / weight - mean_x * mean_y
+        # moves of (nearly) equal length cannot separate scale from offset: keep the profile and fit only the offset
+        scale = cov / var_x if var_x > 1e-6 * max(mean_x ** 2, 1e-12) and cov > 0 else 1.0
+        offset = mean_y - scale * mean_x
+        residual = var_y - 2 * scale * cov + scale ** 2 * var_x
+        return scale, offset, float(np.sqrt(max(residual, 0.0)))
+
+    def move_time(self, distance) -> np.ndarray:
+        """Expected seconds from the move command until the stop is seen, vectorized over distance."""
+        scale, offset, _ = self.correction()
+        return np.maximum(scale * self.predict(distance) + offset, 0.0)
+
+    def timeout(self, distance, sigmas: float = 6.0, minimum: float = 0.05):
+        """Time after which a move has most likely failed.
+
+        :param distance: travel in user units
+        :param sigmas: allowed deviation from move_time in residual standard deviations
+        :param minimum: lower bound of the allowance in s, covers a spread of nearly 0 after a few identical moves
+        :return: seconds, None before the model is calibrated
+        """
+        if not self.calibrated:
+            return None
+        _, _, spread = self.correction()
+        return self.move_time(distance) + max(sigmas * spread, minimum)
+
+    def observe(self, distance: float, duration: float):
+        """Adds one completed move.
+
+        :param distance: actual travel in user units
+        :param duration: seconds from the move command until the axis was seen standing
+        """
+        predicted = float(self.predict(distance))
+        with self._lock:
+            self._sums *= self.forgetting
+            self._sums += (1.0, predicted, duration, predicted ** 2, predicted * duration, duration ** 2)
+            self.observations += 1
@@ -0,0 +1,287 @@
+import math
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+from src.stage_type.motion_model import INSTANT_ACCEL, plan_move
+
+_MAX_PHASES = 4  # longest profile of plan_move: braking phase followed by a trapezoid
+
+
+def now_us() -> int:
+    """Timestamp in the time base of position_at: time.monotonic_ns() in microseconds, like t_ns of the telemetry"""
+    return time.monotonic_ns() // 1000
+
+
+def _reach(speed, dt, max_speed, accel):
+    """Largest displacement in positive direction within dt, starting at speed, with speeds up to max_speed and
+    accelerations up to accel.
+    """
+    speed = np.minimum(speed, max_speed)
+    ramp = (max_speed - speed) / accel
+    ramped = np.minimum(dt, ramp)
+    return speed * ramped + accel / 2 * ramped * ramped + max_speed * np.maximum(dt - ramp, 0.0)
+
+
+def _first_root(position: float, speed: float, accel: float, duration: float):
+    """Smallest tau in [0, duration] with position + speed * tau + accel / 2 * tau^2 = 0, None if there is none"""
+    if position == 0:
+        return 0.0
+    if accel == 0:
+        roots = [-position / speed] if speed else []
+    else:
+        discriminant = speed * speed - 2 * accel * position
+        if discriminant < 0:
+            return None
+        root = math.sqrt(discriminant)
+        roots = [(-speed - root) / accel, (-speed + root) / accel]
+    roots = [tau for tau in roots if 0 <= tau <= duration]
+    return min(roots) if roots else None
+
+
+class PositionEstimate(NamedTuple):
+    position: np.ndarray  # estimated position in user units
+    error: np.ndarray  # bound of the absolute deviation from the true position in user units
+
+
+class PositionEstimator:
+    """Position of an axis at arbitrary times from sparse status samples.
+
+    Between samples the axis follows the profile of its current move command (see motion_model.plan_move), so the
+    estimate starts at the last sample before the requested time and follows that profile. Without knowing the
+    profile, the position at that time is still limited by the speed and acceleration limits of the axis: starting
+    from the sample before and ending at the sample after it, only an interval of positions can be reached. The
+    estimate is kept inside this interval and the error is the distance to its farther end, so the bound holds even if
+    the axis deviated from the profile. Times after the last sample only have the interval of the sample before.
+
+    New move commands must be registered with command (or sent through move_towards), otherwise times between the
+    command and the next sample are estimated with the old target.
+    """
+
+    def __init__(self, limits: tuple, resolution: float = 0.0, capacity: int = 4096,
+                 timing_uncertainty_us: float = 0.0):
+        """
+        :param limits: (speed, accel, decel) in user units, see motion_model.axis_limits
+        :param resolution: smallest position step in user units (one microstep), added to the error as rounding
+        :param capacity: number of samples kept, older samples are dropped
+        :param timing_uncertainty_us: uncertainty of the sample timestamps, e.g. half of a get_status round trip
+        """
+        self.speed, self.accel, self.decel = (float(value) for value in limits)
+        self._max_accel = max(self.accel or INSTANT_ACCEL, self.decel or INSTANT_ACCEL)
+        self.resolution = resolution
+        self.capacity = capacity
+        self.timing_uncertainty_us = timing_uncertainty_us
+        self.target = None
+        self.axis = None
+        self.count = 0
+        self._lock = threading.Lock()
+        self._t = np.zeros(capacity, dtype=np.int64)
+        self._position = np.zeros(capacity)
+        self._speed = np.zeros(capacity)
+        self._base_error = np.zeros(capacity)  # error of the sample itself, > 0 for predicted states of commands
+        self._phase_start = np.zeros((capacity, _MAX_PHASES + 1))
+        self._phase_position = np.zeros((capacity, _MAX_PHASES + 1))
+        self._phase_speed = np.zeros((capacity, _MAX_PHASES + 1))
+        self._phase_accel = np.zeros((capacity, _MAX_PHASES + 1))
+
+    @classmethod
+    def from_axis(cls, axis: Standa, **kwargs) -> "PositionEstimator":
+        """Estimator with the move settings and the microstep resolution of a connected axis"""
+        estimator = cls(axis.get_motion_model().limits, axis.calibration_t.A / axis._microstep_fraction(), **kwargs)
+        estimator.axis = axis
+        estimator.target = axis._target
+        return estimator
+
+    def observe(self, t_us: int, position: float, speed: float, target: float = None, error: float = 0.0):
+        """Adds a measured state; samples must arrive in time order.
+
+        :param t_us: timestamp in microseconds, see now_us
+        :param position: position in user units
+        :param speed: speed in user units/s
+        :param target: target of the running move command, default is the last known target
+        :param error: uncertainty of position in user units
+        """
+        if target is not None:
+            self.target = target
+        with self._lock:
+            self._append(int(t_us), float(position), float(speed), error)
+
+    def observe_status(self, status: status_t, t_us: int = None):
+        """Adds a status read from the axis of from_axis; its target is taken from the axis."""
+        axis = self.axis
+        fraction = axis._microstep_fraction()
+        speed = axis.calibration_t.A * (status.CurSpeed + status.uCurSpeed / fraction)
+        self.observe(now_us() if t_us is None else t_us, axis.status_position(status), speed, axis._target)
+
+    def observe_records(self, records: np.ndarray, target: float = None):
+        """Adds telemetry records (see TelemetrySampler.snapshot and stream) of the axis of from_axis.
+
+        :param target: target of the move during the records, default is the current target of the axis
+        """
+        if target is None:
+            target = self.axis._target
+        if target is not None:
+            self.target = target
+        fraction = self.axis._microstep_fraction()
+        a = self.axis.calibration_t.A
+        positions = a * (records["CurPosition"] + records["uCurPosition"] / fraction)
+        speeds = a * (records["CurSpeed"] + records["uCurSpeed"] / fraction)
+        with self._lock:
+            last = self._t[self.count - 1] if self.count else np.iinfo(np.int64).min
+            for t_ns, position, speed in zip(records["t_ns"].tolist(), positions.tolist(), speeds.tolist()):
+                if t_ns // 1000 > last:
+                    self._append(t_ns // 1000, position, speed, 0.0)
+
+    def command(self, target: float, t_us: int = None):
+        """Registers a move command sent at t_us. The predicted state at that time becomes the start of the new
+        profile, with the error of the prediction.
+        """
+        t_us = now_us() if t_us is None else int(t_us)
+        with self._lock:
+            if self.count:
+                position, error = self._estimate(np.array([t_us], dtype=np.float64))
+                speed = self._profile_speed(self.count - 1, (t_us - self._t[self.count - 1]) / 1e6)
+                self.target = target
+                self._append(t_us, float(position[0]), speed, float(error[0]))
+            else:
+                self.target = target
+
+    def move_towards(self, value: float) -> bool:
+        """Sends a move command to the axis of from_axis and registers it, see command
+
+        :return: True if the controller accepted the command; a rejected command is not registered
+        """
+        before = now_us()
+        if not self.axis.move_towards(value):
+            return False
+        self.command(value, (before + now_us()) // 2)
+        return True
+
+    def _append(self, t_us: int, position: float, speed: float, error: float):
+        if self.count == self.capacity:
+            keep = self.capacity // 2
+            for array in (self._t, self._position, self._speed, self._base_error, self._phase_start,
+                          self._phase_position, self._phase_speed, self._phase_accel):
+                array[:keep] = array[self.count - keep:self.count]
+            self.count = keep
+        index = self.count
+        self._t[index], self._position[index], self._speed[index] = t_us, position, speed
+        self._base_error[index] = error
+
+        if self.target is None:
+            phases = [(np.inf, 0.0)] if speed else []  # unknown command: keep the speed
+        else:
+            phases = plan_move(position, speed, self.target, self.speed, self.accel, self.decel)
+        starts, positions, speeds, accels = self._phase_start[index], self._phase_position[index], \
+            self._phase_speed[index], self._phase_accel[index]
+        starts[:], accels[:] = np.inf, 0.0
+        start = 0.0
+        for phase, (duration, a) in enumerate(phases):
+            starts[phase], positions[phase], speeds[phase], accels[phase] = start, position, speed, a
+            if duration == np.inf:
+                break
+            position += speed * duration + a / 2 * duration * duration
+            speed += a * duration
+            start += duration
+        else:
+            # standstill at the end of the profile
+            phase = len(phases)
+            starts[phase], positions[phase], speeds[phase] = start, \
+                (self.target if self.target is not None else position), 0.0
+        self.count += 1
+
+    def _profile_speed(self, index: int, dt: float) -> float:
+        phase = int(np.searchsorted(self._phase_start[index], dt, side="right")) - 1
+        tau = dt - self._phase_start[index, phase]
+        return float(self._phase_speed[index, phase] + self._phase_accel[index, phase] * tau)
+
+    def last_sample(self):
+        """
+        :return: (t_us, position, speed) of the latest sample or command, None without samples
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            index = self.count - 1
+            return int(self._t[index]), float(self._position[index]), float(self._speed[index])
+
+    def crossing_time(self, position: float):
+        """First time at which the profile of the latest sample reaches position, e.g. to trigger a detector while the
+        axis passes an angle.
+
+        :return: timestamp in microseconds, None if the profile does not reach position
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            index = self.count - 1
+            starts = self._phase_start[index]
+            for phase in range(_MAX_PHASES + 1):
+                start = starts[phase]
+                if start == np.inf:
+                    break
+                duration = starts[phase + 1] - start if phase < _MAX_PHASES else np.inf
+                offset = _first_root(self._phase_position[index, phase] - position, self._phase_speed[index, phase],
+                                     self._phase_accel[index, phase], duration)
+                if offset is not None:
+                    return int(self._t[index] + (start + offset) * 1e6)
+        return None
+
+    def position_at(self, t_us) -> PositionEstimate:
+        """
+        :param t_us: timestamp or array of timestamps in microseconds, see now_us
+        :return: PositionEstimate with position and error bound of the same shape, nan without samples
+        """
+        t = np.asarray(t_us, dtype=np.float64)
+        with self._lock:
+            position, error = self._estimate(t.ravel())
+        return PositionEstimate(position.reshape(t.shape), error.reshape(t.shape))
+
+    def _estimate(self, t: np.ndarray) -> tuple:
+        n = self.count
+        if n == 0:
+            return np.full(t.shape, np.nan), np.full(t.shape, np.nan)
+        times = self._t[:n]
+        after = np.searchsorted(times, t, side="right")
+        before = np.maximum(after - 1, 0)
+        has_before = after > 0
+        has_after = after < n
+        after = np.minimum(after, n - 1)
+
+        # profile of the command, evaluated from the sample before
+        dt = np.maximum(t - times[before], 0.0) / 1e6
+        starts = self._phase_start[before]
+        phase = (dt[:, None] >= starts).sum(axis=1) - 1
+        rows = np.arange(len(t))
+        tau = dt - starts[rows, phase]
+        profile = (self._phase_position[before, phase] + self._phase_speed[before, phase] * tau
+                   + self._phase_accel[before, phase] / 2 * tau * tau)
+        profile = np.where(has_before, profile, self._position[after])
+
+        # positions reachable within the speed and acceleration limits, from the sample before and to the sample after
+        lower = np.full(t.shape, -np.inf)
+        upper = np.full(t.shape, np.inf)
+        forward = np.where(has_before, dt, 0.0)
+        upper = np.where(has_before, self._position[before] + _reach(self._speed[before], forward, self.speed,
+                                                                       self._max_accel), upper)
+        lower = np.where(has_before, self._position[before] - _reach(-self._speed[before], forward, self.speed,
+                                                                       self._max_accel), lower)
+        backward = np.where(has_after, np.maximum(times[after] - t, 0.0) / 1e6, 0.0)
+        upper = np.where(has_after, np.minimum(upper, self._position[after] + _reach(-self._speed[after], backward,
+                                                                                       self.speed, self._max_accel)),
+                         upper)
+        lower = np.where(has_after, np.maximum(lower, self._position[after] - _reach(self._speed[after], backward,
+                                                                                       self.speed, self._max_accel)),
+                         lower)
+        upper = np.maximum(upper, lower)  # samples with rounding errors may leave an empty interval
+
+        position = np.clip(profile, lower, upper)
+        error = np.maximum(position - lower, upper - position)
+        base_error = np.where(has_before, self._base_error[before], self._base_error[after])
+        # rounding of the sampled positions to microsteps and of their timestamps to microseconds
+        error = error + base_error + self.resolution / 2 + self.speed * (self.timing_uncertainty_us + 1) / 1e6
+        return position, error
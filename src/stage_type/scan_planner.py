@@ -0,0 +1,227 @@
+import functools
+import itertools
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stage_type.motion_model import move_time_coefficients, move_time_from_coefficients
+
+
+@functools.lru_cache(maxsize=None)
+def _ring_offsets(radius: int, n_axes: int) -> np.ndarray:
+    """Cell offsets with a Chebyshev distance of exactly radius"""
+    offsets = np.array(list(itertools.product(range(-radius, radius + 1), repeat=n_axes)), dtype=np.int64)
+    return offsets[np.abs(offsets).max(axis=1) == radius]
+
+
+class ScanPlan(NamedTuple):
+    order: np.ndarray  # index into the planned points for every target, -1 for inserted approach moves
+    targets: np.ndarray  # (m, n_axes) targets in execution order, e.g. for ScanExecutor.run
+    estimated_time: float  # sum of the move times in seconds, without settling and acquisition
+
+
+class ScanPlanner:
+    """Reorders scan points to reduce the total move time.
+
+    The cost of a move is the time of the slowest axis, because the axes move at the same time (see
+    StandaTwoAxes.move_absolut_many); every axis follows the trapezoidal profile of its Speed/Accel/Decel settings,
+    optionally with the correction its AxisMotionModel learned. An axis that does not move costs nothing.
+    """
+
+    def __init__(self, limits, corrections=None):
+        """
+        :param limits: (speed, accel, decel) per axis in user units, see motion_model.axis_limits
+        :param corrections: (scale, offset) per axis applied to the profile time, see AxisMotionModel.correction
+        """
+        limits = np.asarray(limits, dtype=np.float64).reshape(-1, 3)
+        self.speed, self.accel, self.decel = limits.T
+        self._coefficients = move_time_coefficients(self.speed, self.accel, self.decel)
+        if corrections is None:
+            corrections = [(1.0, 0.0)] * len(limits)
+        self.scale, self.offset = np.asarray(corrections, dtype=np.float64).reshape(-1, 2).T
+
+    @classmethod
+    def from_models(cls, models: list) -> "ScanPlanner":
+        """
+        :param models: AxisMotionModel per axis in the column order of the scan points
+        """
+        return cls([model.limits for model in models], [model.correction()[:2] for model in models])
+
+    @classmethod
+    def from_axes(cls, axes: list) -> "ScanPlanner":
+        """
+        :param axes: connected Standa axes in the column order of the scan points
+        """
+        return cls.from_models([axis.get_motion_model() for axis in axes])
+
+    def _axis_times(self, delta) -> np.ndarray:
+        times = move_time_from_coefficients(delta, self._coefficients)
+        return np.where(delta != 0, np.maximum(self.scale * times + self.offset, 0.0), 0.0)
+
+    def move_times(self, start, end) -> np.ndarray:
+        """Move time between points; start and end broadcast against each other, last dimension is the axis.
+
+        :return: seconds per move
+        """
+        delta = np.asarray(end, dtype=np.float64) - np.asarray(start, dtype=np.float64)
+        return self._axis_times(delta).max(axis=-1)
+
+    def path_time(self, targets, start=None) -> float:
+        """
+        :param targets: (m, n_axes) targets in execution order
+        :param start: current position, by default the path starts at the first target
+        :return: sum of all move times in seconds
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        if start is not None:
+            targets = np.vstack([np.asarray(start, dtype=np.float64), targets])
+        if len(targets) < 2:
+            return 0.0
+        return float(self.move_times(targets[:-1], targets[1:]).sum())
+
+    def _plan(self, points: np.ndarray, order: np.ndarray, targets: np.ndarray = None, start=None) -> ScanPlan:
+        if targets is None:
+            targets = points[order]
+        return ScanPlan(order, targets, self.path_time(targets, start))
+
+    @staticmethod
+    def _rows(points: np.ndarray, row_tolerance: float) -> np.ndarray:
+        """Row number of every point, rows are points with the same last-axis value (within row_tolerance)"""
+        return np.unique(np.round(points[:, -1] / row_tolerance), return_inverse=True)[1].ravel()
+
+    def serpentine(self, points, row_tolerance: float = 1e-6) -> ScanPlan:
+        """Raster order: rows sorted by the last axis, the first axis runs forwards and backwards in alternating rows.
+
+        :param points: (n, n_axes) scan points
+        :param row_tolerance: values of the last axis closer than this belong to the same row
+        """
+        points = np.asarray(points, dtype=np.float64)
+        rows = self._rows(points, row_tolerance)
+        first_axis = np.where(rows % 2 == 1, -points[:, 0], points[:, 0])
+        return self._plan(points, np.lexsort((first_axis, rows)))
+
+    def unidirectional(self, points, backlash: float = 0.0, row_tolerance: float = 1e-6) -> ScanPlan:
+        """Raster order in which every point is approached from the negative side on all axes, so backlash always
+        acts in the same direction. Each row runs in positive direction of the first axis; before a row the stage
+        moves to an approach point `backlash` below its first point (order entry -1).
+
+        :param points: (n, n_axes) scan points
+        :param backlash: overshoot of the approach moves in user units, 0 disables the approach moves
+        :param row_tolerance: values of the last axis closer than this belong to the same row
+        """
+        points = np.asarray(points, dtype=np.float64)
+        rows = self._rows(points, row_tolerance)
+        order = np.lexsort((points[:, 0], rows))
+        if backlash <= 0 or len(order) == 0:
+            return self._plan(points, order)
+
+        ordered = points[order]
+        sorted_rows = rows[order]
+        row_starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+        approach = ordered[row_starts].copy()
+        approach[:, 0] -= backlash
+        approach[0] -= backlash  # unknown start position: approach the very first point from below on all axes
+        targets = np.insert(ordered, row_starts, approach, axis=0)
+        return self._plan(points, np.insert(order, row_starts, -1), targets)
+
+    def nearest_neighbour(self, points, start=None, two_opt_window: int = 32, two_opt_passes: int = 4) -> ScanPlan:
+        """Greedy nearest-neighbour tour in move time, improved by 2-opt.
+
+        The nearest point is searched in a grid of cells around the current point, so the tour is built in about
+        O(n) cost evaluations; 2-opt only tries to reverse segments of up to two_opt_window points, evaluated for all
+        positions of the tour at once.
+
+        :param points: (n, n_axes) scan points
+        :param start: current stage position, by default the tour starts at the first point
+        :param two_opt_window: longest reversed segment, 0 disables 2-opt
+        :param two_opt_passes: maximum number of 2-opt passes
+        """
+        points = np.asarray(points, dtype=np.float64)
+        order = self._nearest_neighbour_order(points, start)
+        if two_opt_window > 1:
+            order = self._two_opt(points, order, two_opt_window, two_opt_passes)
+        return self._plan(points, order, start=start)
+
+    def _nearest_neighbour_order(self, points: np.ndarray, start) -> np.ndarray:
+        n, n_axes = points.shape
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        lower = points.min(axis=0)
+        span = points.max(axis=0) - lower
+        cells_per_axis = max(int(round(n ** (1 / n_axes))), 1)
+        cell_size = np.where(span > 0, span / cells_per_axis, 1.0)
+        shape = np.minimum(np.floor(span / cell_size).astype(np.int64) + 1, cells_per_axis + 1)
+        cells = np.minimum(np.floor((points - lower) / cell_size).astype(np.int64), shape - 1)
+
+        keys = np.ravel_multi_index(cells.T, shape)
+        by_key = np.argsort(keys, kind="stable")
+        boundaries = np.flatnonzero(np.diff(keys[by_key])) + 1
+        buckets = {int(keys[group[0]]): group for group in np.split(by_key, boundaries)}
+
+        visited = np.zeros(n, dtype=bool)
+        remaining = n
+        # lower bound of the move time to any point at least `r` cells away on one axis
+        ring_bound = self._axis_times(np.arange(max(shape) + 1)[:, None] * cell_size).min(axis=1)
+
+        if start is None:
+            current = 0
+        else:
+            current = int(np.argmin(self.move_times(np.asarray(start, dtype=np.float64), points)))
+        order = np.empty(n, dtype=np.int64)
+        for position in range(n):
+            order[position] = current
+            visited[current] = True
+            remaining -= 1
+            if remaining == 0:
+                break
+            current = self._nearest_unvisited(points, cells[current], shape, buckets, visited, remaining, ring_bound,
+                                              points[current])
+        return order
+
+    def _nearest_unvisited(self, points, cell, shape, buckets, visited, remaining, ring_bound, point) -> int:
+        best, best_cost = -1, np.inf
+        n_axes = len(shape)
+        for radius in range(int(max(shape)) + 1):
+            if (2 * radius + 1) ** n_axes > remaining:
+                # the ring has more cells than unvisited points left: checking all of them directly is cheaper
+                candidates = np.flatnonzero(~visited)
+            else:
+                neighbours = cell + _ring_offsets(radius, n_axes)
+                neighbours = neighbours[((neighbours >= 0) & (neighbours < shape)).all(axis=1)]
+                groups = [buckets[key] for key in np.ravel_multi_index(neighbours.T, shape).tolist() if key in buckets]
+                candidates = np.concatenate(groups) if groups else np.zeros(0, dtype=np.int64)
+                candidates = candidates[~visited[candidates]]
+
+            if len(candidates):
+                costs = self.move_times(point, points[candidates])
+                index = int(np.argmin(costs))
+                if costs[index] < best_cost:
+                    best, best_cost = int(candidates[index]), costs[index]
+            if (2 * radius + 1) ** n_axes > remaining or (best >= 0 and ring_bound[radius] >= best_cost):
+                return best
+        return best
+
+    def _two_opt(self, points: np.ndarray, order: np.ndarray, window: int, passes: int) -> np.ndarray:
+        order = order.copy()
+        n = len(order)
+        for _ in range(passes):
+            improved = False
+            for length in range(2, min(window, n - 2) + 1):
+                path = points[order]
+                edges = self.move_times(path[:-1], path[1:])
+                # reverse path[i + 1 .. i + length]: edges i and i + length are replaced
+                first = np.arange(n - length - 1)
+                delta = (self.move_times(path[first], path[first + length])
+                         + self.move_times(path[first + 1], path[first + length + 1])
+                         - edges[first] - edges[first + length])
+                candidates = np.flatnonzero(delta < -1e-12)
+                last_end = -1
+                for i in candidates:
+                    if i <= last_end:
+                        continue
+                    order[i + 1:i + length + 1] = order[i + 1:i + length + 1][::-1].copy()
+                    last_end = i + length
+                    improved = True
+            if not improved:
+                break
+        return order
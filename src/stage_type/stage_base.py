@@ -1,22 +1,12 @@
 from abc import ABC, abstractmethod
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QWidget, QMessageBox
 
-
-class ErrorPopup(QWidget):
-    def __init__(self, message):
-        super().__init__()
-        self.message = message
-        self.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint)
-
-        self.open_msg_box()
-
-    def open_msg_box(self):
-        QMessageBox.information(self, "Info", self.message, QMessageBox.Ok)
-
-    def close_popup(self):
-        self.close()
+def __getattr__(name):
+    # ErrorPopup needs PyQt5, which is only imported on first access
+    if name == "ErrorPopup":
+        from src.stage_type.error_popup import ErrorPopup
+        return ErrorPopup
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class StageBase(ABC):
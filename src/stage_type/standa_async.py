@@ -0,0 +1,140 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_axes import AxisTable
+from src.stage_type.standa_two_axes import StandaTwoAxes
+
+
+class AsyncStanda:
+    """
+    asyncio-Schnittstelle für eine Standa-Achse. Alle blockierenden libximc-Aufrufe laufen auf einem eigenen Thread je
+    Gerät, dadurch bleiben die Befehle an einen Controller in Reihenfolge. Beim Warten auf das Bewegungsende wird nur
+    get_status auf diesem Thread ausgeführt, zwischen den Abfragen wartet die Schleife mit asyncio.sleep.
+    """
+
+    def __init__(self, axis: Standa):
+        self.axis = axis
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"standa-{axis.handle}")
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def get_angle(self) -> float:
+        return await self._run(self.axis.get_position_cached)
+
+    async def move_absolut(self, position: float) -> float:
+        """
+        :return: Endposition
+        """
+        if not await self._run(self.axis.move_towards, position):
+            raise XimcError(self.axis._last_error, "command_move")
+        return await self.wait_for_move()
+
+    async def move_relative(self, position: float) -> float:
+        """
+        :return: Endposition
+        """
+        if not await self._run(self.axis.move_relative_towards, position):
+            raise XimcError(self.axis._last_error, "command_movr")
+        return await self.wait_for_move()
+
+    async def move_towards(self, position: float):
+        await self._run(self.axis.move_towards, position)
+
+    async def stop_movement(self):
+        await self._run(self.axis.stop)
+
+    async def wait_for_move(self) -> float:
+        """
+        Wartet ohne den Event-Loop zu blockieren, bis die Achse steht
+        :return: Endposition
+        """
+        status = status_t()
+        while True:
+            if await self._run(self.axis.get_status, status) is None:
+                raise XimcError(self.axis._last_error, "get_status")
+            if not Standa.is_moving(status):
+                self.axis.record_stop(status)
+                return self.axis.status_position(status)
+            await asyncio.sleep(self.axis.next_poll_interval(status))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class AsyncStandaTwoAxes:
+    """
+    asyncio-Schnittstelle für StandaTwoAxes mit denselben Methodennamen. Bewegungen verschiedener Achsen laufen
+    gleichzeitig, jede Achse hat ihren eigenen Befehls-Thread (siehe AsyncStanda).
+    """
+
+    def __init__(self, stage: StandaTwoAxes = None):
+        self.stage = stage or StandaTwoAxes()
+        self.axes = AxisTable()
+
+    async def open_connection(self) -> bool:
+        result = await asyncio.get_running_loop().run_in_executor(None, self.stage.open_connection)
+        if result:
+            self.axes = AxisTable()
+            for axis_id, axis in self.stage.axes.items():
+                self.axes.add(AsyncStanda(axis), self.stage.axes.name_of(axis_id), axis_id)
+        return bool(result)
+
+    async def close_connection(self) -> bool:
+        for axis in self.axes.values():
+            axis.close()
+        self.axes = AxisTable()
+        return await asyncio.get_running_loop().run_in_executor(None, self.stage.close_connection)
+
+    def _get_axis(self, axis) -> AsyncStanda:
+        return self.axes[axis]
+
+    async def get_angle(self, axis: int) -> float:
+        position = await self._get_axis(axis).get_angle()
+        return round(position, self.stage._decimals)
+
+    async def get_angles(self) -> dict:
+        """
+        :return: Winkel je Achsennummer, alle Achsen werden gleichzeitig gelesen
+        """
+        axes = list(self.axes)
+        positions = await asyncio.gather(*(self.axes[axis].get_angle() for axis in axes))
+        return {axis: round(position, self.stage._decimals) for axis, position in zip(axes, positions)}
+
+    async def move_absolut(self, axis: int, position: float) -> float:
+        return await self._get_axis(axis).move_absolut(position)
+
+    async def move_relative(self, axis: int, position: float) -> float:
+        return await self._get_axis(axis).move_relative(position)
+
+    async def move_towards(self, axis: int, position: float):
+        await self._get_axis(axis).move_towards(position)
+
+    async def move_absolut_many(self, positions: dict) -> dict:
+        """
+        Fährt mehrere Achsen gleichzeitig
+        :param positions: Zielposition je Achse
+        :return: Endposition je Achse
+        """
+        axes = list(positions)
+        results = await asyncio.gather(*(self._get_axis(axis).move_absolut(positions[axis]) for axis in axes))
+        return dict(zip(axes, results))
+
+    async def go_home(self) -> dict:
+        return await self.move_absolut_many({axis: 0.0 for axis in self.axes})
+
+    async def wait_for_move(self, axis: int = None):
+        """
+        Wartet, bis die angegebene Achse oder alle Achsen stehen
+        :return: Endposition der Achse bzw. ein dict mit der Endposition je Achse
+        """
+        if axis is not None:
+            return await self._get_axis(axis).wait_for_move()
+        axes = list(self.axes)
+        results = await asyncio.gather(*(self.axes[axis].wait_for_move() for axis in axes))
+        return dict(zip(axes, results))
+
+    async def stop_movement(self):
+        await asyncio.gather(*(axis.stop_movement() for axis in self.axes.values()))
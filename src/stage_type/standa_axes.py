@@ -0,0 +1,94 @@
+class AxisTable:
+    """
+    Geordnete Achsen einer Stage, ansprechbar über ihre Nummer (1, 2, ...) oder ihren Namen ("Roll", "Nick").
+    Verhält sich beim Iterieren wie ein dict Nummer -> Achse in Achsenreihenfolge. Alle Schreibweisen einer Achse
+    (Nummer als int, float oder str, Name in beliebiger Groß-/Kleinschreibung) stehen in einem gemeinsamen dict, ein
+    Zugriff ist also eine einzige Suche im dict.
+    """
+
+    def __init__(self):
+        self._axes = {}  # Nummer -> Achse, in Achsenreihenfolge
+        self._names = {}  # Nummer -> Name
+        self._keys = {}  # jede Schreibweise -> Nummer
+
+    def add(self, axis, name: str = None, axis_id: int = None) -> int:
+        """
+        Hängt eine Achse an
+        :param axis: Achse, z.B. Standa
+        :param name: optionaler Name
+        :param axis_id: Nummer, Standard ist die nächste freie Nummer ab 1
+        :return: Nummer der Achse
+        """
+        if axis_id is None:
+            axis_id = max(self._axes, default=0) + 1
+        if axis_id in self._axes:
+            raise ValueError(f"Axis {axis_id} already exists!")
+        if name is not None and name.lower() in self._keys:
+            raise ValueError(f"Axis name {name} already exists!")
+        self._axes[axis_id] = axis
+        self._names[axis_id] = name
+        # 1.0 hat denselben Hash wie 1, Zahlen als float brauchen also keinen eigenen Eintrag
+        self._keys[axis_id] = self._keys[str(axis_id)] = axis_id
+        if name is not None:
+            self._keys[name] = self._keys[name.lower()] = axis_id
+        return axis_id
+
+    def clear(self):
+        self._axes.clear()
+        self._names.clear()
+        self._keys.clear()
+
+    def id_of(self, key) -> int:
+        """
+        :param key: Nummer (int, float oder str) oder Name der Achse
+        :return: Nummer der Achse
+        :raise ValueError: wenn es die Achse nicht gibt
+        """
+        try:
+            return self._keys[key]
+        except (KeyError, TypeError):
+            pass
+        if isinstance(key, str) and key.lower() in self._keys:
+            return self._keys[key.lower()]
+        raise ValueError(f"Axis {key} does not exist!")
+
+    def name_of(self, key) -> str:
+        return self._names[self.id_of(key)]
+
+    def __getitem__(self, key):
+        try:
+            return self._axes[self._keys[key]]
+        except (KeyError, TypeError):
+            return self._axes[self.id_of(key)]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except ValueError:
+            return default
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._axes)
+
+    def __iter__(self):
+        return iter(self._axes)
+
+    @property
+    def ids(self) -> list:
+        return list(self._axes)
+
+    @property
+    def names(self) -> list:
+        return list(self._names.values())
+
+    def keys(self):
+        return self._axes.keys()
+
+    def values(self):
+        return self._axes.values()
+
+    def items(self):
+        return self._axes.items()
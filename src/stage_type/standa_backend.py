@@ -0,0 +1,50 @@
+import os
+import sys
+from pathlib import Path
+
+from src.stage_type.STANDA_bindings import *
+
+
+def get_dll_path() -> str:
+    """
+    Pfad der libximc.dll, auch wenn das Programm mit PyInstaller gebaut wurde
+    :return: Pfad zur dll
+    """
+    if getattr(sys, 'frozen', False):
+        application_path: str = sys._MEIPASS
+        return os.path.join(application_path, "src\\libs\\libximc.dll")
+    application_path: str = Path(__file__).parents[1]
+    return os.path.join(application_path, "libs\\libximc.dll")
+
+
+def load_libximc(dll_file: str = None):
+    """
+    Lädt die libximc.dll als Backend für Standa.
+
+    Ein Backend ist jedes Objekt, das die genutzten libximc-Funktionen unter ihrem C-Namen mit den gleichen Argumenten
+    anbietet (Handles als int, Strukturen per byref oder direkt) und Fehlercodes wie check_result als XimcError meldet.
+    Neben der dll erfüllt das z.B. SimulatedLibximc aus standa_simulator diese Schnittstelle.
+    :param dll_file: Pfad zur dll, Standard siehe get_dll_path
+    :return: geladene Bibliothek
+    """
+    if sys.platform != "win32":
+        raise OSError("libximc.dll kann nur unter Windows geladen werden, sonst Standa.set_backend() nutzen")
+    return bind_prototypes(WinDLL(dll_file or get_dll_path()))
+
+
+def bind_prototypes(lib):
+    """
+    Setzt einmalig restype, argtypes und errcheck aller genutzten Funktionen aus libximc_prototypes. Danach wandelt
+    ctypes die Argumente ohne Umweg über c_float/byref um und Fehlercodes kommen als XimcError zurück. Das dient der
+    Typsicherheit, nicht der Geschwindigkeit: errcheck kostet je Aufruf einen Python-Aufruf, siehe
+    benchmarks/bench_ctypes_overhead.py.
+    :param lib: geladene libximc
+    :return: lib
+    """
+    for name, (restype, argtypes, errcheck) in libximc_prototypes.items():
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+        if errcheck is not None:
+            function.errcheck = errcheck
+    return lib
@@ -0,0 +1,66 @@
+import os
+
+# nur os statt pathlib, json (mit re und enum) wird erst beim Lesen einer vorhandenen Datei importiert: available_stages
+# in api_angle_stage bleibt ohne Konfigurationsdatei so schnell wie bisher
+
+
+def default_config_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".api_angle_stage", "standa_stages.json")
+
+
+def load_stage_configs(path=None) -> dict:
+    """
+    Liest die Stage-Definitionen, z.B.
+        {"stages": {"rig3": {"axes": [
+            {"name": "Roll", "serial": "30314", "uri": "xi-com:\\\\.\\COM3", "microstep_mode": 9,
+             "unit_multiplier": 949, "speed": 30000, "soft_limits": [-30, 30]},
+            ...]}}}
+    serial fehlt oder ist null für "irgendein weiteres gefundenes Gerät", uri und soft_limits sind optional.
+    :param path: Pfad der JSON-Datei, Standard siehe default_config_path
+    :return: Stage-Name -> Liste der Achsen-Einstellungen (siehe axis_settings), leer, wenn die Datei fehlt
+    :raise ValueError: bei unvollständigen Achsen
+    """
+    path = path or default_config_path()
+    if not os.path.isfile(path):
+        return {}
+    import json
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    return {name: [axis_settings(axis) for axis in stage["axes"]] for name, stage in data.get("stages", {}).items()}
+
+
+def axis_settings(config: dict) -> dict:
+    """
+    Übersetzt eine Achse der Konfiguration in die Einstellungen von Standa.set_default_settings
+    :raise ValueError: wenn microstep_mode, unit_multiplier oder speed fehlen
+    """
+    missing = [key for key in ("microstep_mode", "unit_multiplier", "speed") if key not in config]
+    if missing:
+        raise ValueError(f"Axis {config.get('name', config.get('serial'))}: missing {', '.join(missing)}")
+    serial = config.get("serial")
+    limits = config.get("soft_limits")
+    return {
+        "name": config.get("name"),
+        "serial": None if serial is None else str(serial),
+        "uri": config.get("uri"),
+        "engine_settings_calb": int(config["microstep_mode"]),
+        "unit_multiplier": config["unit_multiplier"],
+        "speed": int(config["speed"]),
+        "soft_limits": None if limits is None else (float(limits[0]), float(limits[1])),
+    }
+
+
+def configured_stage_names(path=None) -> list:
+    """
+    :return: Namen der Stages in der Konfigurationsdatei, ohne die Achsen zu prüfen; leer, wenn die Datei fehlt oder
+             nicht lesbar ist
+    """
+    path = path or default_config_path()
+    if not os.path.isfile(path):
+        return []
+    import json
+    try:
+        with open(path, encoding="utf-8") as file:
+            return list(json.load(file).get("stages", {}))
+    except (OSError, ValueError, AttributeError):
+        return []
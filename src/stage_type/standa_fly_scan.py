@@ -0,0 +1,208 @@
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+from src.stage_type.position_estimator import PositionEstimator, now_us
+from src.stage_type.standa_telemetry import TelemetrySampler
+
+_SPIN_SECONDS = 0.0005  # busy wait before a trigger instead of sleeping
+
+trigger_dtype = np.dtype([
+    ("index", np.int64),  # index into the requested trigger positions
+    ("target", np.float64),  # requested trigger position
+    ("predicted_us", np.int64),  # predicted crossing time when the trigger was emitted
+    ("t_us", np.int64),  # emission time of the trigger, now_us() time base
+    ("position", np.float64),  # estimated position at t_us from the recorded trajectory
+    ("error", np.float64),  # error bound of position, see PositionEstimator
+])
+
+
+class FlyScanResult(NamedTuple):
+    triggers: np.ndarray  # structured array, see trigger_dtype
+    trajectory: np.ndarray  # telemetry records of the sweep, see telemetry_dtype
+    elapsed: float  # seconds from the start of the sweep until the axis stopped
+
+    @property
+    def points_per_second(self) -> float:
+        return len(self.triggers) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class FlyScan:
+    """Continuous-motion scan of one axis: instead of stopping at every point, the axis sweeps through all trigger
+    positions at constant speed with a single move command, and a trigger event is emitted whenever it passes one.
+
+    The crossing times are predicted from the telemetry of the sweep (see PositionEstimator.crossing_time) and refined
+    with every new sample; the trigger thread sleeps until the predicted time and then calls on_trigger. Afterwards
+    every trigger is stamped with the position at its emission time, estimated from the whole recorded trajectory.
+
+    With sync_out the controller additionally emits a hardware pulse every trigger spacing (SYNCOUT_ONPERIOD), e.g.
+    to trigger a camera directly. These pulses are not visible to the host, the trigger events stay predicted.
+    """
+
+    def __init__(self, axis: Standa, sample_rate: float = 500.0, run_up: float = 1.2):
+        """
+        :param axis: connected axis
+        :param sample_rate: telemetry rate during the sweep in Hz
+        :param run_up: acceleration distance before the first trigger as a multiple of the ramp distance, so the
+                       axis moves at constant speed at every trigger
+        """
+        self.axis = axis
+        self.sample_rate = sample_rate
+        self.run_up = run_up
+
+    def run(self, positions, speed: float, on_trigger=None, sync_out: bool = False) -> FlyScanResult:
+        """Sweeps through all trigger positions.
+
+        :param positions: trigger positions in user units, sorted ascending or descending
+        :param speed: sweep speed in user units/s
+        :param on_trigger: called as on_trigger(index, record) on the trigger thread when the axis passes a position;
+                           must return quickly, the next trigger is not emitted before it returned
+        :param sync_out: also configure the sync output of the controller for equally spaced positions
+        :return: FlyScanResult
+        """
+        positions = np.asarray(positions, dtype=np.float64).ravel()
+        if len(positions) == 0:
+            return FlyScanResult(np.zeros(0, dtype=trigger_dtype), np.zeros(0), 0.0)
+        direction = 1.0 if positions[-1] >= positions[0] else -1.0
+        if np.any(np.diff(positions) * direction < 0):
+            raise ValueError("Trigger positions must be sorted")
+
+        axis = self.axis
+        move_settings = self._read(axis.lib.get_move_settings, move_settings_t())
+        accel = axis.calibration_t.A * min(move_settings.Accel, move_settings.Decel)
+        ramp = speed * speed / (2 * accel) if accel > 0 else 0.0
+        run_up = ramp * self.run_up + speed / self.sample_rate
+        start, end = positions[0] - direction * run_up, positions[-1] + direction * run_up
+
+        self._move_to_start(start)
+
+        sampler = TelemetrySampler(axis, rate=self.sample_rate)
+        triggers = np.zeros(len(positions), dtype=trigger_dtype)
+        triggers["index"] = np.arange(len(positions))
+        triggers["target"] = positions
+        sync_out_settings = None
+        try:
+            if sync_out:
+                sync_out_settings = self._configure_sync_out(positions)
+            self._set_speed(move_settings, speed)
+            # created after _set_speed, so the motion limits of estimator and timeout are those of the sweep
+            estimator = PositionEstimator.from_axis(axis)
+            estimator.observe(now_us(), axis._stopped_position if axis._stopped_position is not None else start, 0.0)
+            timeout = axis.move_timeout(end)
+            sampler.start()
+            started = time.monotonic()
+            if not estimator.move_towards(end):
+                raise XimcError(axis._last_error, "command_move")
+            stopped = threading.Event()
+            trigger_thread = threading.Thread(target=self._emit,
+                                              args=(sampler, estimator, triggers, direction, on_trigger, stopped),
+                                              name="FlyScanTrigger", daemon=True)
+            trigger_thread.start()
+            try:
+                if not axis.wait_for_stop(timeout=timeout):
+                    error = axis._last_error
+                    axis.stop()
+                    raise XimcError(error, "wait_for_stop")
+                elapsed = time.monotonic() - started
+            finally:
+                stopped.set()
+                trigger_thread.join()
+        finally:
+            sampler.stop()
+            try:
+                self._write(axis.lib.set_move_settings, move_settings)
+            finally:
+                axis._motion_limits_stale = True
+                if sync_out_settings is not None:
+                    self._write(axis.lib.set_sync_out_settings, sync_out_settings)
+
+        trajectory = sampler.snapshot().copy()
+        estimator.observe_records(trajectory)
+        stamped = estimator.position_at(triggers["t_us"])
+        triggers["position"], triggers["error"] = stamped.position, stamped.error
+        return FlyScanResult(triggers, trajectory, elapsed)
+
+    def _emit(self, sampler: TelemetrySampler, estimator: PositionEstimator, triggers: np.ndarray, direction: float,
+              on_trigger, stopped: threading.Event):
+        seen = sampler.count
+        for index, position in enumerate(triggers["target"].tolist()):
+            while True:
+                count = sampler.count
+                if count > seen:
+                    estimator.observe_records(sampler.snapshot(count - seen))
+                    seen = count
+                predicted = estimator.crossing_time(position)
+                if predicted is None:
+                    t_us, current, _ = estimator.last_sample()
+                    if (current - position) * direction >= 0:
+                        predicted = t_us  # already passed: emit late, the stamped position shows the deviation
+                    elif stopped.is_set():
+                        # the axis stopped before reaching the position: emit the remaining triggers now
+                        predicted = now_us()
+                    else:
+                        time.sleep(1 / self.sample_rate)
+                        continue
+                remaining = (predicted - now_us()) / 1e6
+                if remaining <= 0:
+                    break
+                if remaining > 1 / self.sample_rate:
+                    time.sleep(1 / self.sample_rate)  # wake up after the next sample to refine the prediction
+                    continue
+                # sleep would overshoot by up to a scheduler tick: sleep until shortly before, then spin
+                time.sleep(max(remaining - _SPIN_SECONDS, 0.0))
+                while now_us() < predicted:
+                    pass
+                break
+            triggers["predicted_us"][index] = predicted
+            triggers["t_us"][index] = now_us()
+            if on_trigger is not None:
+                on_trigger(index, triggers[index])
+
+    def _move_to_start(self, start: float):
+        """Moves to the run-up position with the usual speed and waits, bounded by Standa.move_timeout"""
+        axis = self.axis
+        timeout = axis.move_timeout(start)
+        if not axis.move_towards(start):
+            raise XimcError(axis._last_error, "command_move")
+        if not axis.wait_for_stop(timeout=timeout):
+            error = axis._last_error
+            axis.stop()
+            raise XimcError(error, "wait_for_stop")
+
+    def _read(self, function, settings):
+        if not self.axis._call(function, settings):
+            raise XimcError(self.axis._last_error, function.__name__)
+        return settings
+
+    def _write(self, function, settings):
+        if not self.axis._call(function, settings):
+            raise XimcError(self.axis._last_error, function.__name__)
+
+    def _set_speed(self, move_settings: move_settings_t, speed: float):
+        """Sets the sweep speed in a copy of move_settings, the original is restored after the sweep"""
+        fraction = self.axis._microstep_fraction()
+        microsteps = int(round(speed / self.axis.calibration_t.A * fraction))
+        sweep = move_settings_t.from_buffer_copy(move_settings)
+        sweep.Speed, sweep.uSpeed = divmod(microsteps, fraction)
+        self._write(self.axis.lib.set_move_settings, sweep)
+        self.axis._motion_limits_stale = True
+
+    def _configure_sync_out(self, positions: np.ndarray) -> sync_out_settings_t:
+        """Pulse every trigger spacing; returns the previous settings"""
+        spacing = np.diff(positions)
+        period = abs(spacing[0]) / self.axis.calibration_t.A if len(spacing) else 0.0
+        if (len(spacing) == 0 or not np.allclose(spacing, spacing[0]) or period < 1
+                or abs(period - round(period)) > 1e-6):
+            raise ValueError("sync_out needs equally spaced positions with a whole number of steps between them")
+        previous = self._read(self.axis.lib.get_sync_out_settings, sync_out_settings_t())
+        settings = sync_out_settings_t.from_buffer_copy(previous)
+        settings.SyncOutFlags = (SyncOutFlags.SYNCOUT_ENABLED | SyncOutFlags.SYNCOUT_IN_STEPS
+                                 | SyncOutFlags.SYNCOUT_ONPERIOD)
+        settings.SyncOutPeriod = int(round(period))
+        settings.SyncOutPulseSteps = max(settings.SyncOutPulseSteps, 1)
+        self._write(self.axis.lib.set_sync_out_settings, settings)
+        return previous
@@ -0,0 +1,176 @@
+import json
+import threading
+from time import perf_counter_ns
+
+from src.stage_type.STANDA_bindings import *
+
+# Histogramm wie bei HDR: je Zweierpotenz 2**_SUB_BITS lineare Unterteilungen, relative Auflösung also 1/8
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_BUCKETS = 64 * _SUB_BUCKETS
+
+
+def _bucket(value: int) -> int:
+    """Index des Histogrammfachs für eine Dauer in ns"""
+    exponent = value.bit_length()
+    if exponent <= _SUB_BITS:
+        return value
+    return ((exponent - _SUB_BITS) << _SUB_BITS) | ((value >> (exponent - _SUB_BITS - 1)) & (_SUB_BUCKETS - 1))
+
+
+def _bucket_bounds(index: int) -> tuple:
+    """(untere, obere) Grenze eines Fachs in ns, die obere ist ausgeschlossen"""
+    if index < _SUB_BUCKETS:
+        return index, index + 1
+    exponent = (index >> _SUB_BITS) + _SUB_BITS
+    width = 1 << (exponent - _SUB_BITS - 1)
+    lower = (1 << (exponent - 1)) + (index & (_SUB_BUCKETS - 1)) * width
+    return lower, lower + width
+
+
+class _FunctionStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * _BUCKETS
+        self.errors = {}  # Fehlercode: Anzahl
+
+    def percentile(self, fraction: float) -> int:
+        """Obere Grenze des Fachs, in dem der Anteil fraction aller Aufrufe erreicht ist"""
+        if self.calls == 0:
+            return 0
+        rank = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min(_bucket_bounds(index)[1], self.max_ns)
+        return self.max_ns
+
+
+class InstrumentedLibximc:
+    """
+    Backend-Hülle, die jede libximc-Funktion aus libximc_prototypes misst: Anzahl der Aufrufe, Dauer als Histogramm mit
+    logarithmischen Fächern (relative Auflösung 1/8) und Fehlercodes der XimcError. Damit gehen auch Fehler nicht
+    verloren, die Standa nur in _last_error ablegt und beim nächsten Aufruf überschreibt.
+
+    Standa legt jedes Backend in diese Hülle (siehe Standa.get_lib und Standa.set_backend), die Messung ist aber
+    abgeschaltet, bis enable() aufgerufen wird. Abgeschaltet kostet ein Aufruf nur die zusätzliche Python-Funktion mit
+    einer Abfrage von enabled. Alle anderen Attribute werden an das Backend durchgereicht.
+    """
+
+    def __init__(self, backend, enabled: bool = False):
+        """
+        :param backend: dll oder Simulator, siehe load_libximc
+        :param enabled: sofort messen
+        """
+        self.backend = backend
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {}
+        for name in libximc_prototypes:
+            function = getattr(backend, name, None)
+            if function is not None:
+                self._stats[name] = _FunctionStats()
+                setattr(self, name, self._wrap(name, function, self._stats[name]))
+
+    def __getattr__(self, name):
+        # nur für Attribute, die nicht gemessen werden, z.B. SimulatedLibximc.axis
+        return getattr(self.__dict__["backend"], name)
+
+    def _wrap(self, name: str, function, stats: _FunctionStats):
+        lock = self._lock
+
+        def call(*args):
+            if not self.enabled:
+                return function(*args)
+            start = perf_counter_ns()
+            try:
+                result = function(*args)
+            except XimcError as error:
+                elapsed = perf_counter_ns() - start
+                with lock:
+                    stats.errors[error.result] = stats.errors.get(error.result, 0) + 1
+                    self._record(stats, elapsed)
+                raise
+            elapsed = perf_counter_ns() - start
+            with lock:
+                self._record(stats, elapsed)
+            return result
+
+        call.__name__ = name
+        return call
+
+    @staticmethod
+    def _record(stats: _FunctionStats, elapsed: int):
+        stats.calls += 1
+        stats.total_ns += elapsed
+        if elapsed > stats.max_ns:
+            stats.max_ns = elapsed
+        stats.histogram[_bucket(elapsed)] += 1
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = _FunctionStats()
+                setattr(self, name, self._wrap(name, getattr(self.backend, name), self._stats[name]))
+
+    def snapshot(self) -> dict:
+        """
+        :return: je aufgerufener Funktion calls, errors (Fehlercode: Anzahl), total_ns, mean_ns, max_ns, p50_ns, p90_ns
+                 und p99_ns
+        """
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                if stats.calls == 0:
+                    continue
+                result[name] = {
+                    "calls": stats.calls,
+                    "errors": dict(stats.errors),
+                    "total_ns": stats.total_ns,
+                    "mean_ns": stats.total_ns // stats.calls,
+                    "max_ns": stats.max_ns,
+                    "p50_ns": stats.percentile(0.5),
+                    "p90_ns": stats.percentile(0.9),
+                    "p99_ns": stats.percentile(0.99),
+                }
+            return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        :return: Messwerte im Textformat von Prometheus, Histogrammgrenzen sind die Zweierpotenzen in ns
+        """
+        lines = ["# TYPE libximc_calls_total counter",
+                 "# TYPE libximc_errors_total counter",
+                 "# TYPE libximc_call_duration_seconds histogram"]
+        with self._lock:
+            for name, stats in self._stats.items():
+                if stats.calls == 0:
+                    continue
+                label = f'function="{name}"'
+                lines.append(f"libximc_calls_total{{{label}}} {stats.calls}")
+                for code, count in sorted(stats.errors.items()):
+                    lines.append(f'libximc_errors_total{{{label},code="{code}"}} {count}')
+                cumulative = 0
+                for exponent in range(64):
+                    first, last = exponent * _SUB_BUCKETS, (exponent + 1) * _SUB_BUCKETS
+                    if first >= _BUCKETS or _bucket_bounds(first)[0] > stats.max_ns:
+                        break
+                    cumulative += sum(stats.histogram[first:last])
+                    upper = _bucket_bounds(last - 1)[1]
+                    lines.append(f'libximc_call_duration_seconds_bucket{{{label},le="{upper / 1e9:g}"}} {cumulative}')
+                lines.append(f'libximc_call_duration_seconds_bucket{{{label},le="+Inf"}} {stats.calls}')
+                lines.append(f"libximc_call_duration_seconds_sum{{{label}}} {stats.total_ns / 1e9:g}")
+                lines.append(f"libximc_call_duration_seconds_count{{{label}}} {stats.calls}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+
+
+class MoveResult(NamedTuple):
+    position: float  # Endposition in Benutzereinheiten
+    stopped_at: float  # time.monotonic() der Abfrage, bei der die Achse stand
+
+
+class _Watch:
+    def __init__(self, axis: Standa, future: Future, timeout: float = None):
+        self.axis = axis
+        self.future = future
+        self.status = status_t()
+        self.next_poll = time.monotonic()
+        self.deadline = None if timeout is None else self.next_poll + timeout
+
+
+class MotionSupervisor:
+    """
+    Überwacht laufende Bewegungen beliebig vieler Achsen in einem einzigen Thread. Jede Achse wird mit get_status
+    abgefragt, sobald ihr nächster Abfragezeitpunkt (Standa.next_poll_interval) erreicht ist. Steht die Achse, wird ihr
+    Future mit einem MoveResult erfüllt, Callbacks hängen über Future.add_done_callback daran. Steht sie nach Ablauf
+    des Timeouts noch nicht, wird sie gestoppt und das Future endet mit TimeoutError.
+    """
+
+    def __init__(self):
+        self._watches = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def watch(self, axis: Standa, callback=None, timeout: float = None) -> Future:
+        """
+        Überwacht eine bereits gestartete Bewegung
+        :param axis: Achse
+        :param callback: wird mit dem Future aufgerufen, sobald die Achse steht
+        :param timeout: maximale Dauer in s, z.B. aus Standa.move_timeout; None überwacht unbegrenzt
+        :return: Future mit MoveResult, bei Fehlern mit XimcError, nach Ablauf des Timeouts mit TimeoutError
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        if callback is not None:
+            future.add_done_callback(callback)
+        with self._condition:
+            self._watches.append(_Watch(axis, future, timeout))
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="MotionSupervisor", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def move_absolut(self, axis: Standa, position: float, callback=None, timeout: float = None) -> Future:
+        """
+        Startet eine absolute Bewegung und kehrt sofort zurück
+        :param timeout: siehe watch
+        :return: Future mit MoveResult
+        """
+        if not axis.move_towards(position):
+            future = Future()
+            future.set_exception(XimcError(axis._last_error, "command_move"))
+            if callback is not None:
+                future.add_done_callback(callback)
+            return future
+        return self.watch(axis, callback, timeout)
+
+    def shutdown(self):
+        """
+        Beendet die Überwachung; Futures noch laufender Bewegungen enden mit RuntimeError, die Achsen fahren weiter
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._condition:
+            watches, self._watches = self._watches, []
+        for watch in watches:
+            watch.future.set_exception(RuntimeError(f"Überwachung von Achse {watch.axis.handle} beendet"))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._watches:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                now = time.monotonic()
+                due = [watch for watch in self._watches if watch.next_poll <= now]
+                if not due:
+                    self._condition.wait(min(watch.next_poll for watch in self._watches) - now)
+                    continue
+
+            finished = []
+            for watch in due:
+                if watch.axis.get_status(watch.status) is None:
+                    finished.append((watch, XimcError(watch.axis._last_error, "get_status")))
+                elif not Standa.is_moving(watch.status):
+                    stopped_at = time.monotonic()
+                    watch.axis.record_stop(watch.status, stopped_at)
+                    finished.append((watch, MoveResult(watch.axis.status_position(watch.status), stopped_at)))
+                elif watch.deadline is not None and time.monotonic() >= watch.deadline:
+                    watch.axis.stop()
+                    finished.append((watch, TimeoutError(f"Achse {watch.axis.handle} steht nach Ablauf des Timeouts "
+                                                         f"noch nicht")))
+                else:
+                    watch.next_poll = time.monotonic() + watch.axis.next_poll_interval(watch.status)
+                    if watch.deadline is not None:
+                        watch.next_poll = min(watch.next_poll, watch.deadline)
+
+            with self._condition:
+                for watch, _ in finished:
+                    self._watches.remove(watch)
+            for watch, outcome in finished:
+                if isinstance(outcome, Exception):
+                    watch.future.set_exception(outcome)
+                else:
+                    watch.future.set_result(outcome)
+
+
+_default_supervisor = None
+_default_supervisor_lock = threading.Lock()
+
+
+def get_motion_supervisor() -> MotionSupervisor:
+    """
+    :return: gemeinsamer MotionSupervisor des Prozesses
+    """
+    global _default_supervisor
+    with _default_supervisor_lock:
+        if _default_supervisor is None:
+            _default_supervisor = MotionSupervisor()
+        return _default_supervisor
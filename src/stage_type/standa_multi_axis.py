@@ -0,0 +1,158 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.stage_type.STANDA_bindings import Result
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_axes import AxisTable
+from src.stage_type.standa_config import default_config_path, load_stage_configs
+from src.stage_type.standa_motion import get_motion_supervisor
+from src.stage_type.standa_registry import DeviceRegistry
+
+
+class StandaMultiAxis:
+    """
+    Stage aus beliebig vielen Standa-Achsen, beschrieben durch ihre Einstellungen (siehe load_stage_configs). Die
+    Achsen haben die Nummern 1, 2, ... in der Reihenfolge der Einstellungen und sind zusätzlich über ihren Namen
+    erreichbar. Geöffnet werden nur die konfigurierten Seriennummern; mit uri in allen Achsen ganz ohne Enumeration.
+    """
+
+    def __init__(self, stage_name: str, axes_settings, device_registry: DeviceRegistry = None):
+        """
+        :param stage_name: Name der Stage, unter dem die Seriennummern in device_registry gespeichert werden
+        :param axes_settings: Einstellungen je Achse in Achsenreihenfolge, siehe axis_settings
+        :param device_registry: Cache der Geräte-URIs, Standard ist die Datei aus default_registry_path
+        """
+        self.stage_name = stage_name
+        self._axes_settings = tuple(axes_settings)
+        self.axes = AxisTable()  # nach open_connection: Nummer bzw. Name -> Standa
+        self.settings_report = {}  # nach open_connection: Nummer -> geschriebene/übersprungene Einstellungen
+
+        self._decimals = 5
+        self.device_registry = device_registry or DeviceRegistry()
+
+    @classmethod
+    def from_config(cls, stage_name: str, path=None, device_registry: DeviceRegistry = None) -> "StandaMultiAxis":
+        """
+        :param path: Konfigurationsdatei, Standard siehe default_config_path
+        :raise ValueError: wenn die Stage nicht konfiguriert ist
+        """
+        configs = load_stage_configs(path)
+        if stage_name not in configs:
+            raise ValueError(f"Stage {stage_name} is not configured in {path or default_config_path()}")
+        return cls(stage_name, configs[stage_name], device_registry)
+
+    def _seed_registry(self):
+        """Trägt die konfigurierten URIs ein, damit open_axes sie direkt öffnet"""
+        serials = [settings["serial"] for settings in self._axes_settings]
+        uris = [settings.get("uri") for settings in self._axes_settings]
+        if all(serials) and all(uris):
+            self.device_registry.devices.update(zip(serials, uris))
+            self.device_registry.stages[self.stage_name] = serials
+
+    def open_connection(self):
+        """Öffnet alle Achsen, zuerst über die konfigurierten bzw. gespeicherten URIs, sonst über eine vollständige
+        Enumeration. Die Dauer beider Wege steht danach in device_registry.last_timing. Die Einstellungen werden auf
+        allen Achsen gleichzeitig gesetzt, geschrieben wird nur, was am Controller abweicht (siehe settings_report).
+        """
+        self._seed_registry()
+        axes = self.device_registry.open_axes(self.stage_name, [settings["serial"] for settings in self._axes_settings])
+        if axes is None:  # gerät nicht gefunden
+            print("Gerät wurde nicht gefunden! Überprüfe, ob angeschlossen!")
+            return False
+        else:  # gerät gefunden
+            try:
+                self.axes.clear()
+                for axis, settings in zip(axes, self._axes_settings):
+                    self.axes.add(axis, settings.get("name"))
+                print("Handles:", [axis.handle for axis in axes])
+
+                with ThreadPoolExecutor(max_workers=len(axes)) as executor:
+                    reports = list(executor.map(Standa.set_default_settings, axes, self._axes_settings))
+                self.settings_report = dict(zip(self.axes, reports))
+                return True
+            except Exception as e:
+                self.close_connection()
+                print(f"Es konnten nicht alle Achsen gefunden werden!\n"
+                      f"Gefundene Handles: {[axis.handle for axis in axes]}\n"
+                      f"Fehler: {e}")
+
+    def close_connection(self):
+        if not self.axes:
+            return False
+        try:
+            for axis in self.axes.values():
+                axis.close_connection()
+            return True
+        except Exception as e:
+            return False
+
+    def set_home(self):
+        for axis in self.axes.values():
+            axis.set_home()
+
+    def go_home(self) -> dict:
+        """
+        Fährt alle Achsen gleichzeitig in ihre Nullposition
+        :return: Ergebnis je Achse, siehe move_absolut_many
+        """
+        return self.move_absolut_many({axis: 0.0 for axis in self.axes})
+
+    def get_angle(self, axis):
+        """
+        :param axis: Achsennummer (1, 2, ...) oder Name ("Roll", "Nick")
+        """
+        return round(self.axes[axis].get_position_cached(), self._decimals)
+
+    def get_angles(self) -> dict:
+        """
+        Winkel aller Achsen in einem Aufruf
+        :return: Winkel je Achsennummer, in Achsenreihenfolge
+        """
+        decimals = self._decimals
+        return {axis_id: round(axis.get_position_cached(), decimals) for axis_id, axis in self.axes.items()}
+
+    def move_absolut(self, axis, position: float):
+        self.axes[axis].move_absolut(position)
+
+    def move_absolut_many(self, positions: dict) -> dict:
+        """
+        Fährt mehrere Achsen gleichzeitig auf absolute Positionen. Zuerst bekommt jede Achse ihren Fahrbefehl, danach
+        überwacht ein Thread des MotionSupervisor alle zusammen: der Aufruf dauert so lange wie die langsamste Achse
+        statt der Summe aller Bewegungen. Sobald das Bewegungsmodell einer Achse ihre Fahrzeiten gelernt hat, endet die
+        Überwachung dieser Achse nach Standa.move_timeout mit einem Fehler, statt unbegrenzt zu warten.
+        :param positions: Zielposition je Achsennummer oder Name, z.B. {1: 10.0, 2: -5.0} oder {"Roll": 10.0}
+        :return: je Achse ein dict mit "result" (True, wenn Befehl und Warten erfolgreich waren), "error" (letzter
+                 Result-Code der libximc), "position" (Endposition, None bei Fehler) und "time" (s vom Senden der
+                 Befehle, bis die Achse stehend gesehen wurde)
+        """
+        supervisor = get_motion_supervisor()
+        start = time.monotonic()
+        futures = {}
+        for axis, position in positions.items():
+            stage_axis = self._get_axis(axis)
+            futures[axis] = supervisor.move_absolut(stage_axis, position, timeout=stage_axis.move_timeout(position))
+
+        results = {}
+        for axis, future in futures.items():
+            error = future.exception()
+            if error is None:
+                move = future.result()
+                results[axis] = {"result": True, "error": Result.Ok, "position": move.position,
+                                 "time": move.stopped_at - start}
+            else:
+                results[axis] = {"result": False, "error": getattr(error, "result", Result.Error), "position": None,
+                                 "time": time.monotonic() - start}
+        return results
+
+    def move_relative(self, axis, position: float):
+        self.axes[axis].move_relative(position)
+
+    def move_towards(self, axis, position: float):
+        self.axes[axis].move_towards(position)
+
+    def _get_axis(self, axis) -> Standa:
+        return self.axes[axis]
+
+    def stop_movement(self):
+        for axis in self.axes.values():
+            axis.stop()
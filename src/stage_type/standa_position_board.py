@@ -0,0 +1,272 @@
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.standa_multi_axis import StandaMultiAxis
+
+default_board_name = "api_angle_stage_positions"
+_MAGIC = 0x53544742  # "BGTS", kennzeichnet eine Positionstafel
+_SPIN_ATTEMPTS = 100  # Wiederholungen von PositionBoard.read, bevor der Leser die CPU abgibt
+
+# Kopf der Tafel: sequence ist der Zähler des Seqlocks, ungerade während der Schreiber schreibt; owner ist die pid des
+# Publishers, solange er die Tafel besitzt
+board_header_dtype = np.dtype([("sequence", "<u8"), ("magic", "<u4"), ("axes", "<u4"), ("owner", "<u4"),
+                               ("reserved", "<u4")])
+# ein Eintrag je Achse, alle Felder 8-Byte-ausgerichtet
+board_axis_dtype = np.dtype([
+    ("axis", "<i4"),  # Nummer der Achse in der Stage
+    ("move_state", "<u4"),  # MoveSts aus status_t
+    ("t_ns", "<i8"),  # time.monotonic_ns() der Abfrage
+    ("position", "<f8"),  # Benutzereinheiten
+    ("speed", "<f8"),  # Benutzereinheiten/s
+    ("updates", "<u8"),  # Anzahl der Aktualisierungen dieser Achse
+])
+
+
+def _board_arrays(buffer, axes: int) -> tuple:
+    header = np.ndarray(1, dtype=board_header_dtype, buffer=buffer)
+    records = np.ndarray(axes, dtype=board_axis_dtype, buffer=buffer, offset=board_header_dtype.itemsize)
+    return header, records
+
+
+class PositionBoardPublisher:
+    """
+    Veröffentlicht Position, Geschwindigkeit und Bewegungszustand aller Achsen einer Stage in einem Shared-Memory-Block
+    (multiprocessing.shared_memory), den beliebig viele Prozesse mit PositionBoard lesen, ohne Aufruf beim Besitzer der
+    Geräte und ohne Systemaufruf je Lesezugriff.
+
+    Ein eigener Thread fragt alle Achsen mit fester Rate über get_status ab und schreibt die Einträge als Seqlock:
+    sequence wird vor dem Schreiben ungerade und danach wieder gerade. Ein Leser kopiert die Einträge und prüft, dass
+    sequence vorher und nachher gleich und gerade war, sonst liest er erneut. Das setzt voraus, dass Schreibzugriffe
+    in Programmreihenfolge sichtbar werden, wie auf x86; der Schreiber hält keine Sperre, die Leser aufhalten könnte.
+    """
+
+    def __init__(self, stage: StandaMultiAxis, name: str = default_board_name, rate: float = 200.0):
+        """
+        :param stage: verbundene Stage
+        :param name: Name des Shared-Memory-Blocks, unter dem PositionBoard ihn öffnet
+        :param rate: Aktualisierungen pro Sekunde
+        :raise FileExistsError: wenn der Prozess, der die Tafel angelegt hat, noch läuft
+        """
+        self.stage = stage
+        self.name = name
+        self.rate = rate
+        self.errors = 0  # fehlgeschlagene get_status-Aufrufe
+        axes = len(stage.axes)
+        size = board_header_dtype.itemsize + axes * board_axis_dtype.itemsize
+        try:
+            self._memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            _remove_stale_board(name)  # Tafel eines abgestürzten Besitzers
+            self._memory = shared_memory.SharedMemory(name, create=True, size=size)
+        _untrack(self._memory)
+        self._header, self._records = _board_arrays(self._memory.buf, axes)
+        self._header["owner"] = os.getpid()
+        self._header["magic"] = _MAGIC
+        self._header["axes"] = axes
+        self._records["axis"] = list(stage.axes)
+        self._sequence = self._header["sequence"]
+        self._next = np.zeros(axes, dtype=board_axis_dtype)
+        self._next["axis"] = list(stage.axes)
+        self._statuses = [status_t() for _ in range(axes)]
+        self._thread = None
+        self._running = False
+
+    def start(self) -> "PositionBoardPublisher":
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="PositionBoardPublisher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Beendet die Aktualisierung und gibt den Block frei; geöffnete PositionBoard lesen danach nur den letzten
+        Stand."""
+        self.stop()
+        self._header["owner"] = 0
+        self._header = self._records = self._sequence = None
+        self._memory.close()
+        _track(self._memory)  # unlink meldet den Block beim resource_tracker ab
+        self._memory.unlink()
+
+    def publish(self):
+        """Liest alle Achsen einmal und schreibt sie in die Tafel"""
+        records = self._next
+        for index, (axis, status) in enumerate(zip(self.stage.axes.values(), self._statuses)):
+            before = time.monotonic_ns()
+            if axis.get_status(status) is None:
+                self.errors += 1
+                continue
+            records["t_ns"][index] = (before + time.monotonic_ns()) // 2
+            fraction = axis._microstep_fraction()
+            records["position"][index] = axis.status_position(status)
+            records["speed"][index] = axis.calibration_t.A * (status.CurSpeed + status.uCurSpeed / fraction)
+            records["move_state"][index] = status.MoveSts
+            records["updates"][index] += 1
+
+        sequence = self._sequence
+        sequence += 1  # ungerade: Leser verwerfen, was sie ab hier kopieren
+        self._records[:] = records
+        sequence += 1
+
+    def _run(self):
+        interval = 1 / self.rate
+        next_time = time.monotonic()
+        while self._running:
+            self.publish()
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()  # zu langsam: Rate nicht nachholen
+
+
+class PositionBoard:
+    """
+    Leser einer Tafel von PositionBoardPublisher, auch in anderen Prozessen. Jeder Lesezugriff kopiert die Einträge
+    aus dem Shared Memory und wiederholt das, falls der Schreiber gerade geschrieben hat (Seqlock).
+    """
+
+    def __init__(self, name: str = default_board_name, timeout: float = 1.0):
+        """
+        :param timeout: längste Zeit in s, die read auf ein Ende des Schreibens wartet
+        :raise FileNotFoundError: wenn kein Publisher die Tafel angelegt hat
+        :raise ValueError: wenn der Block keine Positionstafel ist
+        """
+        self._memory = _attach(name)
+        header = np.ndarray(1, dtype=board_header_dtype, buffer=self._memory.buf)
+        if header["magic"][0] != _MAGIC:
+            self._memory.close()
+            raise ValueError(f"Shared memory {name} is not a position board")
+        self._header, self._records = _board_arrays(self._memory.buf, int(header["axes"][0]))
+        self._sequence = self._header["sequence"]
+        self.timeout = timeout
+        self.retries = 0  # wegen gleichzeitigen Schreibens wiederholte Lesezugriffe
+
+    def read(self) -> tuple:
+        """
+        Ein Schreibvorgang dauert nur Mikrosekunden: die ersten Wiederholungen folgen sofort, danach gibt der Leser
+        zwischen zwei Versuchen die CPU ab.
+        :return: (sequence, Kopie der Einträge als board_axis_dtype-Array) aus genau einer Aktualisierung
+        :raise TimeoutError: wenn sequence länger als timeout ungerade bleibt oder sich ständig ändert, z.B. weil der
+                             Publisher mitten im Schreiben beendet wurde
+        """
+        sequence, records = self._sequence, self._records
+        attempts = 0
+        deadline = None
+        while True:
+            before = int(sequence[0])
+            if not before & 1:
+                snapshot = records.copy()
+                if int(sequence[0]) == before:
+                    return before, snapshot
+            self.retries += 1
+            attempts += 1
+            if attempts >= _SPIN_ATTEMPTS:
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + self.timeout
+                elif now > deadline:
+                    raise TimeoutError(f"Position board sequence stuck at {before}, publisher died while writing?")
+                time.sleep(0)
+
+    def get_angles(self) -> dict:
+        """
+        :return: Position je Achsennummer
+        """
+        _, records = self.read()
+        return dict(zip(records["axis"].tolist(), records["position"].tolist()))
+
+    def get_angle(self, axis: int) -> float:
+        _, records = self.read()
+        index = np.flatnonzero(records["axis"] == axis)
+        if len(index) == 0:
+            raise ValueError(f"Axis {axis} does not exist!")
+        return float(records["position"][index[0]])
+
+    def staleness(self, records: np.ndarray = None) -> np.ndarray:
+        """
+        :return: Alter der Einträge in s je Achse
+        """
+        if records is None:
+            _, records = self.read()
+        return (time.monotonic_ns() - records["t_ns"]) / 1e9
+
+    def close(self):
+        self._header = self._records = self._sequence = None
+        self._memory.close()
+
+
+# Unter POSIX meldet SharedMemory jeden geöffneten Block beim resource_tracker an, der ihn beim Ende des Prozesses
+# löscht, auch wenn ein anderer Prozess ihn angelegt hat. Die Tafel soll aber nur der Publisher mit close freigeben:
+# Publisher und Leser melden den Block deshalb gleich wieder ab, Leser im selben resource_tracker wie der Publisher
+# (Kindprozesse von multiprocessing) heben sich so gegenseitig auf. Bleibt die Tafel nach einem Absturz liegen, legt
+# der nächste Publisher sie neu an.
+
+
+def _untrack(memory: shared_memory.SharedMemory):
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(memory._name, "shared_memory")
+
+
+def _track(memory: shared_memory.SharedMemory):
+    if os.name == "posix":
+        from multiprocessing import resource_tracker
+        resource_tracker.register(memory._name, "shared_memory")
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name != "posix":
+        return True  # unter Windows existiert der Block nur, solange ihn ein Prozess geöffnet hat
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Prozess eines anderen Benutzers
+    return True
+
+
+def _remove_stale_board(name: str):
+    """
+    Gibt den Block name frei, wenn sein Besitzer nicht mehr läuft
+    :raise FileExistsError: wenn der Block einem laufenden Publisher oder keiner Positionstafel gehört
+    """
+    stale = _attach(name)
+    try:
+        if stale.size < board_header_dtype.itemsize:
+            owner = magic = 0
+        else:
+            header = np.ndarray(1, dtype=board_header_dtype, buffer=stale.buf)
+            owner, magic = int(header["owner"][0]), int(header["magic"][0])
+            del header
+        if magic not in (0, _MAGIC):
+            raise FileExistsError(f"Shared memory {name} exists and is not a position board")
+        if owner and _process_alive(owner):
+            raise FileExistsError(f"Position board {name} is published by running process {owner}")
+    finally:
+        stale.close()
+    _track(stale)
+    stale.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Öffnet einen bestehenden Block, ohne dass der resource_tracker des Lesers ihn beim Beenden löscht"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # ab Python 3.13
+    except TypeError:
+        memory = shared_memory.SharedMemory(name)
+    _untrack(memory)
+    return memory
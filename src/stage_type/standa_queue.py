@@ -0,0 +1,268 @@
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_motion import MoveResult
+
+
+class _QueuedMove:
+    def __init__(self, sequence: int, target: float, generation: int):
+        self.sequence = sequence
+        self.target = target
+        self.generation = generation  # Stand von flush beim Einstellen, ältere Bewegungen werden nicht mehr gesendet
+        self.future = Future()
+        self.cancelled = False  # mit command_sstp abgebrochen
+
+
+class MotionQueue:
+    """
+    Warteschlange von Bewegungen einer Achse. Python stellt Ziele mit enqueue ein und arbeitet sofort weiter, ein
+    eigener Thread schickt sie mit command_move an den Controller. Relative Ziele werden lokal auf das zuletzt
+    eingestellte Ziel addiert, dafür ist kein get_position_calb nötig.
+
+    Der Controller selbst kann keine Bewegungen puffern: ein neues command_move ersetzt das laufende Ziel, und
+    CmdBufFreeSpace aus status_t ist laut Handbuch der Puffer der Synchronisationskette, nicht der Bewegungsbefehle.
+    Die Warteschlange liegt deshalb im Host, ihre Tiefe (depth) begrenzt, wie weit Python vorausplanen kann.
+
+    Liegt das nächste Ziel in derselben Richtung hinter dem laufenden, wird es gesendet, sobald der Controller das
+    vorige angenommen hat: die Achse fährt ohne Halt weiter und passiert dabei das alte Ziel. Nur bei einer Umkehr
+    der Richtung (oder gleichem Ziel) wartet der Thread, bis die Achse steht, sonst würde das alte Ziel nie erreicht.
+    Welche Bewegung gerade läuft, ergibt sich aus der Position im Status: ein Future wird erfüllt, sobald die Achse
+    sein Ziel passiert hat, das zuletzt gesendete, sobald sie steht.
+    """
+
+    def __init__(self, axis: Standa, depth: int = 16):
+        """
+        :param axis: verbundene Achse
+        :param depth: maximale Anzahl wartender Bewegungen, danach blockiert enqueue (Backpressure)
+        """
+        self.axis = axis
+        self.depth = depth
+        self.completed = 0  # Anzahl beendeter Bewegungen
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(depth)  # freie Plätze, begrenzt die Tiefe ohne gehaltene Sperre
+        self._lock = threading.Lock()
+        self._dispatch_lock = threading.RLock()  # gehalten, während der Thread sendet und während flush/cancel
+        self._generation = 0  # zählt flush-Aufrufe
+        self._sequence = 0
+        self._last_target = None  # Ziel der zuletzt eingestellten Bewegung, Basis für relative Ziele
+        self._inflight = []  # gesendete Bewegungen, deren Ziel noch nicht erreicht ist, alle in derselben Richtung
+        self._direction = 0.0
+        self._unfinished = 0  # eingestellte, noch nicht beendete oder verworfene Bewegungen
+        self._idle = threading.Condition(self._lock)
+        self._status = status_t()
+        self._thread = threading.Thread(target=self._run, name=f"MotionQueue-{axis.handle}", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, target: float, relative: bool = False, timeout: float = None) -> Future:
+        """
+        Stellt eine Bewegung ein
+        :param target: Ziel in Benutzereinheiten
+        :param relative: target ist eine Strecke ab dem zuletzt eingestellten Ziel
+        :param timeout: maximale Wartezeit in s auf einen freien Platz, None wartet unbegrenzt
+        :return: Future mit MoveResult, sobald die Achse am Ziel steht
+        :raise queue.Full: nach Ablauf von timeout ohne freien Platz
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise queue.Full
+        try:
+            # Generation lesen und einstellen unter einer Sperre: ein flush dazwischen ist nicht möglich
+            with self._lock:
+                if relative:
+                    target += self._base_position()
+                self._sequence += 1
+                self._unfinished += 1
+                move = _QueuedMove(self._sequence, target, self._generation)
+                self._queue.put_nowait(move)
+                self._last_target = target
+        except BaseException:
+            self._slots.release()
+            raise
+        return move.future
+
+    def move_relative(self, value: float, timeout: float = None) -> Future:
+        return self.enqueue(value, relative=True, timeout=timeout)
+
+    def _base_position(self) -> float:
+        if self._last_target is not None:
+            return self._last_target
+        return self._axis_position()
+
+    def _axis_position(self) -> float:
+        """
+        Ziel oder Position der Achse ohne Bewegungen aus der Warteschlange, siehe Standa._relative_base; nur wenn beides
+        unbekannt ist, wird die Position gelesen
+        :raise XimcError: wenn das Lesen fehlschlägt
+        """
+        axis = self.axis
+        base = axis._relative_base(axis.step_converter())
+        if base is not None:
+            return base
+        result, position = axis._read_position()
+        if result != Result.Ok:
+            raise XimcError(result, "get_position")
+        return position
+
+    @property
+    def active(self):
+        """
+        :return: (laufende Nummer, Ziel) der Bewegung, die gerade ausgeführt wird, oder None
+        """
+        inflight = self._inflight
+        move = inflight[0] if inflight else None
+        return None if move is None else (move.sequence, move.target)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> int:
+        """
+        Verwirft alle noch nicht gesendeten Bewegungen, die schon gesendeten Ziele werden noch angefahren. Nach der
+        Rückkehr sendet der Thread keine der verworfenen Bewegungen mehr.
+        :return: Anzahl verworfener Bewegungen
+        """
+        cancelled = 0
+        with self._dispatch_lock, self._lock:
+            self._generation += 1  # auch eine schon entnommene, noch nicht gesendete Bewegung verfällt
+            while True:
+                try:
+                    move = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if move is not None:
+                    self._slots.release()
+                    move.future.cancel()
+                    cancelled += 1
+            self._last_target = self._inflight[-1].target if self._inflight else None
+            self._unfinished -= cancelled
+            self._idle.notify_all()
+        return cancelled
+
+    def cancel(self) -> int:
+        """
+        Verwirft alle wartenden Bewegungen und bremst die laufenden mit command_sstp ab, deren Futures enden mit
+        CancelledError
+        :return: Anzahl verworfener Bewegungen, ohne die abgebrochenen
+        """
+        with self._dispatch_lock:
+            cancelled = self.flush()
+            with self._lock:
+                inflight = list(self._inflight)
+                self._last_target = None
+            if inflight:
+                for move in inflight:
+                    move.cancelled = True
+                self.axis.stop()
+        return cancelled
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        Wartet, bis alle eingestellten Bewegungen beendet sind
+        :return: False nach Ablauf von timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def close(self):
+        """Bricht alle Bewegungen ab und beendet den Thread"""
+        self.cancel()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        axis, status = self.axis, self._status
+        while True:
+            if self._inflight:
+                try:
+                    move = self._queue.get(timeout=axis.next_poll_interval(status))
+                except queue.Empty:
+                    self._poll()
+                    continue
+            else:
+                move = self._queue.get()
+            if move is None:
+                self._wait_idle(lambda: not self._inflight)
+                return
+            self._slots.release()
+            self._wait_idle(lambda: self._accepts(move.target))  # Barriere: Umkehr erst, wenn die Achse steht
+            self._send(move)
+
+    def _wait_idle(self, ready):
+        while not ready():
+            self._poll()
+            if not ready():
+                time.sleep(self.axis.next_poll_interval(self._status))
+
+    def _accepts(self, target: float) -> bool:
+        """
+        Darf target jetzt gesendet werden? Ja, wenn nichts läuft oder die Achse in derselben Richtung weiterfährt
+        """
+        with self._lock:
+            if not self._inflight:
+                return True
+            return (target - self._inflight[-1].target) * self._direction > 0
+
+    def _send(self, move: _QueuedMove):
+        axis = self.axis
+        with self._dispatch_lock:
+            if move.generation != self._generation or not move.future.set_running_or_notify_cancel():
+                move.future.cancel()
+                self._finished()  # mit flush verworfen oder vom Aufrufer über das Future abgebrochen
+                return
+            if self._inflight:
+                direction = self._direction
+            else:
+                try:
+                    direction = move.target - self._axis_position()
+                except XimcError as error:
+                    self._resolve(move, error)  # ohne Richtung kein Urteil, ob das nächste Ziel warten muss
+                    return
+            if not axis.move_towards(move.target, set_direction=False):
+                self._resolve(move, XimcError(axis._last_error, "command_move"))
+                return
+            with self._lock:
+                self._inflight.append(move)
+                self._direction = direction
+
+    def _poll(self):
+        """Eine get_status-Abfrage: erfüllt die Futures aller passierten Ziele, bei Stillstand alle gesendeten"""
+        axis, status = self.axis, self._status
+        if axis.get_status(status) is None:
+            self._resolve_all(lambda move: XimcError(axis._last_error, "get_status"))
+            return
+        now = time.monotonic()
+        position = axis.status_position(status)
+        if not axis.is_moving(status):
+            axis.record_stop(status)
+            self._resolve_all(lambda move: CancelledError() if move.cancelled else MoveResult(position, now))
+            return
+        with self._lock:
+            passed = []
+            while len(self._inflight) > 1 and (position - self._inflight[0].target) * self._direction >= 0:
+                passed.append(self._inflight.pop(0))
+        for move in passed:
+            self._resolve(move, MoveResult(position, now))
+
+    def _resolve_all(self, outcome):
+        with self._lock:
+            moves, self._inflight = self._inflight, []
+        for move in moves:
+            self._resolve(move, outcome(move))
+
+    def _resolve(self, move: _QueuedMove, outcome):
+        with self._lock:
+            self.completed += 1
+        self._finished()
+        if isinstance(outcome, Exception):
+            move.future.set_exception(outcome)
+        else:
+            move.future.set_result(outcome)
+
+    def _finished(self):
+        with self._lock:
+            self._unfinished -= 1
+            self._idle.notify_all()
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from src.stage_type.Standa import Standa
+
+
+def default_registry_path() -> Path:
+    return Path.home() / ".api_angle_stage" / "standa_devices.json"
+
+
+class DeviceRegistry:
+    """
+    Persistenter Cache Seriennummer -> Geräte-URI (JSON). Beim Öffnen werden zuerst die gespeicherten URIs direkt mit
+    open_device geöffnet; nur wenn ein Gerät fehlt oder eine andere Seriennummer meldet, wird wie bisher über alle
+    COM-Ports enumeriert. Die Dauer beider Wege steht nach jedem open_axes in last_timing.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Pfad der JSON-Datei, Standard siehe default_registry_path
+        """
+        self.path = Path(path) if path else default_registry_path()
+        self.devices = {}  # Seriennummer -> URI
+        self.stages = {}  # Stage-Name -> Seriennummern der Achsen in Achsenreihenfolge
+        self.last_timing = {"cached": None, "enumeration": None}
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        self.devices = data.get("devices", {})
+        self.stages = data.get("stages", {})
+
+    def save(self):
+        data = {"devices": self.devices, "stages": self.stages}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=2))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Geräte-Cache konnte nicht gespeichert werden: {e}")
+
+    def open_axes(self, stage_name: str, serials: list):
+        """
+        Öffnet alle Achsen einer Stage.
+        :param stage_name: Name der Stage, unter dem die aufgelösten Seriennummern gespeichert werden
+        :param serials: Seriennummern in Achsenreihenfolge; None steht für "irgendein weiteres gefundenes Gerät"
+        :return: Liste der Standa-Achsen in Reihenfolge von serials oder None, wenn nicht alle gefunden wurden
+        """
+        self.last_timing = {"cached": None, "enumeration": None}
+        cached_serials = self.stages.get(stage_name)
+        if cached_serials and len(cached_serials) == len(serials) \
+                and all(wanted in (None, cached) for wanted, cached in zip(serials, cached_serials)):
+            start = time.perf_counter()
+            axes = self._open_cached(cached_serials)
+            self.last_timing["cached"] = time.perf_counter() - start
+            if axes is not None:
+                return axes
+
+        start = time.perf_counter()
+        axes = self._open_enumerated(serials)
+        self.last_timing["enumeration"] = time.perf_counter() - start
+        if axes is not None:
+            self.stages[stage_name] = [axis.get_serial_number() for axis in axes]
+            self.save()
+        return axes
+
+    def _open_cached(self, serials: list):
+        axes = []
+        for serial in serials:
+            uri = self.devices.get(serial)
+            handle = Standa.open_device(uri.encode()) if uri else None
+            axis = Standa(handle) if handle is not None else None
+            if axis is None or axis.get_serial_number() != serial:
+                if axis is not None:
+                    axis.close_connection()
+                for opened in axes:
+                    opened.close_connection()
+                return None
+            axes.append(axis)
+        return axes
+
+    def _open_enumerated(self, serials: list):
+        found = {}
+        for uri in Standa.get_device_uris():
+            handle = Standa.open_device(uri)
+            if handle is None:
+                continue
+            axis = Standa(handle)
+            serial = axis.get_serial_number()
+            if serial is None:
+                axis.close_connection()
+                continue
+            self.devices[serial] = uri.decode()
+            found[serial] = axis
+
+        axes = [found.pop(serial, None) if serial is not None else None for serial in serials]
+        for index, serial in enumerate(serials):
+            if serial is None and found:
+                axes[index] = found.pop(next(iter(found)))
+        for unused in found.values():
+            unused.close_connection()
+
+        if any(axis is None for axis in axes):
+            for axis in axes:
+                if axis is not None:
+                    axis.close_connection()
+            return None
+        return axes
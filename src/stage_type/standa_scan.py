@@ -0,0 +1,170 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+from src.stage_type.standa_two_axes import StandaTwoAxes
+
+
+def scan_dtype(n_axes: int = 2) -> np.dtype:
+    """Record of one executed scan point: commanded and achieved position per axis and monotonic timestamps."""
+    return np.dtype([
+        ("commanded", np.float64, (n_axes,)),
+        ("achieved", np.float64, (n_axes,)),
+        ("t_command", np.float64),  # time.monotonic() when the first command of the point was sent
+        ("t_settled", np.float64),  # time.monotonic() when all axes were seen standing
+        ("ok", np.bool_),
+    ])
+
+
+class ScanResult(NamedTuple):
+    points: np.ndarray  # structured array, see scan_dtype
+    elapsed: float  # seconds for the whole scan
+
+    @property
+    def points_per_second(self) -> float:
+        return len(self.points) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class ScanExecutor:
+    """Executes a trajectory of target points on a StandaTwoAxes.
+
+    Every axis has its own command thread, so the round trips to both controllers and both moves run at the same time.
+    An axis whose target does not change between two points gets no command at all (e.g. Nick along a raster row).
+    The status poll that detects the end of a move also provides the achieved position, so there is no extra position
+    read per point. Each point sends command_move_calb; with preconvert=True all targets of an axis are converted to
+    integer (step, mstep) once before the scan (see StepConverter.to_steps) and each point sends command_move instead.
+    The integer command measured no faster than command_move_calb (benchmarks/bench_step_conversion.py), so this is
+    off by default.
+
+    With overlap=True every axis works through its own targets without waiting for the other axes: an axis that has
+    settled sends its next command while the other axis is still settling on the current point. This needs no
+    acquisition hook, because the stage never holds still at a point as a whole.
+    """
+
+    def __init__(self, stage: StandaTwoAxes, axes: tuple = None, preconvert: bool = False):
+        """
+        :param stage: connected stage
+        :param axes: axis ids in the column order of the targets, default (axis1_id, axis2_id)
+        :param preconvert: send pre-converted (step, mstep) targets with command_move, see class docstring
+        """
+        self.stage = stage
+        self.axes = axes or (stage.axis1_id, stage.axis2_id)
+        self.preconvert = preconvert
+
+    def run(self, targets, on_point=None, overlap: bool = False) -> ScanResult:
+        """Moves through all targets, both axes concurrently.
+
+        :param targets: array of shape (n, len(axes)), e.g. (roll, nick) per row
+        :param on_point: called as on_point(index, record) after each point settled, e.g. to acquire an image. The
+                         stage does not move while the hook runs.
+        :param overlap: let every axis continue with its next target as soon as it settled, see class docstring;
+                        t_command and t_settled then hold the first command and the last settle over all axes
+        :return: ScanResult with one record per point
+        :raise ValueError: if overlap is combined with on_point
+        """
+        if overlap and on_point is not None:
+            raise ValueError("overlap=True never holds the stage at a point, on_point is not supported")
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, len(self.axes))
+        points = np.zeros(len(targets), dtype=scan_dtype(len(self.axes)))
+        points["commanded"] = targets
+
+        axes = [self.stage._get_axis(axis) for axis in self.axes]
+        steps = self._step_targets(axes, targets) if self.preconvert else [None] * len(axes)
+        if overlap:
+            return self._run_overlapped(axes, steps, targets, points)
+        statuses = [status_t() for _ in axes]
+        executors = [ThreadPoolExecutor(max_workers=1) for _ in axes]
+        last_targets = [None] * len(axes)
+        achieved = points["achieved"]
+        try:
+            start = time.monotonic()
+            for index, row in enumerate(targets.tolist()):
+                points["t_command"][index] = time.monotonic()
+                futures = []
+                for column, target in enumerate(row):
+                    if target != last_targets[column]:
+                        step = None if steps[column] is None else steps[column][index]
+                        futures.append((column, executors[column].submit(self._move, axes[column], target, step,
+                                                                         statuses[column])))
+                        last_targets[column] = target
+                ok = True
+                for column, future in futures:
+                    ok = future.result() and ok
+                points["t_settled"][index] = time.monotonic()
+
+                for column, axis in enumerate(axes):
+                    achieved[index, column] = axis.status_position(statuses[column])
+                points["ok"][index] = ok
+                if not ok:
+                    last_targets = [None] * len(axes)
+                if on_point is not None:
+                    on_point(index, points[index])
+            elapsed = time.monotonic() - start
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+        return ScanResult(points, elapsed)
+
+    def _run_overlapped(self, axes: list, steps: list, targets: np.ndarray, points: np.ndarray) -> ScanResult:
+        shape = (len(targets), len(axes))
+        t_command, t_settled = np.full(shape, np.nan), np.full(shape, np.nan)
+        ok = np.ones(shape, dtype=np.bool_)
+        with ThreadPoolExecutor(max_workers=len(axes)) as executor:
+            start = time.monotonic()
+            futures = [executor.submit(self._run_axis, axis, targets[:, column].tolist(), steps[column],
+                                       points["achieved"][:, column], t_command[:, column], t_settled[:, column],
+                                       ok[:, column])
+                       for column, axis in enumerate(axes)]
+            for future in futures:
+                future.result()
+            elapsed = time.monotonic() - start
+
+        # a point without any move keeps the times of the point before
+        t_command, t_settled = np.fmin.reduce(t_command, axis=1), np.fmax.reduce(t_settled, axis=1)
+        for index in np.flatnonzero(np.isnan(t_command)):
+            t_command[index] = t_settled[index] = t_settled[index - 1] if index else start
+        points["t_command"], points["t_settled"] = t_command, t_settled
+        points["ok"] = ok.all(axis=1)
+        return ScanResult(points, elapsed)
+
+    def _run_axis(self, axis: Standa, targets: list, steps, achieved: np.ndarray, t_command: np.ndarray,
+                  t_settled: np.ndarray, ok: np.ndarray):
+        """Worker of one axis for overlap=True, fills its column of the result arrays"""
+        status = status_t()
+        last_target = None
+        position = axis.get_position_calb()
+        for index, target in enumerate(targets):
+            if target != last_target:
+                t_command[index] = time.monotonic()
+                ok[index] = self._move(axis, target, None if steps is None else steps[index], status)
+                t_settled[index] = time.monotonic()
+                position = axis.status_position(status)
+                last_target = target if ok[index] else None
+            achieved[index] = position
+
+    @staticmethod
+    def _step_targets(axes: list, targets: np.ndarray) -> list:
+        """(step, mstep) per point for every axis, None for an axis without user unit"""
+        steps = []
+        for column, axis in enumerate(axes):
+            converter = axis.step_converter()
+            if converter is None:
+                steps.append(None)
+            else:
+                steps.append(np.column_stack(converter.to_steps(targets[:, column])).tolist())
+        return steps
+
+    @staticmethod
+    def _move(axis: Standa, target: float, step, status: status_t) -> bool:
+        timeout = axis.move_timeout(target)
+        accepted = axis.move_towards(target) if step is None else axis.move_towards_steps(*step)
+        if not accepted:
+            return False
+        if axis.wait_for_stop(status, timeout):
+            return True
+        axis.stop()  # timed out or lost: do not let the axis run on into the next point
+        return False
@@ -0,0 +1,589 @@
+import enum
+import getpass
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.standa_multi_axis import StandaMultiAxis
+
+# Rahmen: Länge der Nutzdaten, Anfragenummer (0: Positionsmeldung eines Abonnements)
+_FRAME = struct.Struct("<II")
+_COUNT = struct.Struct("<B")
+_OPERATION = struct.Struct("<BBd")  # Befehl, Achse, Wert
+_RESULT = struct.Struct("<bB")  # Result-Code, Anzahl der folgenden double-Werte
+_PUSH = struct.Struct("<dB")  # time.time() der Messung, Anzahl der folgenden (Achse, Winkel)-Paare
+_MAX_OPERATIONS = 255
+_MAX_PAYLOAD = _COUNT.size + _MAX_OPERATIONS * _OPERATION.size
+
+
+class Op(enum.IntEnum):
+    GET_ANGLE = 1  # Ergebnis: Winkel
+    GET_ANGLES = 2  # Ergebnis: Achse, Winkel, Achse, Winkel, ...
+    MOVE_ABSOLUT = 3
+    MOVE_RELATIVE = 4
+    MOVE_TOWARDS = 5
+    WAIT_FOR_MOVE = 6  # Ergebnis: Position nach dem Stillstand, s vom Eingang der Anfrage bis zum Stillstand
+    STOP_MOVEMENT = 7
+    SET_HOME = 8
+    SUBSCRIBE = 9  # Wert: Abstand der Positionsmeldungen in s
+    UNSUBSCRIBE = 10
+
+
+# Befehle, die bis zum Ende einer Bewegung blockieren; Anfragen mit ihnen laufen auf einem eigenen Thread, damit
+# schnelle Abfragen derselben Verbindung nicht warten
+_BLOCKING = {Op.MOVE_ABSOLUT, Op.MOVE_RELATIVE, Op.WAIT_FOR_MOVE}
+
+
+def default_address():
+    """
+    Der Socket liegt in einem Verzeichnis nur für den aktuellen Benutzer (siehe _socket_directory), andere Benutzer
+    können so keine Befehle an die Stage schicken. Die Umgebungsvariable API_ANGLE_STAGE_SOCKET gibt einen anderen
+    Pfad vor.
+    :return: Pfad des Unix-Sockets, ohne AF_UNIX (ältere Windows-Versionen) ("127.0.0.1", Port)
+    """
+    if hasattr(socket, "AF_UNIX"):
+        return os.environ.get("API_ANGLE_STAGE_SOCKET") or os.path.join(_socket_directory(), "stage.sock")
+    return "127.0.0.1", 47563
+
+
+def _socket_directory() -> str:
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"api_angle_stage-{user}")
+
+
+def _prepare_socket_directory(address: str):
+    """
+    Legt das Verzeichnis des Sockets mit Modus 0700 an. Das Standardverzeichnis liegt im gemeinsamen Temp-Verzeichnis
+    und muss deshalb dem Benutzer gehören und für andere gesperrt sein, sonst könnte ein anderer Benutzer es vorher
+    angelegt haben.
+    :raise PermissionError: wenn das Standardverzeichnis diese Bedingungen nicht erfüllt
+    """
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid") and directory == os.path.abspath(_socket_directory()):
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise PermissionError(f"{directory} must be a directory owned by the current user with mode 0700")
+
+
+def _recv_exact(sock: socket.socket, size: int):
+    """:return: genau size Bytes oder None, wenn die Gegenseite die Verbindung geschlossen hat"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            return None
+        received += count
+    return buffer
+
+
+def _send_frame(sock: socket.socket, lock: threading.Lock, request_id: int, payload: bytes):
+    with lock:
+        sock.sendall(_FRAME.pack(len(payload), request_id) + payload)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Eine Client-Verbindung: liest Anfragen, führt sie auf der Stage aus und sendet die Ergebnisse"""
+    server: "_SocketServer"
+
+    def setup(self):
+        if self.request.family != getattr(socket, "AF_UNIX", None):
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = threading.Lock()
+        self.subscription = None  # threading.Event zum Beenden des Abonnement-Threads
+
+    def handle(self):
+        stage_server = self.server.stage_server
+        while True:
+            header = _recv_exact(self.request, _FRAME.size)
+            if header is None:
+                return
+            length, request_id = _FRAME.unpack(header)
+            if length > _MAX_PAYLOAD:
+                return  # kein Rahmen dieses Protokolls, die Verbindung lässt sich nicht mehr synchronisieren
+            payload = _recv_exact(self.request, length)
+            if payload is None:
+                return
+            received = time.monotonic()
+            if length < _COUNT.size or length != _COUNT.size + payload[0] * _OPERATION.size:
+                self._reject(request_id)
+                continue
+            operations = [_OPERATION.unpack_from(payload, _COUNT.size + index * _OPERATION.size)
+                          for index in range(payload[0])]
+            if any(op in _BLOCKING for op, _, _ in operations):
+                stage_server.executor.submit(self._answer, request_id, operations, received)
+            else:
+                self._answer(request_id, operations, received)
+
+    def _reject(self, request_id: int):
+        """Antwort auf eine fehlerhafte Anfrage: ein einzelnes Ergebnis mit Result.ValueError"""
+        try:
+            _send_frame(self.request, self.send_lock, request_id,
+                        _COUNT.pack(1) + _RESULT.pack(Result.ValueError, 0))
+        except OSError:
+            pass
+
+    def _answer(self, request_id: int, operations: list, received: float):
+        response = bytearray(_COUNT.pack(len(operations)))
+        for op, axis, value in operations:
+            try:
+                if op == Op.SUBSCRIBE:
+                    status, values = self._subscribe(value), ()
+                elif op == Op.UNSUBSCRIBE:
+                    status, values = self._unsubscribe(), ()
+                else:
+                    status, values = self.server.stage_server.execute(op, axis, value, received)
+            except Exception:
+                # jede Anfrage bekommt eine Antwort, sonst wartet der Client auf sie
+                status, values = Result.Error, ()
+            response += _RESULT.pack(status, len(values))
+            response += struct.pack(f"<{len(values)}d", *values)
+        try:
+            _send_frame(self.request, self.send_lock, request_id, response)
+        except OSError:
+            pass  # Client hat die Verbindung geschlossen
+
+    def _subscribe(self, interval: float) -> int:
+        self._unsubscribe()
+        self.subscription = threading.Event()
+        threading.Thread(target=self._publish, args=(max(interval, 0.0005), self.subscription),
+                         name="StageServerSubscription", daemon=True).start()
+        return Result.Ok
+
+    def _unsubscribe(self) -> int:
+        if self.subscription is not None:
+            self.subscription.set()
+            self.subscription = None
+        return Result.Ok
+
+    def _publish(self, interval: float, stopped: threading.Event):
+        stage = self.server.stage_server.stage
+        next_time = time.monotonic()
+        while not stopped.is_set():
+            # alle Abonnenten teilen sich die Abfragen über den Positions-Cache der Achsen
+            values = []
+            for axis_id, axis in stage.axes.items():
+                values += (axis_id, axis.get_position_cached(interval))
+            payload = _PUSH.pack(time.time(), len(values) // 2) + struct.pack(f"<{len(values)}d", *values)
+            try:
+                _send_frame(self.request, self.send_lock, 0, payload)
+            except OSError:
+                return
+            next_time += interval
+            stopped.wait(max(next_time - time.monotonic(), 0.0))
+
+    def finish(self):
+        self._unsubscribe()
+
+
+class _SocketServer(socketserver.ThreadingMixIn, socketserver.BaseServer):
+    daemon_threads = True
+    stage_server = None
+
+
+if hasattr(socket, "AF_UNIX"):
+    class _UnixServer(_SocketServer, socketserver.UnixStreamServer):
+        def server_bind(self):
+            super().server_bind()
+            os.chmod(self.server_address, 0o600)  # nur der Benutzer des Servers darf sich verbinden
+
+
+class _TcpServer(_SocketServer, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class StageServer:
+    """
+    Dienst, der eine Stage besitzt und ihre Befehle über einen Unix-Socket (ohne AF_UNIX über TCP auf localhost) an
+    beliebig viele Prozesse weitergibt, siehe StageClient. libximc erlaubt nur einen Besitzer je Gerät; GUI, Logger
+    und Scan-Skripte teilen sich so eine offene Verbindung, statt die Geräte abwechselnd zu schließen und neu zu
+    enumerieren.
+
+    Protokoll: jede Nachricht ist ein Rahmen aus Länge und Anfragenummer (_FRAME) und den Nutzdaten. Eine Anfrage
+    enthält bis zu 255 Befehle (_OPERATION: Op, Achse, Wert), die nacheinander ausgeführt werden; die Antwort trägt
+    dieselbe Anfragenummer und je Befehl Result-Code und Werte. Positionsmeldungen eines Abonnements haben die
+    Anfragenummer 0.
+
+        stage = StandaTwoAxes()
+        stage.open_connection()
+        StageServer(stage).serve_forever()
+    """
+
+    def __init__(self, stage: StandaMultiAxis, address=None, workers: int = 8):
+        """
+        :param stage: verbundene Stage
+        :param address: Pfad des Unix-Sockets oder (Host, Port), Standard siehe default_address
+        :param workers: Threads für blockierende Anfragen (Bewegungen mit Warten) aller Clients
+        :raise OSError: wenn unter address schon ein Server antwortet
+        :raise PermissionError: wenn das Standardverzeichnis des Sockets nicht nur dem Benutzer gehört
+        """
+        self.stage = stage
+        self.address = address or default_address()
+        if isinstance(self.address, str):
+            _prepare_socket_directory(self.address)
+            if os.path.exists(self.address):
+                if _answers(self.address):
+                    raise OSError(f"StageServer already running at {self.address}")
+                os.unlink(self.address)  # Socket eines beendeten Servers
+            self._server = _UnixServer(self.address, _Handler)
+        else:
+            self._server = _TcpServer(self.address, _Handler)
+            self.address = self._server.server_address
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="StageServer")
+        self._server.stage_server = self
+        self._thread = None
+        self._serving = False
+
+    def execute(self, op: int, axis: int, value: float, received: float = None) -> tuple:
+        """
+        Führt einen Befehl auf der Stage aus
+        :param received: time.monotonic() beim Eingang der Anfrage, Bezug der Zeit von WAIT_FOR_MOVE
+        :return: (Result-Code, Werte)
+        """
+        stage = self.stage
+        try:
+            if op == Op.GET_ANGLE:
+                return Result.Ok, (stage.get_angle(axis),)
+            if op == Op.GET_ANGLES:
+                return Result.Ok, tuple(item for pair in stage.get_angles().items() for item in pair)
+            if op == Op.MOVE_ABSOLUT:
+                stage.move_absolut(axis, value)
+                return stage.axes[axis]._last_error, ()
+            if op == Op.MOVE_RELATIVE:
+                stage.move_relative(axis, value)
+                return stage.axes[axis]._last_error, ()
+            if op == Op.MOVE_TOWARDS:
+                stage.move_towards(axis, value)
+                return stage.axes[axis]._last_error, ()
+            if op == Op.WAIT_FOR_MOVE:
+                target = stage.axes[axis]
+                if not target.wait_for_stop():
+                    return target._last_error, ()
+                elapsed = 0.0 if received is None else time.monotonic() - received
+                return Result.Ok, (target._stopped_position, elapsed)
+            if op == Op.STOP_MOVEMENT:
+                stage.stop_movement()
+                return Result.Ok, ()
+            if op == Op.SET_HOME:
+                stage.set_home()
+                return Result.Ok, ()
+        except XimcError as error:
+            return error.result, ()
+        except ValueError:
+            return Result.ValueError, ()  # unbekannte Achse
+        return Result.NotImplemented, ()
+
+    def serve_forever(self):
+        self._serving = True
+        self._server.serve_forever()
+
+    def start(self) -> "StageServer":
+        """Startet den Dienst auf einem Hintergrund-Thread"""
+        self._serving = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="StageServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._serving:
+            self._server.shutdown()  # wartet auf serve_forever, ohne laufenden Dienst für immer
+        self._server.server_close()
+        self.executor.shutdown(wait=False)
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+def _answers(address: str) -> bool:
+    """:return: True, wenn unter dem Pfad ein Server Verbindungen annimmt"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(address)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class StageBatch:
+    """
+    Sammelt Befehle für eine einzige Anfrage, siehe StageClient.batch. Jede Methode gibt den Index ihres Ergebnisses in
+    results zurück; fehlgeschlagene Befehle haben dort eine XimcError statt des Werts.
+    """
+
+    def __init__(self, client: "StageClient"):
+        self.client = client
+        self.operations = []
+        self.results = None
+
+    def _add(self, op: Op, axis: int = 0, value: float = 0.0) -> int:
+        if len(self.operations) == _MAX_OPERATIONS:
+            raise ValueError(f"A batch holds at most {_MAX_OPERATIONS} commands")
+        self.operations.append((op, int(axis), float(value)))
+        return len(self.operations) - 1
+
+    def get_angle(self, axis: int) -> int:
+        return self._add(Op.GET_ANGLE, axis)
+
+    def get_angles(self) -> int:
+        return self._add(Op.GET_ANGLES)
+
+    def move_absolut(self, axis: int, position: float) -> int:
+        return self._add(Op.MOVE_ABSOLUT, axis, position)
+
+    def move_relative(self, axis: int, position: float) -> int:
+        return self._add(Op.MOVE_RELATIVE, axis, position)
+
+    def move_towards(self, axis: int, position: float) -> int:
+        return self._add(Op.MOVE_TOWARDS, axis, position)
+
+    def wait_for_move(self, axis: int) -> int:
+        return self._add(Op.WAIT_FOR_MOVE, axis)
+
+    def stop_movement(self) -> int:
+        return self._add(Op.STOP_MOVEMENT)
+
+    def set_home(self) -> int:
+        return self._add(Op.SET_HOME)
+
+    def send(self) -> list:
+        """
+        :return: Ergebnisse in der Reihenfolge der Befehle: Winkel (GET_ANGLE), dict Achse -> Winkel (GET_ANGLES),
+                 Position (WAIT_FOR_MOVE), sonst None; XimcError bei Fehlern
+        """
+        self.results = []
+        for (op, _, _), (status, values) in zip(self.operations, self.client._request(self.operations)):
+            if status != Result.Ok:
+                try:
+                    check_result(status, op.name.lower(), None)
+                except XimcError as error:
+                    self.results.append(error)
+                continue
+            if op == Op.GET_ANGLES:
+                self.results.append({int(values[index]): values[index + 1] for index in range(0, len(values), 2)})
+            else:
+                self.results.append(values[0] if values else None)
+        self.operations = []
+        return self.results
+
+    def __enter__(self) -> "StageBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+
+class StageClient:
+    """
+    Stellvertreter einer Stage in einem StageServer mit denselben Methodennamen wie StandaTwoAxes. Achsen werden über
+    ihre Nummer angesprochen. Fehler des Servers kommen als XimcError zurück. Ein Client darf von mehreren Threads
+    gleichzeitig benutzt werden, Antworten werden über ihre Anfragenummer zugeordnet.
+    """
+
+    def __init__(self, address=None, timeout: float = 300.0):
+        """
+        :param address: Adresse des StageServer, Standard siehe default_address
+        :param timeout: maximale Wartezeit in s auf eine Antwort, auch für blockierende Bewegungen; None wartet
+                        unbegrenzt
+        """
+        self.address = address or default_address()
+        self.timeout = timeout
+        self.axes = []  # Nummern der Achsen des Servers, nach open_connection
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}  # Anfragenummer -> Future
+        self._next_id = 1
+        self._subscriber = None
+        self._reader = None
+        self._connected = False  # False, sobald der Empfangs-Thread beendet ist
+
+    def open_connection(self) -> bool:
+        try:
+            if isinstance(self.address, str):
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock.connect(self.address)
+        except OSError:
+            self._sock = None
+            return False
+        self._connected = True
+        self._reader = threading.Thread(target=self._read, name="StageClient", daemon=True)
+        self._reader.start()
+        self.axes = list(self.get_angles())
+        return True
+
+    def close_connection(self) -> bool:
+        if self._sock is None:
+            return False
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._reader.join()
+        self._sock = None
+        return True
+
+    def _request(self, operations: list) -> list:
+        """
+        :return: (Result-Code, Werte) je Befehl
+        """
+        if self._sock is None:
+            raise ConnectionError("StageClient is not connected")
+        payload = bytearray(_COUNT.pack(len(operations)))
+        for op, axis, value in operations:
+            payload += _OPERATION.pack(op, axis, value)
+        future = Future()
+        with self._lock:
+            if not self._connected:
+                raise ConnectionError("StageClient lost the connection to the StageServer")
+            request_id = self._next_id
+            self._next_id = self._next_id % 0xFFFFFFFF + 1
+            self._pending[request_id] = future
+        try:
+            _send_frame(self._sock, self._send_lock, request_id, payload)
+            return future.result(self.timeout)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise
+
+    def _read(self):
+        sock = self._sock
+        reason = ConnectionError("StageServer closed the connection")
+        try:
+            while True:
+                header = _recv_exact(sock, _FRAME.size)
+                payload = header and _recv_exact(sock, _FRAME.unpack(header)[0])
+                if payload is None:
+                    break
+                request_id = _FRAME.unpack(header)[1]
+                if request_id == 0:
+                    self._push(payload)
+                    continue
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                if future is not None:
+                    try:
+                        future.set_result(self._parse(payload))
+                    except (IndexError, struct.error) as error:
+                        future.set_exception(ConnectionError(f"Malformed response from StageServer: {error}"))
+        except OSError:
+            pass
+        except Exception as error:
+            # z.B. ein Fehler im Callback eines Abonnements: der Thread endet, keine Anfrage darf weiter warten
+            reason = ConnectionError(f"StageClient stopped reading: {error!r}")
+            reason.__cause__ = error
+        with self._lock:
+            self._connected = False
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(reason)
+
+    @staticmethod
+    def _parse(payload: bytes) -> list:
+        results = []
+        offset = _COUNT.size
+        for _ in range(payload[0]):
+            status, count = _RESULT.unpack_from(payload, offset)
+            offset += _RESULT.size
+            results.append((status, struct.unpack_from(f"<{count}d", payload, offset)))
+            offset += 8 * count
+        return results
+
+    def _push(self, payload: bytes):
+        callback = self._subscriber
+        if callback is None:
+            return
+        timestamp, count = _PUSH.unpack_from(payload)
+        values = struct.unpack_from(f"<{2 * count}d", payload, _PUSH.size)
+        callback(timestamp, {int(values[index]): values[index + 1] for index in range(0, len(values), 2)})
+
+    def _single(self, op: Op, axis: int = 0, value: float = 0.0):
+        status, values = self._request([(op, int(axis), float(value))])[0]
+        check_result(status, op.name.lower(), None)
+        return values
+
+    def batch(self) -> StageBatch:
+        """
+        Mehrere Befehle in einer Anfrage, z.B.
+            with client.batch() as batch:
+                batch.move_towards(1, 5.0)
+                batch.move_towards(2, -3.0)
+                batch.wait_for_move(1)
+                batch.wait_for_move(2)
+                batch.get_angles()
+            roll, nick, angles = batch.results[2:]
+        """
+        return StageBatch(self)
+
+    def get_angle(self, axis: int) -> float:
+        return self._single(Op.GET_ANGLE, axis)[0]
+
+    def get_angles(self) -> dict:
+        values = self._single(Op.GET_ANGLES)
+        return {int(values[index]): values[index + 1] for index in range(0, len(values), 2)}
+
+    def move_absolut(self, axis: int, position: float):
+        self._single(Op.MOVE_ABSOLUT, axis, position)
+
+    def move_relative(self, axis: int, position: float):
+        self._single(Op.MOVE_RELATIVE, axis, position)
+
+    def move_towards(self, axis: int, position: float):
+        self._single(Op.MOVE_TOWARDS, axis, position)
+
+    def wait_for_move(self, axis: int) -> float:
+        return self._single(Op.WAIT_FOR_MOVE, axis)[0]
+
+    def move_absolut_many(self, positions: dict) -> dict:
+        """Wie StandaTwoAxes.move_absolut_many, alle Befehle und das Warten in einer Anfrage"""
+        start = time.monotonic()
+        operations = [(Op.MOVE_TOWARDS, int(axis), float(position)) for axis, position in positions.items()]
+        operations += [(Op.WAIT_FOR_MOVE, int(axis), 0.0) for axis in positions]
+        results = self._request(operations)
+        elapsed = time.monotonic() - start
+        report = {}
+        for index, axis in enumerate(positions):
+            (command, _), (wait, values) = results[index], results[len(positions) + index]
+            error = command if command != Result.Ok else wait
+            report[axis] = {"result": error == Result.Ok, "error": error,
+                            "position": values[0] if error == Result.Ok else None,
+                            # WAIT_FOR_MOVE misst ab dem Eingang der Anfrage beim Server, je Achse bis zu ihrem Halt
+                            "time": values[1] if error == Result.Ok else elapsed}
+        return report
+
+    def go_home(self) -> dict:
+        return self.move_absolut_many({axis: 0.0 for axis in self.axes})
+
+    def set_home(self):
+        self._single(Op.SET_HOME)
+
+    def stop_movement(self):
+        self._single(Op.STOP_MOVEMENT)
+
+    def subscribe(self, callback, interval: float = 0.01):
+        """
+        Abonniert die Positionen aller Achsen
+        :param callback: callback(timestamp, {Achse: Winkel}) auf dem Empfangs-Thread, timestamp ist time.time()
+        :param interval: Abstand der Meldungen in s
+        """
+        self._subscriber = callback
+        self._single(Op.SUBSCRIBE, 0, interval)
+
+    def unsubscribe(self):
+        self._single(Op.UNSUBSCRIBE)
+        self._subscriber = None
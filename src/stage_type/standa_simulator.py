@@ -0,0 +1,427 @@
+import functools
+import threading
+import time
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.motion_model import INSTANT_ACCEL, plan_move
+
+# Ziel für command_left/command_right, entspricht einer Achse ohne Endschalter
+_CONTINUOUS_STEPS = 1e9
+
+
+def _value(arg):
+    """Zahl aus einem ctypes-Objekt (c_int, c_float, ...) oder direkt übergebenem Python-Wert"""
+    return getattr(arg, "value", arg)
+
+
+def _target(arg):
+    """Struktur hinter byref(...) oder pointer(...), direkt übergebene Strukturen wie bei argtypes mit POINTER"""
+    if hasattr(arg, "_obj"):
+        return arg._obj
+    if hasattr(arg, "contents"):
+        return arg.contents
+    return arg
+
+
+def _copy_fields(dst, src):
+    """Kopiert alle gleichnamigen Felder, z.B. engine_settings_t -> engine_settings_calb_t"""
+    src_fields = {name for name, _ in src._fields_}
+    for name, _ in dst._fields_:
+        if name in src_fields:
+            setattr(dst, name, getattr(src, name))
+
+
+def _split_steps(value: float, fraction: int) -> tuple:
+    """Teilt einen Wert in Schritten in (step, mstep) auf, beide mit dem Vorzeichen des Werts wie beim Controller"""
+    total = round(value * fraction)
+    step = int(abs(total) // fraction) * (1 if total >= 0 else -1)
+    return step, total - step * fraction
+
+
+class SimulatedAxis:
+    """
+    Eine simulierte Achse (8SMC5-Controller mit Schrittmotor). Die Position wird in Vollschritten als float gehalten,
+    Bewegungen folgen einem Trapezprofil aus Speed/Accel/Decel der move_settings, Accel bzw. Decel 0 beschleunigt bzw.
+    bremst sofort. Standard ist 0, damit Benchmarks ohne eigene Rampen nur den Aufwand im Host messen.
+    """
+
+    def __init__(self, serial: int, position: float = 0.0, speed: int = 1000, accel: int = 0, decel: int = 0,
+                 microstep_mode: int = MicrostepMode.MICROSTEP_MODE_FRAC_256):
+        self.serial = serial
+        self.move_settings = move_settings_t(Speed=speed, Accel=accel, Decel=decel)
+        self.engine_settings = engine_settings_t(NomSpeed=speed, MicrostepMode=microstep_mode, StepsPerRev=200)
+        self.sync_out_settings = sync_out_settings_t()  # wird nur gespeichert, Pulse gibt es im Simulator nicht
+        self.is_open = False
+
+        self._origin_time = time.monotonic()
+        self._origin_position = float(position)
+        self._origin_speed = 0.0
+        self._phases = []
+        self._end_position = float(position)
+        self._command = MvcmdStatus.MVCMD_UKNWN
+        self.target = float(position)
+
+    @property
+    def fraction(self) -> int:
+        return 1 << (self.engine_settings.MicrostepMode - 1)
+
+    def max_speed(self) -> float:
+        return self.move_settings.Speed + self.move_settings.uSpeed / self.fraction
+
+    def state(self, now: float) -> tuple:
+        """
+        :return: (Position, Geschwindigkeit, bewegt sich) zum Zeitpunkt now (time.monotonic)
+        """
+        elapsed = now - self._origin_time
+        position, speed = self._origin_position, self._origin_speed
+        for duration, a in self._phases:
+            if elapsed < duration:
+                return position + speed * elapsed + 0.5 * a * elapsed * elapsed, speed + a * elapsed, True
+            position += speed * duration + 0.5 * a * duration * duration
+            speed += a * duration
+            elapsed -= duration
+        return self._end_position, 0.0, False
+
+    def move_to(self, now: float, target: float, command: int):
+        position, speed, _ = self.state(now)
+        settings = self.move_settings
+        self._set_phases(now, position, speed,
+                         plan_move(position, speed, target, self.max_speed(), settings.Accel, settings.Decel), target)
+        self._command = command
+        self.target = target
+
+    def soft_stop(self, now: float):
+        position, speed, _ = self.state(now)
+        decel = self.move_settings.Decel or INSTANT_ACCEL
+        duration = abs(speed) / decel
+        a = -decel if speed > 0 else decel
+        end_position = position + speed * duration + 0.5 * a * duration * duration
+        self._set_phases(now, position, speed, [(duration, a)] if speed else [], end_position)
+        self._command = MvcmdStatus.MVCMD_SSTP
+        self.target = end_position
+
+    def stop(self, now: float):
+        position, _, _ = self.state(now)
+        self._set_phases(now, position, 0.0, [], position)
+        self._command = MvcmdStatus.MVCMD_STOP
+        self.target = position
+
+    def zero(self, now: float):
+        position, _, _ = self.state(now)
+        self._origin_position -= position
+        self._end_position -= position
+        self.target -= position
+
+    def _set_phases(self, now: float, position: float, speed: float, phases: list, end_position: float):
+        self._origin_time = now
+        self._origin_position = position
+        self._origin_speed = speed
+        self._phases = phases
+        self._end_position = end_position
+
+    def fill_status(self, now: float, status: status_t):
+        position, speed, moving = self.state(now)
+        status.CurPosition, status.uCurPosition = _split_steps(position, self.fraction)
+        status.EncPosition = int(position)
+        status.CurSpeed, status.uCurSpeed = _split_steps(speed, self.fraction)
+        status.MoveSts = MoveState.MOVE_STATE_MOVING if moving else 0
+        status.MvCmdSts = self._command | (MvcmdStatus.MVCMD_RUNNING if moving else 0)
+        status.CmdBufFreeSpace = 0
+
+
+def _with_errcheck(cls):
+    """Leitet die Rückgabewerte wie bei der dll durch das errcheck aus libximc_prototypes"""
+    for name, (_, _, errcheck) in libximc_prototypes.items():
+        if errcheck is not None and hasattr(cls, name):
+            setattr(cls, name, _checked(getattr(cls, name), name, errcheck))
+    return cls
+
+
+def _checked(method, name: str, errcheck):
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        return errcheck(method(self, *args), name, args)
+
+    return wrapper
+
+
+class _Enumeration:
+    def __init__(self, names: list):
+        self.names = names
+
+
+@_with_errcheck
+class SimulatedLibximc:
+    """
+    Reines Python-Backend für Standa, das die genutzten libximc-Funktionen nachbildet. Damit laufen Standa und
+    StandaTwoAxes ohne Hardware und ohne Windows:
+
+        Standa.set_backend(SimulatedLibximc(latency=0.001))
+
+    :param axes: simulierte Achsen, Standard sind zwei Achsen mit den Seriennummern 30314 und 30315
+    :param latency: Dauer eines Aufrufs in s (USB-Roundtrip), gilt für jede Funktion, die den Controller anspricht
+    :param enumerate_latency: zusätzliche Dauer von enumerate_devices in s
+    """
+
+    def __init__(self, axes: list = None, latency: float = 0.0, enumerate_latency: float = 0.0):
+        if axes is None:
+            axes = [SimulatedAxis(30314), SimulatedAxis(30315)]
+        self.axes = list(axes)
+        self.latency = latency
+        self.enumerate_latency = enumerate_latency
+        self.call_count = 0
+        self._handles = {}
+        self._next_handle = 1
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def device_name(serial: int) -> bytes:
+        return b"xi-emu:///standa_sim_%d" % serial
+
+    def axis(self, serial: int) -> SimulatedAxis:
+        return next(axis for axis in self.axes if axis.serial == serial)
+
+    def _io(self, extra: float = 0.0):
+        self.call_count += 1
+        delay = self.latency + extra
+        if delay > 0:
+            time.sleep(delay)
+
+    def _axis(self, handle) -> SimulatedAxis:
+        return self._handles.get(_value(handle))
+
+    # Enumeration und Verbindung
+
+    def enumerate_devices(self, flags, hints) -> _Enumeration:
+        self._io(self.enumerate_latency)
+        with self._lock:
+            return _Enumeration([self.device_name(axis.serial) for axis in self.axes])
+
+    def get_device_count(self, devenum: _Enumeration) -> int:
+        return len(devenum.names)
+
+    def get_device_name(self, devenum: _Enumeration, index) -> bytes:
+        return devenum.names[_value(index)]
+
+    def get_enumerate_device_controller_name(self, devenum: _Enumeration, index, controller_name) -> int:
+        _target(controller_name).ControllerName = b"8SMC5-SIM"
+        return Result.Ok
+
+    def free_enumerate_devices(self, devenum: _Enumeration) -> int:
+        return Result.Ok
+
+    def open_device(self, name) -> int:
+        self._io()
+        name = _value(name)
+        with self._lock:
+            for axis in self.axes:
+                if self.device_name(axis.serial) == name and not axis.is_open:
+                    axis.is_open = True
+                    handle = self._next_handle
+                    self._next_handle += 1
+                    self._handles[handle] = axis
+                    return handle
+        return -1
+
+    def close_device(self, handle_pointer) -> int:
+        handle = _value(_target(handle_pointer))
+        with self._lock:
+            axis = self._handles.pop(handle, None)
+            if axis is None:
+                return Result.Error
+            axis.is_open = False
+        return Result.Ok
+
+    def get_serial_number(self, handle, serial) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        _target(serial).value = axis.serial
+        return Result.Ok
+
+    # Bewegung
+
+    def _move(self, handle, target_steps, command: int) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            axis.move_to(time.monotonic(), target_steps, command)
+        return Result.Ok
+
+    def command_move(self, handle, position, uposition) -> int:
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        return self._move(handle, _value(position) + _value(uposition) / axis.fraction, MvcmdStatus.MVCMD_MOVE)
+
+    def command_move_calb(self, handle, position, calibration) -> int:
+        a = _target(calibration).A
+        if a == 0:
+            return Result.ValueError
+        return self._move(handle, _value(position) / a, MvcmdStatus.MVCMD_MOVE)
+
+    def _relative_origin(self, axis: SimulatedAxis) -> float:
+        """movr zählt während einer Bewegung vom aktuellen Ziel aus, sonst von der aktuellen Position"""
+        position, _, moving = axis.state(time.monotonic())
+        return axis.target if moving else position
+
+    def command_movr(self, handle, delta, udelta) -> int:
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            target = self._relative_origin(axis) + _value(delta) + _value(udelta) / axis.fraction
+        return self._move(handle, target, MvcmdStatus.MVCMD_MOVR)
+
+    def command_movr_calb(self, handle, delta, calibration) -> int:
+        axis = self._axis(handle)
+        a = _target(calibration).A
+        if axis is None:
+            return Result.Error
+        if a == 0:
+            return Result.ValueError
+        with self._lock:
+            target = self._relative_origin(axis) + _value(delta) / a
+        return self._move(handle, target, MvcmdStatus.MVCMD_MOVR)
+
+    def command_left(self, handle) -> int:
+        return self._move(handle, -_CONTINUOUS_STEPS, MvcmdStatus.MVCMD_LEFT)
+
+    def command_right(self, handle) -> int:
+        return self._move(handle, _CONTINUOUS_STEPS, MvcmdStatus.MVCMD_RIGHT)
+
+    def command_sstp(self, handle) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            axis.soft_stop(time.monotonic())
+        return Result.Ok
+
+    def command_stop(self, handle) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            axis.stop(time.monotonic())
+        return Result.Ok
+
+    def command_zero(self, handle) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            axis.zero(time.monotonic())
+        return Result.Ok
+
+    def command_wait_for_stop(self, handle, refresh_interval_ms) -> int:
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        interval = _value(refresh_interval_ms) / 1000
+        while True:
+            self._io()
+            with self._lock:
+                moving = axis.state(time.monotonic())[2]
+            if not moving:
+                return Result.Ok
+            time.sleep(interval)
+
+    # Zustand
+
+    def get_status(self, handle, status) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            axis.fill_status(time.monotonic(), _target(status))
+        return Result.Ok
+
+    def get_position(self, handle, position) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            steps = axis.state(time.monotonic())[0]
+        result = _target(position)
+        result.Position, result.uPosition = _split_steps(steps, axis.fraction)
+        result.EncPosition = int(steps)
+        return Result.Ok
+
+    def get_position_calb(self, handle, position, calibration) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        with self._lock:
+            steps = axis.state(time.monotonic())[0]
+        result = _target(position)
+        result.Position = _target(calibration).A * steps
+        result.EncPosition = int(steps)
+        return Result.Ok
+
+    # Einstellungen
+
+    def get_move_settings(self, handle, settings) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        _copy_fields(_target(settings), axis.move_settings)
+        return Result.Ok
+
+    def set_move_settings(self, handle, settings) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        _copy_fields(axis.move_settings, _target(settings))
+        return Result.Ok
+
+    def get_sync_out_settings(self, handle, settings) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        _copy_fields(_target(settings), axis.sync_out_settings)
+        return Result.Ok
+
+    def set_sync_out_settings(self, handle, settings) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        _copy_fields(axis.sync_out_settings, _target(settings))
+        return Result.Ok
+
+    def get_engine_settings(self, handle, settings) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        _copy_fields(_target(settings), axis.engine_settings)
+        return Result.Ok
+
+    def set_engine_settings(self, handle, settings) -> int:
+        self._io()
+        axis = self._axis(handle)
+        if axis is None:
+            return Result.Error
+        if not 1 <= _target(settings).MicrostepMode <= 9:
+            return Result.ValueError
+        _copy_fields(axis.engine_settings, _target(settings))
+        return Result.Ok
+
+    def get_engine_settings_calb(self, handle, settings, calibration) -> int:
+        return self.get_engine_settings(handle, settings)
+
+    def set_engine_settings_calb(self, handle, settings, calibration) -> int:
+        return self.set_engine_settings(handle, settings)
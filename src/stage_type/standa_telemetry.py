@@ -0,0 +1,182 @@
+import threading
+import time
+
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.Standa import Standa
+
+# Felder aus status_t, die in jedem Datensatz stehen; sie liegen an denselben Offsets wie in status_t (hinter t_ns), so
+# dass ein Datensatz mit einem einzigen memmove der Struktur geschrieben wird
+telemetry_fields = ("MoveSts", "MvCmdSts", "CurPosition", "uCurPosition", "EncPosition", "CurSpeed", "uCurSpeed")
+_status_offset = 8
+
+
+def telemetry_dtype() -> np.dtype:
+    """
+    Datensatz des Ringpuffers: t_ns (time.monotonic_ns() der Abfrage) und die telemetry_fields aus status_t
+    """
+    names, formats, offsets = ["t_ns"], [np.int64], [0]
+    for name in telemetry_fields:
+        field = getattr(status_t, name)
+        names.append(name)
+        formats.append(np.dtype(dict(status_t._fields_)[name]).newbyteorder("<"))
+        offsets.append(_status_offset + field.offset)
+    return np.dtype({"names": names, "formats": formats, "offsets": offsets,
+                     "itemsize": _status_offset + sizeof(status_t)})
+
+
+class TelemetrySampler:
+    """
+    Fragt eine Achse in einem eigenen Thread mit fester Rate über get_status ab und schreibt Zeitstempel, Position,
+    Encoderposition, Geschwindigkeit und Bewegungszustand in einen vorab angelegten NumPy-Ringpuffer. Der Status
+    enthält CurPosition bereits, ein zusätzliches get_position_calb je Abfrage ist deshalb nicht nötig.
+
+    Pro Abfrage wird nur die Struktur in den Puffer kopiert, es entstehen keine Listen, Dicts oder Structs, und der
+    Speicherbedarf bleibt auch über Stunden konstant. Jeder Datensatz steht zweimal im Puffer (an i und i + capacity),
+    dadurch sind die letzten bis zu capacity Datensätze immer ein zusammenhängender Ausschnitt und snapshot/stream
+    liefern Views ohne Kopie. Eine View mit n Datensätzen bleibt unverändert, solange der Schreiber höchstens
+    capacity - n weitere Datensätze geschrieben hat; eine View über den ganzen Puffer ändert sich also schon mit dem
+    nächsten Datensatz. Wer Datensätze länger braucht, kopiert sie.
+    """
+
+    def __init__(self, axis: Standa, rate: float = 200.0, capacity: int = 65536):
+        """
+        :param axis: verbundene Achse
+        :param rate: Abfragen pro Sekunde
+        :param capacity: Anzahl der Datensätze im Puffer
+        """
+        self.axis = axis
+        self.rate = rate
+        self.capacity = capacity
+        self.count = 0  # Anzahl aller bisher geschriebenen Datensätze
+        self.errors = 0  # fehlgeschlagene get_status-Aufrufe
+        self.dropped = 0  # von stream übersprungene Datensätze
+        self._data = np.zeros(2 * capacity, dtype=telemetry_dtype())
+        self._times = self._data["t_ns"]
+        self._status = status_t()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._started = False  # snapshot und stream setzen einen gestarteten Sampler voraus
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._started = True
+        self._thread = threading.Thread(target=self._run, name=f"TelemetrySampler-{self.axis.handle}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _run(self):
+        lib, handle, status = self.axis.lib, self.axis.handle, self._status
+        status_address, status_size = addressof(status), sizeof(status)
+        base, itemsize, capacity = self._data.ctypes.data, self._data.itemsize, self.capacity
+        mirror = capacity * itemsize
+        times = self._times
+        period_ns = int(1e9 / self.rate)
+        next_poll = time.monotonic_ns()
+
+        while self._running:
+            before = time.monotonic_ns()
+            try:
+                # jedes Mal nachschlagen: InstrumentedLibximc.reset ersetzt die gemessenen Funktionen
+                lib.get_status(handle, status)
+            except XimcError:
+                self.errors += 1
+            else:
+                index = self.count % capacity
+                timestamp = (before + time.monotonic_ns()) // 2
+                address = base + index * itemsize + _status_offset
+                memmove(address, status_address, status_size)
+                memmove(address + mirror, status_address, status_size)
+                times[index] = timestamp
+                times[index + capacity] = timestamp
+                with self._condition:
+                    self.count += 1
+                    self._condition.notify_all()
+
+            next_poll += period_ns
+            delay = next_poll - time.monotonic_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            elif delay < -period_ns:
+                next_poll = time.monotonic_ns()  # zu langsam: Rückstand nicht nachholen
+
+    def _check_started(self):
+        if not self._started:
+            raise RuntimeError("TelemetrySampler was never started, call start() first")
+
+    def _window(self, start: int, stop: int) -> np.ndarray:
+        """View auf die Datensätze mit den laufenden Nummern start..stop-1 (höchstens capacity viele)"""
+        first = start % self.capacity
+        return self._data[first:first + stop - start]
+
+    def snapshot(self, n: int = None) -> np.ndarray:
+        """
+        :param n: Anzahl der neuesten Datensätze, Standard ist alles, was im Puffer steht
+        :return: View auf die Datensätze in zeitlicher Reihenfolge, ohne Kopie
+        :raise RuntimeError: wenn start() nie aufgerufen wurde; nach stop() bleibt der Puffer lesbar
+        """
+        self._check_started()
+        count = self.count
+        available = min(count, self.capacity)
+        n = available if n is None else min(n, available)
+        return self._window(count - n, count)
+
+    def stream(self, timeout: float = None, max_batch: int = None):
+        """
+        Blockierender Iterator über neue Datensätze. Jeder Schritt liefert eine View auf alle Datensätze seit dem
+        letzten Schritt; wer mehr als capacity Datensätze zurückliegt, überspringt die ältesten (siehe dropped).
+        Der Iterator endet mit stop() oder, wenn timeout s lang kein Datensatz kommt.
+        :param timeout: maximale Wartezeit auf neue Datensätze in s, None wartet unbegrenzt
+        :param max_batch: höchstens so viele Datensätze je Schritt
+        :return: Generator von Views
+        :raise RuntimeError: wenn start() nie aufgerufen wurde, schon beim Aufruf statt beim ersten Schritt
+        """
+        self._check_started()
+        return self._stream(timeout, max_batch)
+
+    def _stream(self, timeout: float, max_batch: int):
+        seen = self.count
+        self.dropped = 0
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(lambda: self.count > seen or not self._running, timeout):
+                    return
+                count = self.count
+            if count == seen:
+                return
+            if count - seen > self.capacity:
+                self.dropped += count - seen - self.capacity
+                seen = count - self.capacity
+            stop = count if max_batch is None else min(count, seen + max_batch)
+            yield self._window(seen, stop)
+            seen = stop
+
+    def positions(self, records: np.ndarray) -> np.ndarray:
+        """
+        :param records: Datensätze aus snapshot oder stream
+        :return: Positionen in Benutzereinheiten, user_value = A*(step + mstep/pow(2,MicrostepMode-1))
+        """
+        fraction = self.axis._microstep_fraction()
+        return self.axis.calibration_t.A * (records["CurPosition"] + records["uCurPosition"] / fraction)
+
+    def speeds(self, records: np.ndarray) -> np.ndarray:
+        """
+        :return: Geschwindigkeiten in Benutzereinheiten/s
+        """
+        fraction = self.axis._microstep_fraction()
+        return self.axis.calibration_t.A * (records["CurSpeed"] + records["uCurSpeed"] / fraction)
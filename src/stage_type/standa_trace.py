@@ -0,0 +1,373 @@
+import bisect
+import struct
+import threading
+import time
+from collections import deque
+from ctypes import _Pointer, addressof, memmove, sizeof
+from typing import NamedTuple
+
+from src.stage_type.STANDA_bindings import *
+
+# Aufbau einer Spur: _MAGIC, danach nur angehängte Einträge, die mit ihrer Art beginnen. Jede Aufnahme beginnt mit
+# einem Sitzungseintrag und vergibt die Nummern der Funktionen neu, eine Datei kann also mehrere Sitzungen enthalten.
+_MAGIC = b"XIMCTRC\x01"
+_SESSION = struct.Struct("<Bqd")  # Art, time.monotonic_ns() und time.time() beim Start der Aufnahme
+_FUNCTION = struct.Struct("<BHB")  # Art, Nummer, Länge des Namens, danach der Name
+_CALL = struct.Struct("<BHiqqB")  # Art, Nummer, handle (-1 ohne), Start in ns, Dauer in ns, Flags
+_KIND_SESSION, _KIND_FUNCTION, _KIND_CALL = 1, 2, 3
+_FLAG_RAISED = 0x01  # die Funktion hat XimcError ausgelöst, result ist dessen Fehlercode
+
+# Werte (Rückgabe und Argumente) stehen als Typkennung und Inhalt in der Spur
+_TAG_NONE, _TAG_INT, _TAG_FLOAT, _TAG_BYTES, _TAG_CTYPES = range(5)
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LENGTH = struct.Struct("<I")
+_ctypes_prefixes = {}  # ctypes-Typ: Typkennung und Länge, die Größe eines Typs ändert sich nicht
+
+# Funktionen ohne Achse; alle anderen bekommen als erstes Argument das handle
+_GLOBAL_FUNCTIONS = {"enumerate_devices", "free_enumerate_devices", "get_device_count", "get_device_name",
+                     "get_enumerate_device_controller_name", "open_device"}
+
+
+class CtypesBytes(bytes):
+    """Inhalt eines ctypes-Arguments (Struktur oder c_int, c_uint, ...) nach dem Aufruf"""
+
+
+class TraceCall(NamedTuple):
+    session: int  # Nummer der Sitzung in der Datei, ab 0
+    function: str
+    handle: int  # None bei Funktionen ohne Achse
+    t_start_ns: int  # time.monotonic_ns() vor dem Aufruf
+    duration_ns: int
+    raised: bool  # XimcError, result ist dann der Fehlercode
+    result: object  # int, float, bytes oder None
+    args: tuple  # int, float, bytes, CtypesBytes oder None je Argument
+
+
+def _target(arg):
+    """Objekt hinter byref(...), sonst das Argument selbst"""
+    return getattr(arg, "_obj", arg)
+
+
+def _handle(arg):
+    if type(arg) is int:
+        return arg
+    arg = _target(arg)
+    if isinstance(arg, _Pointer):
+        arg = arg.contents
+    return int(getattr(arg, "value", arg))
+
+
+def _encode(value, out: bytearray):
+    kind = type(value)
+    if kind is int:
+        out.append(_TAG_INT)
+        out += _INT.pack(value)
+        return
+    if kind is float:
+        out.append(_TAG_FLOAT)
+        out += _FLOAT.pack(value)
+        return
+    prefix = _ctypes_prefixes.get(kind)
+    if prefix is not None:
+        out += prefix
+        out += memoryview(value).cast("B")
+        return
+    value = _target(value)
+    if value is None or isinstance(value, _Pointer):
+        out.append(_TAG_NONE)  # Zeiger (Enumeration) sind nach dem Ende des Prozesses bedeutungslos
+    elif isinstance(value, bytes):
+        out.append(_TAG_BYTES)
+        out += _LENGTH.pack(len(value))
+        out += value
+    elif hasattr(value, "_b_base_"):
+        prefix = _ctypes_prefixes[type(value)] = bytes([_TAG_CTYPES]) + _LENGTH.pack(sizeof(value))
+        out += prefix
+        out += memoryview(value).cast("B")
+    elif isinstance(value, (int, float)):
+        _encode(int(value) if isinstance(value, int) else float(value), out)
+    else:
+        out.append(_TAG_NONE)  # z.B. die Enumeration von SimulatedLibximc
+
+
+def _decode(data: bytes, offset: int) -> tuple:
+    """
+    :return: (Wert, Position nach dem Wert)
+    """
+    tag = data[offset]
+    offset += 1
+    if tag == _TAG_NONE:
+        return None, offset
+    if tag == _TAG_INT:
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == _TAG_FLOAT:
+        return _FLOAT.unpack_from(data, offset)[0], offset + _FLOAT.size
+    length = _LENGTH.unpack_from(data, offset)[0]
+    offset += _LENGTH.size
+    value = data[offset:offset + length]
+    if len(value) < length:
+        raise IndexError("truncated value")
+    return (CtypesBytes(value) if tag == _TAG_CTYPES else bytes(value)), offset + length
+
+
+def read_trace(path: str) -> list:
+    """
+    Liest eine Spur von RecordingLibximc
+    :param path: Datei der Spur
+    :return: TraceCall aller Sitzungen in der Reihenfolge, in der die Aufrufe geendet haben
+    :raise ValueError: wenn die Datei keine Spur ist
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(_MAGIC):
+        raise ValueError(f"{path} is not a libximc trace")
+    calls = []
+    names = {}
+    session = -1
+    offset = len(_MAGIC)
+    while offset < len(data):
+        kind = data[offset]
+        try:
+            if kind == _KIND_SESSION:
+                if offset + _SESSION.size > len(data):
+                    raise IndexError("truncated session")
+                session += 1
+                names = {}
+                offset += _SESSION.size
+            elif kind == _KIND_FUNCTION:
+                _, number, length = _FUNCTION.unpack_from(data, offset)
+                offset += _FUNCTION.size
+                name = data[offset:offset + length]
+                if len(name) < length:
+                    raise IndexError("truncated function name")
+                names[number] = name.decode()
+                offset += length
+            elif kind == _KIND_CALL:
+                _, number, handle, start, duration, flags = _CALL.unpack_from(data, offset)
+                result, offset = _decode(data, offset + _CALL.size)
+                count = data[offset]
+                offset += 1
+                args = []
+                for _ in range(count):
+                    value, offset = _decode(data, offset)
+                    args.append(value)
+                calls.append(TraceCall(session, names[number], None if handle < 0 else handle, start, duration,
+                                       bool(flags & _FLAG_RAISED), result, tuple(args)))
+            else:
+                raise ValueError(f"{path}: unknown record {kind} at byte {offset}")
+        except (IndexError, struct.error):
+            break  # abgeschnittener letzter Eintrag, z.B. nach einem Absturz
+    return calls
+
+
+class RecordingLibximc:
+    """
+    Backend-Hülle, die jeden Aufruf einer libximc-Funktion aus libximc_prototypes an eine Spur anhängt: Funktion,
+    handle, Argumente, Rückgabewert oder Fehlercode, den Inhalt aller übergebenen Strukturen nach dem Aufruf (also
+    auch die Antworten des Controllers) sowie Start und Dauer mit time.monotonic_ns(). ReplayLibximc spielt eine solche
+    Spur ohne Hardware wieder ab.
+
+        Standa.set_backend(RecordingLibximc(load_libximc(), "messung.xtrace"))
+
+    Die Einträge sind binär (struct) und werden gepuffert geschrieben, ein Aufruf kostet einige µs gegenüber der ms
+    eines USB-Roundtrips. Die Datei wird nur verlängert; was vor einem Absturz geschrieben wurde, bleibt lesbar.
+    """
+
+    def __init__(self, backend, path: str, buffer_size: int = 1 << 16):
+        """
+        :param backend: dll oder Simulator, siehe load_libximc
+        :param path: Datei der Spur, eine bestehende Spur wird um eine Sitzung verlängert
+        :param buffer_size: Puffer der Datei in Byte, flush schreibt ihn sofort
+        """
+        self.backend = backend
+        self.path = path
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._file = open(path, "ab", buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+        self._file.write(_SESSION.pack(_KIND_SESSION, time.monotonic_ns(), time.time()))
+        self._numbers = {}
+        for name in libximc_prototypes:
+            function = getattr(backend, name, None)
+            if function is not None:
+                setattr(self, name, self._wrap(name, function))
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["backend"], name)
+
+    def _wrap(self, name: str, function):
+        has_handle = name not in _GLOBAL_FUNCTIONS
+
+        def call(*args):
+            start = time.monotonic_ns()
+            try:
+                result = function(*args)
+            except XimcError as error:
+                self._append(name, has_handle, args, start, time.monotonic_ns() - start, _FLAG_RAISED, error.result)
+                raise
+            self._append(name, has_handle, args, start, time.monotonic_ns() - start, 0, result)
+            return result
+
+        call.__name__ = name
+        return call
+
+    def _append(self, name: str, has_handle: bool, args: tuple, start: int, duration: int, flags: int, result):
+        handle = _handle(args[0]) if has_handle and args else -1
+        with self._lock:
+            if self._file is None:
+                return
+            number = self._numbers.get(name)
+            if number is None:
+                number = self._numbers[name] = len(self._numbers)
+                encoded = name.encode()
+                self._file.write(_FUNCTION.pack(_KIND_FUNCTION, number, len(encoded)) + encoded)
+            # ein Eintrag wird als Ganzes geschrieben
+            record = bytearray(_CALL.pack(_KIND_CALL, number, handle, start, duration, flags))
+            _encode(result, record)
+            record.append(len(args))
+            for arg in args:
+                _encode(arg, record)
+            self._file.write(record)
+            self.calls += 1
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Schreibt den Puffer und schließt die Spur, danach werden Aufrufe nur noch durchgereicht"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _Enumeration:
+    """Platzhalter für das Ergebnis von enumerate_devices, die Namen kommen aus der Spur"""
+
+
+class ReplayLibximc:
+    """
+    Backend, das eine Spur von RecordingLibximc abspielt: Rückgabewerte, Fehlercodes und Antworten in Strukturen
+    kommen aus der Spur, jeder Aufruf dauert so lange wie aufgenommen. Damit laufen aufgenommene Scans ohne Hardware
+    und auch unter Linux, z.B. um die Auswirkung einer Codeänderung auf die Dauer eines Scans zu messen:
+
+        Standa.set_backend(ReplayLibximc("messung.xtrace"))
+
+    Befehle, Schreibzugriffe und die Funktionen ohne Achse werden je Funktion und handle in aufgenommener Reihenfolge
+    beantwortet; fehlen weitere Einträge, gilt der letzte erneut. Abfragen (get_*) beantwortet die Spur nach der Zeit:
+    jeder Befehl setzt die Uhr der Achse auf seinen Zeitpunkt in der Spur, eine Abfrage bekommt den letzten Eintrag,
+    der bis zur seitdem vergangenen Zeit aufgenommen wurde. Fragt der geänderte Code seltener oder öfter nach dem
+    Status, endet eine Bewegung deshalb trotzdem nach der aufgenommenen Dauer. Aufrufe, die in der Spur nicht
+    vorkommen, zählt missing und beantwortet sie mit Result.NotImplemented.
+    """
+
+    def __init__(self, path: str, session: int = -1, speed: float = 1.0):
+        """
+        :param path: Datei der Spur
+        :param session: abzuspielende Sitzung der Datei, Standard ist die letzte
+        :param speed: Faktor, um den schneller als aufgenommen abgespielt wird
+        """
+        calls = read_trace(path)
+        sessions = sorted({call.session for call in calls})
+        if not sessions:
+            raise ValueError(f"{path} contains no calls")
+        self.session = sessions[session]
+        self.speed = speed
+        self.call_count = 0
+        self.missing = {}  # Funktion: Anzahl der Aufrufe ohne Eintrag in der Spur
+        self._lock = threading.Lock()
+        self._sequences = {}  # (Funktion, handle): deque der Einträge
+        self._last = {}  # (Funktion, handle): zuletzt abgespielter Eintrag
+        self._queries = {}  # (Funktion, handle): (Startzeiten, Einträge)
+        self._query_index = {}  # (Funktion, handle): zuletzt abgespielter Index, die Zeit läuft nicht zurück
+        self._clocks = {}  # handle: (Zeit in der Spur, time.monotonic_ns() beim Abspielen)
+        for call in sorted((call for call in calls if call.session == self.session), key=lambda call: call.t_start_ns):
+            key = (call.function, call.handle)
+            if self._is_query(call.function, call.handle):
+                starts, entries = self._queries.setdefault(key, ([], []))
+                starts.append(call.t_start_ns)
+                entries.append(call)
+            else:
+                self._sequences.setdefault(key, deque()).append(call)
+        for name in libximc_prototypes:
+            setattr(self, name, self._function(name))
+
+    @staticmethod
+    def _is_query(name: str, handle) -> bool:
+        return handle is not None and name.startswith("get_")
+
+    def _select(self, name: str, handle, now: int):
+        key = (name, handle)
+        if not self._is_query(name, handle):
+            sequence = self._sequences.get(key)
+            if sequence:
+                self._last[key] = sequence.popleft()
+            return self._last.get(key)
+        if key not in self._queries:
+            return None
+        starts, entries = self._queries[key]
+        recorded, replayed = self._clocks.get(handle, (starts[0], now))
+        position = recorded + (now - replayed) * self.speed
+        index = max(bisect.bisect_right(starts, position) - 1, bisect.bisect_left(starts, recorded),
+                    self._query_index.get(key, 0))
+        index = min(index, len(entries) - 1)
+        self._query_index[key] = index
+        return entries[index]
+
+    def _function(self, name: str):
+        restype, _, errcheck = libximc_prototypes[name]
+        has_handle = name not in _GLOBAL_FUNCTIONS
+
+        def call(*args):
+            now = time.monotonic_ns()
+            handle = _handle(args[0]) if has_handle and args else None
+            with self._lock:
+                self.call_count += 1
+                entry = self._select(name, handle, now)
+                if entry is None:
+                    self.missing[name] = self.missing.get(name, 0) + 1
+            if entry is None:
+                if restype is result_t:
+                    return Result.NotImplemented if errcheck is None else errcheck(Result.NotImplemented, name, args)
+                return -1 if restype is c_int else None
+            # aufgenommene Dauer ab dem Aufruf, die eigene Rechenzeit zählt also mit
+            remaining = entry.duration_ns / self.speed - (time.monotonic_ns() - now)
+            if remaining > 0:
+                time.sleep(remaining / 1e9)
+            if name.startswith("get_"):
+                self._copy_outputs(args, entry.args)
+            if not self._is_query(name, handle):
+                clock = (entry.t_start_ns + entry.duration_ns, time.monotonic_ns())
+                with self._lock:
+                    if name == "open_device" and isinstance(entry.result, int) and entry.result >= 0:
+                        self._clocks[entry.result] = clock
+                    elif handle is not None:
+                        self._clocks[handle] = clock
+            if entry.raised:
+                return check_result(entry.result, name, args)
+            if isinstance(restype, type) and issubclass(restype, _Pointer):
+                return _Enumeration()
+            return entry.result
+
+        call.__name__ = name
+        return call
+
+    @staticmethod
+    def _copy_outputs(args: tuple, recorded: tuple):
+        """Schreibt die aufgenommenen Antworten in die übergebenen Strukturen, Kalibrierungen sind Eingaben"""
+        for arg, data in zip(args, recorded):
+            if not isinstance(data, CtypesBytes):
+                continue
+            target = _target(arg)
+            if isinstance(target, calibration_t) or not hasattr(target, "_b_base_"):
+                continue
+            memmove(addressof(target), data, min(len(data), sizeof(target)))
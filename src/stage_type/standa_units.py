@@ -0,0 +1,80 @@
+import numpy as np
+
+from src.stage_type.STANDA_bindings import *
+
+
+class StepConverter:
+    """
+    Umrechnung zwischen Benutzereinheiten und (step, mstep) des Controllers wie bei den *_calb-Funktionen der libximc:
+    user_value = A*(step + mstep/pow(2,MicrostepMode-1)). Damit kann Standa die unkalibrierten Funktionen get_position,
+    command_move und command_movr mit ganzen Zahlen aufrufen; die Benutzereinheit geht dabei nicht als float32 über
+    die Schnittstelle wie bei command_move_calb und get_position_calb_t.
+
+    Ziele werden auf den nächsten Mikroschritt gerundet (bei genau einem halben Mikroschritt auf den geraden), step und
+    mstep haben wie beim Controller beide das Vorzeichen des Werts. Einzelwerte (step_target, user_value) und Arrays
+    (to_steps, to_user) rechnen in derselben Reihenfolge und liefern deshalb bitgleiche Ergebnisse.
+    """
+
+    def __init__(self, a: float, microstep_mode: int):
+        """
+        :param a: Benutzereinheiten je Vollschritt, calibration_t.A
+        :param microstep_mode: MicrostepMode, 1 (Vollschritt) bis 9 (1/256)
+        :raise ValueError: wenn a 0 ist
+        """
+        if not a:
+            raise ValueError("Calibration A must not be 0")
+        self.a = float(a)
+        self.microstep_mode = int(microstep_mode)
+        self.fraction = 1 << (max(self.microstep_mode, 1) - 1)  # Mikroschritte je Vollschritt
+
+    @classmethod
+    def from_calibration(cls, calibration: calibration_t) -> "StepConverter":
+        return cls(calibration.A, calibration.MicrostepMode)
+
+    def step_target(self, value: float) -> tuple:
+        """
+        :param value: Position oder Strecke in Benutzereinheiten
+        :return: (step, mstep) als int
+        """
+        total = round(value / self.a * self.fraction)
+        step = abs(total) // self.fraction
+        if total < 0:
+            step = -step
+        return step, total - step * self.fraction
+
+    def user_value(self, step: int, mstep: int = 0) -> float:
+        return self.a * (step + mstep / self.fraction)
+
+    def to_microsteps(self, values) -> np.ndarray:
+        """
+        :param values: Positionen in Benutzereinheiten, beliebige Form
+        :return: Positionen in Mikroschritten als int64
+        """
+        return np.rint(np.asarray(values, dtype=np.float64) / self.a * self.fraction).astype(np.int64)
+
+    def split(self, microsteps) -> tuple:
+        """
+        :param microsteps: Positionen in Mikroschritten
+        :return: (step, mstep) als int64-Arrays, beide mit dem Vorzeichen der Position
+        """
+        microsteps = np.asarray(microsteps, dtype=np.int64)
+        step = np.abs(microsteps) // self.fraction
+        step = np.where(microsteps < 0, -step, step)
+        return step, microsteps - step * self.fraction
+
+    def to_steps(self, values) -> tuple:
+        """
+        Rechnet z.B. alle Ziele eines Scans einmal vorab um, siehe Standa.move_towards_steps
+        :param values: Positionen in Benutzereinheiten, beliebige Form
+        :return: (step, mstep) als int64-Arrays
+        """
+        return self.split(self.to_microsteps(values))
+
+    def to_user(self, step, mstep=0) -> np.ndarray:
+        """
+        :return: Positionen in Benutzereinheiten als float64-Array
+        """
+        return self.a * (np.asarray(step, dtype=np.float64) + np.asarray(mstep, dtype=np.float64) / self.fraction)
+
+    def microsteps_to_user(self, microsteps) -> np.ndarray:
+        return self.to_user(*self.split(microsteps))
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# the modules are imported as src.stage_type.*, like in the benchmarks with PYTHONPATH=.
+ROOT = Path(__file__).parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.stage_type.Standa import Standa  # noqa: E402
+from src.stage_type.standa_registry import DeviceRegistry  # noqa: E402
+from src.stage_type.standa_simulator import SimulatedLibximc  # noqa: E402
+from src.stage_type.standa_two_axes import StandaTwoAxes  # noqa: E402
+
+
+@pytest.fixture
+def open_stage(tmp_path):
+    """Opens StandaTwoAxes through a backend, default a fresh SimulatedLibximc with 0.2 ms command latency. All stages
+    are closed after the test."""
+    stages = []
+
+    def open_stage(backend=None) -> StandaTwoAxes:
+        Standa.set_backend(backend or SimulatedLibximc(latency=0.0002))
+        stage = StandaTwoAxes(DeviceRegistry(tmp_path / f"standa_devices_{len(stages)}.json"))
+        assert stage.open_connection()
+        stages.append(stage)
+        return stage
+
+    yield open_stage
+    for stage in stages:
+        stage.close_connection()
+
+
+@pytest.fixture
+def stage(open_stage) -> StandaTwoAxes:
+    return open_stage()
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import wait
+
+import pytest
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.standa_motion import MotionSupervisor
+
+
+def test_move_absolut_many_moves_all_axes_and_times_each(stage):
+    results = stage.move_absolut_many({1: 0.5, 2: 0.02})
+
+    assert all(result["result"] for result in results.values())
+    assert results[1]["position"] == pytest.approx(0.5, abs=1e-5)
+    assert results[2]["position"] == pytest.approx(0.02, abs=1e-5)
+    assert results[2]["time"] < results[1]["time"]
+    assert stage.get_angles() == {1: pytest.approx(0.5, abs=1e-3), 2: pytest.approx(0.02, abs=1e-3)}
+
+
+def test_move_absolut_many_reports_rejected_axis(stage):
+    stage.axes[2].soft_limits = (-1.0, 1.0)
+
+    results = stage.move_absolut_many({1: 0.05, 2: 5.0})
+
+    assert results[1]["result"]
+    assert results[2] == {"result": False, "error": Result.ValueError, "position": None, "time": results[2]["time"]}
+
+
+def test_supervisor_timeout_fails_future_and_stops_axis(stage):
+    supervisor = MotionSupervisor()
+    axis = stage.axis1
+    try:
+        future = supervisor.move_absolut(axis, 50.0, timeout=0.02)
+        with pytest.raises(TimeoutError):
+            future.result(5)
+        assert not axis.is_moving(axis.get_status(status_t()))
+        assert axis.get_position_calb() < 1.0
+    finally:
+        supervisor.shutdown()
+
+
+def test_supervisor_shutdown_fails_pending_futures(stage):
+    supervisor = MotionSupervisor()
+    futures = [supervisor.move_absolut(stage.axis1, 50.0), supervisor.move_absolut(stage.axis2, -50.0)]
+    time.sleep(0.01)
+    supervisor.shutdown()
+
+    done, pending = wait(futures, timeout=1)
+    assert not pending
+    for future in futures:
+        assert isinstance(future.exception(), RuntimeError)
+    stage.stop_movement()
+
+
+def test_supervisor_callback_gets_result(stage):
+    supervisor = MotionSupervisor()
+    seen = []
+    try:
+        future = supervisor.move_absolut(stage.axis1, 0.05, callback=seen.append)
+        assert future.result(5).position == pytest.approx(0.05, abs=1e-5)
+        assert seen == [future]
+    finally:
+        supervisor.shutdown()
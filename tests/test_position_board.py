@@ -0,0 +1,71 @@
+import os
+import threading
+import uuid
+
+import pytest
+
+from src.stage_type.standa_position_board import PositionBoard, PositionBoardPublisher
+
+
+@pytest.fixture
+def publisher(stage):
+    publisher = PositionBoardPublisher(stage, f"test_board_{os.getpid()}_{uuid.uuid4().hex[:8]}", rate=2000.0)
+    yield publisher
+    publisher.close()
+
+
+def test_reader_sees_only_complete_updates(stage, publisher):
+    board = PositionBoard(publisher.name)
+    publisher.start()
+    mover = threading.Thread(target=stage.move_absolut_many, args=({1: 0.2, 2: -0.2},))
+    mover.start()
+    sequences = []
+    try:
+        while mover.is_alive() or len(sequences) < 100:
+            sequence, records = board.read()
+            # jede Aktualisierung schreibt alle Achsen, eine vollständige Kopie hat überall denselben Zähler
+            assert records["updates"][0] == records["updates"][1]
+            assert sequence % 2 == 0
+            sequences.append(sequence)
+    finally:
+        mover.join()
+        board.close()
+
+    assert sequences == sorted(sequences)
+    assert sequences[-1] > sequences[0]
+    assert publisher.errors == 0
+
+
+def test_board_shows_the_stage_position(stage, publisher):
+    stage.move_absolut_many({1: 0.05, 2: -0.05})
+    publisher.publish()
+    board = PositionBoard(publisher.name)
+    try:
+        assert board.get_angles() == {1: pytest.approx(0.05, abs=1e-5), 2: pytest.approx(-0.05, abs=1e-5)}
+        assert board.get_angle(2) == pytest.approx(-0.05, abs=1e-5)
+        with pytest.raises(ValueError):
+            board.get_angle(7)
+    finally:
+        board.close()
+
+
+def test_read_times_out_while_writer_is_stuck(publisher):
+    publisher.publish()
+    board = PositionBoard(publisher.name, timeout=0.05)
+    publisher._sequence += 1  # wie ein Publisher, der mitten im Schreiben beendet wurde
+    try:
+        with pytest.raises(TimeoutError):
+            board.read()
+    finally:
+        publisher._sequence += 1
+        board.close()
+
+
+def test_second_publisher_of_a_live_board_fails(stage, publisher):
+    with pytest.raises(FileExistsError):
+        PositionBoardPublisher(stage, publisher.name)
+
+
+def test_missing_board_raises(stage):
+    with pytest.raises(FileNotFoundError):
+        PositionBoard(f"test_board_missing_{uuid.uuid4().hex[:8]}")
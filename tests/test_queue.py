@@ -0,0 +1,68 @@
+import queue
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from src.stage_type.standa_queue import MotionQueue
+
+
+@pytest.fixture
+def motion_queue(stage):
+    motion_queue = MotionQueue(stage.axis1, depth=4)
+    yield motion_queue
+    motion_queue.close()
+
+
+def test_relative_moves_do_not_accumulate_rounding(motion_queue):
+    futures = [motion_queue.move_relative(0.001) for _ in range(50)]
+
+    assert motion_queue.join(10)
+    assert futures[-1].result().position == pytest.approx(0.05, abs=1e-6)
+    assert all(future.done() and not future.cancelled() for future in futures)
+
+
+def test_full_queue_raises_after_timeout(motion_queue):
+    with pytest.raises(queue.Full):
+        for index in range(10):
+            motion_queue.enqueue(1.0 + index, timeout=0.0)
+    motion_queue.cancel()
+    assert motion_queue.join(5)
+
+
+def test_flush_drops_waiting_moves(motion_queue):
+    futures = [motion_queue.enqueue(1.0 + 0.01 * index) for index in range(4)]
+    flushed = motion_queue.flush()
+
+    assert motion_queue.join(10)
+    assert flushed >= 1
+    assert sum(future.cancelled() for future in futures) == flushed
+    motion_queue.axis.stop()
+
+
+def test_no_move_is_sent_after_flush_returns(motion_queue):
+    """enqueue racing with flush: every move is either flushed or completed, none is left behind"""
+    for index in range(100):
+        futures = []
+        thread = threading.Thread(target=lambda: futures.append(motion_queue.enqueue(0.01 * (index % 3))))
+        thread.start()
+        motion_queue.flush()
+        thread.join()
+        try:
+            futures[0].result(5)
+        except CancelledError:
+            pass
+    assert motion_queue.join(5)
+    assert motion_queue._unfinished == 0
+    assert motion_queue._slots._value == motion_queue.depth
+
+
+def test_cancel_ends_running_moves_with_cancelled_error(motion_queue):
+    future = motion_queue.enqueue(20.0)
+    while motion_queue.active is None:
+        pass
+    motion_queue.cancel()
+
+    with pytest.raises(CancelledError):
+        future.result(5)
+    assert motion_queue.axis.get_position_calb() < 20.0
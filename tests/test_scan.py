@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.bench_scan import grid
+from src.stage_type.standa_scan import ScanExecutor
+
+
+@pytest.mark.parametrize("preconvert", [False, True])
+@pytest.mark.parametrize("overlap", [False, True])
+def test_scan_reaches_every_point(stage, preconvert, overlap):
+    targets = grid(3, 3)
+
+    result = ScanExecutor(stage, preconvert=preconvert).run(targets, overlap=overlap)
+
+    assert result.points["ok"].all()
+    assert result.points["achieved"] == pytest.approx(result.points["commanded"], abs=1e-3)
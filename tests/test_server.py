@@ -0,0 +1,130 @@
+import os
+import socket
+import stat
+import tempfile
+
+import pytest
+
+from src.stage_type.STANDA_bindings import *
+from src.stage_type.standa_server import (Op, StageClient, StageServer, _COUNT, _FRAME, _OPERATION, _RESULT,
+                                         _socket_directory, default_address)
+
+
+@pytest.fixture
+def server(stage, tmp_path):
+    server = StageServer(stage, str(tmp_path / "stage.sock")).start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    client = StageClient(server.address, timeout=30.0)
+    assert client.open_connection()
+    yield client
+    client.close_connection()
+
+
+def test_client_sees_the_stage_of_the_server(stage, client):
+    assert client.axes == [1, 2]
+    assert client.get_angles() == pytest.approx(stage.get_angles())
+    assert client.get_angle(2) == pytest.approx(stage.get_angle(2))
+
+
+def test_move_absolut_round_trip(stage, client):
+    client.move_absolut(1, 0.05)
+
+    assert client.get_angle(1) == pytest.approx(0.05, abs=1e-5)
+    assert stage.get_angle(1) == pytest.approx(0.05, abs=1e-5)
+
+
+def test_move_absolut_many_round_trip(client):
+    results = client.move_absolut_many({1: 0.2, 2: -0.02})
+
+    assert all(result["result"] for result in results.values())
+    assert results[1]["position"] == pytest.approx(0.2, abs=1e-5)
+    assert results[2]["position"] == pytest.approx(-0.02, abs=1e-5)
+    assert results[1]["time"] > 0 and results[2]["time"] > 0
+
+
+def test_batch_returns_results_in_order(client):
+    with client.batch() as batch:
+        batch.move_towards(1, 0.04)
+        batch.move_towards(2, 0.02)
+        batch.wait_for_move(1)
+        batch.wait_for_move(2)
+        batch.get_angles()
+    first, second, angles = batch.results[2:]
+
+    assert first == pytest.approx(0.04, abs=1e-5)
+    assert second == pytest.approx(0.02, abs=1e-5)
+    assert angles == {1: pytest.approx(0.04, abs=1e-5), 2: pytest.approx(0.02, abs=1e-5)}
+
+
+def test_server_errors_raise_ximc_error(client):
+    with pytest.raises(XimcError):
+        client.move_absolut(1, float("inf"))
+    with pytest.raises(XimcError):
+        client.get_angle(7)
+    assert client.get_angle(1) == pytest.approx(0.0, abs=1e-5)
+
+
+def test_malformed_request_gets_value_error(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(server.address)
+        payload = _COUNT.pack(2) + _OPERATION.pack(Op.GET_ANGLE, 1, 0.0)  # zwei Befehle angekündigt, einer gesendet
+        sock.sendall(_FRAME.pack(len(payload), 42) + payload)
+        length, request_id = _FRAME.unpack(sock.recv(_FRAME.size, socket.MSG_WAITALL))
+        response = sock.recv(length, socket.MSG_WAITALL)
+
+    assert request_id == 42
+    assert response == _COUNT.pack(1) + _RESULT.pack(Result.ValueError, 0)
+
+
+def test_subscribe_pushes_positions(client):
+    received = []
+    client.subscribe(lambda timestamp, angles: received.append(angles), interval=0.001)
+    client.move_absolut(1, 0.05)
+    client.unsubscribe()
+
+    assert received
+    assert set(received[-1]) == {1, 2}
+
+
+def test_second_server_on_live_socket_fails(stage, server):
+    with pytest.raises(OSError):
+        StageServer(stage, server.address)
+
+
+def test_client_without_server_does_not_connect(tmp_path):
+    assert not StageClient(str(tmp_path / "missing.sock")).open_connection()
+
+
+def test_socket_is_private_to_the_user(server):
+    assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+
+
+def test_default_socket_directory_is_private(stage, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.delenv("API_ANGLE_STAGE_SOCKET", raising=False)
+    server = StageServer(stage)
+    try:
+        assert os.path.dirname(server.address) == _socket_directory()
+        assert stat.S_IMODE(os.stat(os.path.dirname(server.address)).st_mode) == 0o700
+    finally:
+        server.close()
+
+
+def test_shared_default_socket_directory_is_refused(stage, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.delenv("API_ANGLE_STAGE_SOCKET", raising=False)
+    os.makedirs(_socket_directory())
+    os.chmod(_socket_directory(), 0o777)
+    with pytest.raises(PermissionError):
+        StageServer(stage)
+
+
+def test_socket_path_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("API_ANGLE_STAGE_SOCKET", str(tmp_path / "rig3.sock"))
+    assert default_address() == str(tmp_path / "rig3.sock")
+    assert StageClient().address == str(tmp_path / "rig3.sock")
@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parents[1]
+
+# modules that must not be loaded just to list the stages: the Standa stack with its libximc/ctypes setup, numpy and
+# the Qt error popup
+_HEAVY = ("ctypes", "numpy", "PyQt5", "src.stage_type.Standa", "src.stage_type.standa_backend",
+          "src.stage_type.STANDA_bindings", "src.stage_type.standa_two_axes", "src.stage_type.stage_base")
+
+
+def _run(snippet: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def test_import_loads_no_library_or_heavy_module():
+    result = _run(f"""
+import json, sys, time
+start = time.perf_counter()
+from src.api_angle_stage import AngleStageAPI, available_stages
+AngleStageAPI()
+stages = list(available_stages)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"stages": stages, "seconds": elapsed,
+                  "loaded": [name for name in {_HEAVY!r} if name in sys.modules]}}))
+""")
+    assert "StandaTwoAxes" in result["stages"]
+    assert result["loaded"] == []
+    assert result["seconds"] < 0.5
+
+
+def test_stage_classes_load_libximc_only_on_first_use():
+    result = _run("""
+import json
+from src.stage_type.standa_two_axes import StandaTwoAxes
+from src.stage_type.Standa import Standa
+print(json.dumps({"lib": Standa.lib is not None}))
+""")
+    assert result == {"lib": False}
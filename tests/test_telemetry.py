@@ -0,0 +1,41 @@
+import pytest
+
+from src.stage_type.standa_telemetry import TelemetrySampler
+
+
+@pytest.fixture
+def sampler(stage):
+    sampler = TelemetrySampler(stage.axis1, rate=2000.0, capacity=64)
+    yield sampler
+    sampler.stop()
+
+
+def test_reading_before_start_raises(sampler):
+    with pytest.raises(RuntimeError):
+        sampler.snapshot()
+    with pytest.raises(RuntimeError):
+        sampler.stream(timeout=0.01)
+
+
+def test_stream_follows_a_move(stage, sampler):
+    sampler.start()
+    stage.axis1.move_towards(0.2)
+    positions = []
+    for records in sampler.stream(timeout=1.0):
+        positions.extend(sampler.positions(records).tolist())
+        if records["MoveSts"][-1] == 0 and positions[-1] == pytest.approx(0.2, abs=1e-5):
+            break
+
+    assert positions == sorted(positions)
+    assert sampler.errors == 0
+
+
+def test_snapshot_stays_readable_after_stop(sampler):
+    sampler.start()
+    for _ in sampler.stream(timeout=1.0, max_batch=1):
+        break
+    sampler.stop()
+
+    records = sampler.snapshot()
+    assert 0 < len(records) <= sampler.capacity
+    assert list(sampler.stream(timeout=0.01)) == []
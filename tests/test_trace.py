@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.bench_scan import grid
+from src.stage_type.standa_scan import ScanExecutor
+from src.stage_type.standa_simulator import SimulatedLibximc
+from src.stage_type.standa_trace import _MAGIC, RecordingLibximc, ReplayLibximc, read_trace
+
+
+def _scan(stage, targets) -> dict:
+    stage.go_home()
+    ScanExecutor(stage).run(targets)
+    return stage.get_angles()
+
+
+def test_replayed_scan_ends_where_the_recorded_scan_ended(open_stage, tmp_path):
+    path = str(tmp_path / "scan.xtrace")
+    targets = grid(3, 3)
+    recorder = RecordingLibximc(SimulatedLibximc(latency=0.0002), path)
+    recorded_stage = open_stage(recorder)
+    recorded = _scan(recorded_stage, targets)
+    recorded_stage.close_connection()
+    recorder.close()
+
+    replay = ReplayLibximc(path)
+    replayed = _scan(open_stage(replay), targets)
+
+    assert replayed == recorded
+    assert replay.missing == {}
+
+
+def test_truncated_trace_reads_complete_calls(tmp_path):
+    path = tmp_path / "calls.xtrace"
+    with RecordingLibximc(SimulatedLibximc(), str(path)) as recorder:
+        for _ in range(3):
+            recorder.get_device_count(recorder.enumerate_devices(0, b""))
+    calls = read_trace(str(path))
+    data = path.read_bytes()
+
+    cut = tmp_path / "cut.xtrace"
+    for size in range(len(_MAGIC), len(data)):
+        cut.write_bytes(data[:size])
+        prefix = read_trace(str(cut))
+        assert prefix == calls[:len(prefix)]
+    assert [call.function for call in calls].count("get_device_count") == 3